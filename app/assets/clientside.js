@@ -0,0 +1,82 @@
+// Clientside callbacks for UI bookkeeping that needs no data from the server.
+// They are registered in callbacks.py with ClientsideFunction("nplinker", <function name>).
+
+window.dash_clientside = window.dash_clientside || {};
+
+// Random version 4 UUID. crypto.randomUUID is only available on secure origins (HTTPS or
+// localhost), crypto.getRandomValues works on plain HTTP as well.
+function uuid4() {
+    const bytes = crypto.getRandomValues(new Uint8Array(16));
+    bytes[6] = (bytes[6] & 0x0f) | 0x40;
+    bytes[8] = (bytes[8] & 0x3f) | 0x80;
+    const hex = Array.from(bytes, (byte) => byte.toString(16).padStart(2, "0")).join("");
+    return [
+        hex.slice(0, 8),
+        hex.slice(8, 12),
+        hex.slice(12, 16),
+        hex.slice(16, 20),
+        hex.slice(20),
+    ].join("-");
+}
+
+window.dash_clientside.nplinker = {
+    // Add a new filter or scoring block when one of the add buttons is clicked.
+    // Returns the block IDs with the ID of the new block appended.
+    add_block: function (n_clicks, blocks_id) {
+        if (!n_clicks.some(Boolean)) {
+            throw window.dash_clientside.PreventUpdate;
+        }
+        return blocks_id.concat([uuid4()]);
+    },
+
+    // Toggle the visibility of a column settings modal.
+    toggle_modal: function (n1, n2, is_open) {
+        if (n1 || n2) {
+            return !is_open;
+        }
+        return is_open;
+    },
+
+    // Enable the download button of a results table once the table has data.
+    // Returns the disabled state of the button, the alert visibility and the alert message.
+    toggle_download_button: function (table_data) {
+        return [!table_data || table_data.length === 0, false, ""];
+    },
+
+    // Select all rows matching the filters of a data table, or none of them.
+    // The selection handle is described in table_selection in callbacks.py: selecting all rows
+    // only sets a flag on the filtered rows kept server-side. Returns the selection handle and
+    // the indices of the selected records of the visible page.
+    toggle_selection: function (value, selection, page_data) {
+        if (!selection || !selection.view) {
+            return [selection, []];
+        }
+        const is_checked = Boolean(value && value.includes("disabled"));
+        if (is_checked === Boolean(selection.all)) {
+            // Dash also fires this callback when the checkbox is set to its current value,
+            // which must keep the rows picked on other pages
+            throw window.dash_clientside.PreventUpdate;
+        }
+        const selected_rows = is_checked ? (page_data || []).map((_, i) => i) : [];
+        return [Object.assign({}, selection, {all: is_checked, rows: []}), selected_rows];
+    },
+
+    // Clear a results table when the selected rows of its data table change.
+    // Returns the alert message and visibility, the table data and tooltips, the card body and
+    // header styles, the disabled state of the column settings button and the results token.
+    reset_results: function (selection) {
+        return ["", false, [], [], {display: "none"}, {color: "#888888"}, true, null];
+    },
+
+    // Describe the number of rows matching the filters and the number of selected rows.
+    select_rows: function (selection) {
+        if (!selection || !selection.n_rows) {
+            return ["No data available.", "No rows selected."];
+        }
+        // With all rows selected, the rows of the handle are the deselected ones
+        const n_selected = selection.all
+            ? selection.n_rows - selection.rows.length
+            : selection.rows.length;
+        return [`Total rows: ${selection.n_rows}`, `Selected rows: ${n_selected}\n`];
+    },
+};
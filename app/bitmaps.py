@@ -0,0 +1,86 @@
+import numpy as np
+
+
+# Bitmaps mark a subset of the rows of an entity table, one bit per row, packed into bytes.
+# Set operations on row subsets are then bitwise operations on a few bytes per 8 rows.
+
+
+def empty_bitmap(n_rows: int) -> np.ndarray:
+    """Return the bitmap of no rows of a table with `n_rows` rows."""
+    return np.zeros((n_rows + 7) // 8, dtype=np.uint8)
+
+
+def full_bitmap(n_rows: int) -> np.ndarray:
+    """Return the bitmap of all rows of a table with `n_rows` rows."""
+    return np.packbits(np.ones(n_rows, dtype=bool), bitorder="little")
+
+
+def rows_to_bitmap(rows: np.ndarray, n_rows: int) -> np.ndarray:
+    """Return the bitmap of the given rows of a table with `n_rows` rows.
+
+    Args:
+        rows: Row indices, in any order and possibly repeated.
+        n_rows: Number of rows of the table.
+
+    Returns:
+        The packed bitmap.
+    """
+    mask = np.zeros(n_rows, dtype=bool)
+    mask[rows] = True
+    return np.packbits(mask, bitorder="little")
+
+
+def bitmap_to_rows(bitmap: np.ndarray, n_rows: int) -> np.ndarray:
+    """Return the sorted rows marked in a bitmap of a table with `n_rows` rows."""
+    return np.flatnonzero(np.unpackbits(bitmap, count=n_rows, bitorder="little"))
+
+
+def union(bitmaps: list[np.ndarray], n_rows: int) -> np.ndarray:
+    """Return the bitmap of the rows marked in any of the bitmaps."""
+    if not bitmaps:
+        return empty_bitmap(n_rows)
+    result: np.ndarray = np.bitwise_or.reduce(bitmaps)
+    return result
+
+
+def intersection(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Return the bitmap of the rows marked in both bitmaps."""
+    result: np.ndarray = a & b
+    return result
+
+
+def difference(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Return the bitmap of the rows marked in `a` but not in `b`."""
+    result: np.ndarray = a & ~b
+    return result
+
+
+def bitsets(rows: np.ndarray, bits: np.ndarray, n_rows: int, n_bits: int) -> np.ndarray:
+    """Return one bitmap of `n_bits` bits per row, with bit `bits[i]` set in row `rows[i]`.
+
+    Args:
+        rows: Row of each set bit.
+        bits: Position of each set bit in its row.
+        n_rows: Number of rows.
+        n_bits: Number of bits per row.
+
+    Returns:
+        The packed bitmaps, an array of shape (n_rows, bytes per row).
+    """
+    n_bytes = (n_bits + 7) // 8
+    # Once repeated bits are dropped, summing the bit values within a byte equals OR-ing them
+    positions = np.unique(np.asarray(rows, dtype=np.int64) * n_bits + bits)
+    rows, bits = np.divmod(positions, n_bits)
+    values = np.bincount(
+        rows * n_bytes + bits // 8,
+        weights=np.left_shift(1, bits % 8),
+        minlength=n_rows * n_bytes,
+    )
+    result: np.ndarray = values.astype(np.uint8).reshape(n_rows, n_bytes)
+    return result
+
+
+def count(bitmaps: np.ndarray) -> np.ndarray:
+    """Return the number of set bits of the bitmap in the last axis, e.g. of each row."""
+    result: np.ndarray = np.bitwise_count(bitmaps).sum(axis=-1, dtype=np.int64)
+    return result
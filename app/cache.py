@@ -0,0 +1,210 @@
+import hashlib
+import io
+import os
+import pickle
+import re
+import tempfile
+from pathlib import Path
+from typing import Any
+
+
+# Bump whenever the layout of the processed data changes, so stale cache entries are ignored
+CACHE_SCHEMA_VERSION = 14
+
+_CHUNK_SIZE = 8 * 1024 * 1024
+
+_DIGEST_PATTERN = re.compile(r"[0-9a-f]{64}")
+
+
+def file_digest(file_path: Path | str) -> str:
+    """Compute the SHA-256 digest of a file, reading it in chunks.
+
+    Args:
+        file_path: Path to the file.
+
+    Returns:
+        The hexadecimal digest of the file content.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class _HashingReader:
+    """Binary file wrapper feeding everything read from the file to a SHA-256 digest."""
+
+    def __init__(self, f: io.BufferedReader) -> None:
+        self._f = f
+        self.digest = hashlib.sha256()
+
+    def read(self, size: int = -1) -> bytes:
+        data = self._f.read(size)
+        self.digest.update(data)
+        return data
+
+    def readline(self, size: int = -1) -> bytes:
+        data = self._f.readline(size)
+        self.digest.update(data)
+        return data
+
+    def readinto(self, buffer: bytearray | memoryview) -> int:
+        n = self._f.readinto(buffer)
+        self.digest.update(memoryview(buffer)[:n])
+        return n
+
+
+def load_pickle_with_digest(file_path: Path | str) -> tuple[Any, str]:
+    """Unpickle a file and compute its SHA-256 digest while reading it once.
+
+    The file is streamed to the unpickler through a wrapper that hashes what it reads, so the
+    raw content of the file is never held in memory next to the unpickled objects.
+
+    Args:
+        file_path: Path to the pickle file.
+
+    Returns:
+        The unpickled object and the hexadecimal digest of the file content.
+
+    Raises:
+        pickle.UnpicklingError, EOFError, AttributeError: If the file is not a valid pickle file.
+    """
+    with open(file_path, "rb") as f:
+        reader = _HashingReader(f)
+        data = pickle.load(reader)
+        # Hash anything following the pickle, so the digest covers the whole file
+        for _ in iter(lambda: reader.read(_CHUNK_SIZE), b""):
+            pass
+    return data, reader.digest.hexdigest()
+
+
+def is_digest(token: object) -> bool:
+    """Return whether a token is a hexadecimal SHA-256 digest, as computed by `file_digest`."""
+    return isinstance(token, str) and _DIGEST_PATTERN.fullmatch(token) is not None
+
+
+def _owned_by_current_user(stat: os.stat_result) -> bool:
+    # Ownership cannot be checked on platforms without user IDs
+    return not hasattr(os, "getuid") or stat.st_uid == os.getuid()
+
+
+class ProcessedDataCache:
+    """Content-addressed on-disk cache of processed uploads.
+
+    Entries are keyed by the digest of the uploaded file and the cache schema version, so that an
+    identical upload can skip unpickling and processing altogether. When the total size of the
+    cache exceeds `max_bytes`, the least recently used entries are removed.
+
+    Entries are pickles, so the cache directory is created private to the current user and
+    entries owned by another user are never loaded.
+    """
+
+    def __init__(self, cache_dir: Path | str, max_bytes: int) -> None:
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+
+    def path_for(self, digest: str) -> Path:
+        """Return the path of the cache entry for the given digest.
+
+        Raises:
+            ValueError: If the digest is not a hexadecimal SHA-256 digest. Digests come from
+                the browser, so they are never used to build a path otherwise.
+        """
+        if not is_digest(digest):
+            raise ValueError(f"Invalid cache digest: {digest!r}")
+        return self.cache_dir / f"{digest}.v{CACHE_SCHEMA_VERSION}.pkl"
+
+    def __contains__(self, digest: object) -> bool:
+        return is_digest(digest) and self.path_for(str(digest)).exists()
+
+    def load(self, digest: str) -> Any | None:
+        """Load the processed data cached for a digest.
+
+        Args:
+            digest: Digest of the uploaded file.
+
+        Returns:
+            The cached processed data, or None on a cache miss, an unreadable entry or an
+            invalid digest.
+        """
+        if not is_digest(digest):
+            return None
+        path = self.path_for(digest)
+        try:
+            with open(path, "rb") as f:
+                if not _owned_by_current_user(os.fstat(f.fileno())):
+                    print(f"Refusing cache entry {path} owned by another user")
+                    return None
+                entry = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"Discarding unreadable cache entry {path}: {e}")
+            path.unlink(missing_ok=True)
+            return None
+
+        if (
+            not isinstance(entry, dict)
+            or entry.get("schema_version") != CACHE_SCHEMA_VERSION
+            or entry.get("digest") != digest
+        ):
+            path.unlink(missing_ok=True)
+            return None
+
+        # Mark the entry as recently used for eviction
+        os.utime(path)
+        return entry["data"]
+
+    def store(self, digest: str, data: Any) -> None:
+        """Write processed data to the cache and evict old entries if over budget.
+
+        Args:
+            digest: Digest of the uploaded file.
+            data: The processed data to cache.
+
+        Raises:
+            ValueError: If the digest is not a hexadecimal SHA-256 digest.
+        """
+        self._make_cache_dir()
+        path = self.path_for(digest)
+        entry = {"schema_version": CACHE_SCHEMA_VERSION, "digest": digest, "data": data}
+        # Write to a temporary file first so concurrent readers never see a partial entry
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except BaseException:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+        self._evict(keep=path)
+
+    def _make_cache_dir(self) -> None:
+        self.cache_dir.mkdir(mode=0o700, parents=True, exist_ok=True)
+        if not _owned_by_current_user(self.cache_dir.stat()):
+            raise PermissionError(f"Cache directory {self.cache_dir} is owned by another user")
+        # An existing directory may have been created with the default permissions
+        os.chmod(self.cache_dir, 0o700)
+
+    def _evict(self, keep: Path) -> None:
+        entries = []
+        for path in self.cache_dir.glob("*.pkl"):
+            if not path.name.endswith(f".v{CACHE_SCHEMA_VERSION}.pkl"):
+                # Entries written with another schema version can never be read again
+                path.unlink(missing_ok=True)
+                continue
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries, key=lambda entry: entry[0]):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            path.unlink(missing_ok=True)
+            total -= size
@@ -1,20 +1,24 @@
+import functools
 import io
-import json
 import os
 import pickle
+import re
 import tempfile
 import uuid
+from collections.abc import Iterable
 from pathlib import Path
 from typing import Any
 import dash
 import dash_bootstrap_components as dbc
 import dash_mantine_components as dmc
 import dash_uploader as du
+import numpy as np
 import pandas as pd
-import plotly.graph_objects as go
+import plotly.io as pio
 import requests
 from dash import ALL
 from dash import MATCH
+from dash import ClientsideFunction
 from dash import Dash
 from dash import Input
 from dash import Output
@@ -22,20 +26,49 @@ from dash import State
 from dash import callback_context as ctx
 from dash import dcc
 from dash import html
+from app.bitmaps import bitmap_to_rows
+from app.bitmaps import count
+from app.bitmaps import difference
+from app.bitmaps import full_bitmap
+from app.bitmaps import intersection
+from app.bitmaps import rows_to_bitmap
+from app.bitmaps import union
+from app.cache import ProcessedDataCache
+from app.cache import file_digest
+from app.cache import is_digest
+from app.cache import load_pickle_with_digest
+from app.config import DATASET_REGISTRY_MAX_MB
+from app.config import FILTER_OPERATOR_OPTIONS
+from app.config import FILTER_STRAIN_PLACEHOLDERS
 from app.config import GM_FILTER_DROPDOWN_BGC_CLASS_OPTIONS_PRE_V4
 from app.config import GM_FILTER_DROPDOWN_BGC_CLASS_OPTIONS_V4
 from app.config import GM_FILTER_DROPDOWN_MENU_OPTIONS
+from app.config import GM_PLOT_CACHE_MAX_FIGURES
+from app.config import GM_PLOT_HOVER_MAX_IDS
 from app.config import GM_RESULTS_TABLE_CHECKL_OPTIONAL_COLUMNS
 from app.config import GM_RESULTS_TABLE_MANDATORY_COLUMNS
 from app.config import GM_RESULTS_TABLE_OPTIONAL_COLUMNS
 from app.config import MAX_TOOLTIP_ROWS
 from app.config import MG_FILTER_DROPDOWN_MENU_OPTIONS
+from app.config import MG_FILTER_MZ_DEFAULT_TOLERANCES
+from app.config import MG_FILTER_MZ_TOLERANCE_UNIT_OPTIONS
 from app.config import MG_RESULTS_TABLE_CHECKL_OPTIONAL_COLUMNS
 from app.config import MG_RESULTS_TABLE_MANDATORY_COLUMNS
 from app.config import MG_RESULTS_TABLE_OPTIONAL_COLUMNS
+from app.config import PENDING_UPLOADS_MAX_ENTRIES
+from app.config import PROCESSED_DATA_CACHE_DIR
+from app.config import PROCESSED_DATA_CACHE_MAX_MB
+from app.config import RESULTS_REGISTRY_MAX_MB
 from app.config import SCORING_DROPDOWN_MENU_OPTIONS
-from nplinker.metabolomics.molecular_family import MolecularFamily
-from nplinker.metabolomics.spectrum import Spectrum
+from app.config import TABLE_TOOLTIP_CACHE_MAX_ROWS
+from app.config import TABLE_VIEWS_MAX_MB
+from app.dataset import CandidateLinks
+from app.dataset import Dataset
+from app.dataset import LinkTable
+from app.dataset import TableView
+from app.dataset import build_dataset
+from app.registry import DatasetRegistry
+from app.registry import estimate_nbytes
 
 
 dash._dash_renderer._set_react_version("18.2.0")  # type: ignore
@@ -46,6 +79,21 @@ app = Dash(__name__, external_stylesheets=[dbc.themes.UNITED, dbc_css, dbc.icons
 # Configure the upload folder
 TEMP_DIR = tempfile.mkdtemp()
 du.configure_upload(app, TEMP_DIR)
+# Processed datasets live server-side; the stores in the browser only hold their tokens
+DATASET_REGISTRY = DatasetRegistry(DATASET_REGISTRY_MAX_MB * 1024 * 1024)
+# Processed uploads are also cached on disk, keyed by the digest of the uploaded file
+PROCESSED_DATA_CACHE = ProcessedDataCache(
+    PROCESSED_DATA_CACHE_DIR, PROCESSED_DATA_CACHE_MAX_MB * 1024 * 1024
+)
+# Candidate links listed in the results tables, referenced from the detailed data stores
+RESULTS_REGISTRY = DatasetRegistry(RESULTS_REGISTRY_MAX_MB * 1024 * 1024)
+# Filtered rows of the GM and MG data tables, referenced from the table view stores
+TABLE_VIEWS = DatasetRegistry(TABLE_VIEWS_MAX_MB * 1024 * 1024)
+# Short-lived handles to validated uploads, keyed by file path and consumed by
+# `process_uploaded_data`, so that each upload is unpickled only once
+PENDING_UPLOADS = DatasetRegistry(
+    DATASET_REGISTRY_MAX_MB * 1024 * 1024, max_entries=PENDING_UPLOADS_MAX_ENTRIES
+)
 
 DEMO_DATA_URL = (
     "https://github.com/NPLinker/nplinker-webapp/blob/main/tests/data/mock_obj_data.pkl?raw=true"
@@ -53,6 +101,34 @@ DEMO_DATA_URL = (
 
 
 # ------------------ Upload and Process Data ------------------ #
+def stage_upload(file_path: Path | str) -> str:
+    """Validate an uploaded pickle file and keep it ready for processing.
+
+    The file is unpickled for validation while its digest is computed from the same stream, so
+    it is read once and its raw content is never held in memory next to the object graph. The
+    object graph is kept in a short-lived server-side handle, so that `process_uploaded_data`
+    does not need to unpickle the file a second time, unless the file has already been
+    processed.
+
+    Args:
+        file_path: Path to the uploaded pickle file.
+
+    Returns:
+        The digest of the uploaded file.
+
+    Raises:
+        pickle.UnpicklingError, EOFError, AttributeError: If the file is not a valid pickle file.
+    """
+    data, digest = load_pickle_with_digest(file_path)
+    if digest in DATASET_REGISTRY or digest in PROCESSED_DATA_CACHE:
+        # The processed data is reused, the object graph is not needed
+        data = None
+    PENDING_UPLOADS.register(
+        {"digest": digest, "data": data}, token=str(file_path), nbytes=estimate_nbytes(data)
+    )
+    return digest
+
+
 @du.callback(
     id="dash-uploader",
     output=[
@@ -64,6 +140,9 @@ DEMO_DATA_URL = (
 def upload_data(status: du.UploadStatus) -> tuple[str, str | None, None]:
     """Handle file upload and validate pickle files.
 
+    The object graph loaded for validation is handed over to `process_uploaded_data`, unless
+    the digest of the file is already in the processed data cache.
+
     Args:
         status: The upload status object.
 
@@ -73,8 +152,7 @@ def upload_data(status: du.UploadStatus) -> tuple[str, str | None, None]:
     if status.is_completed:
         latest_file = status.latest_file
         try:
-            with open(status.latest_file, "rb") as f:
-                pickle.load(f)
+            stage_upload(latest_file)
             return (
                 f"Successfully uploaded: {os.path.basename(latest_file)} [{round(status.uploaded_size_mb, 2)} MB]",
                 str(latest_file),
@@ -109,19 +187,19 @@ def load_demo_data(n_clicks):
 
     try:
         # Download the demo data
-        response = requests.get(DEMO_DATA_URL, timeout=30)
+        response = requests.get(DEMO_DATA_URL, timeout=30, stream=True)
         response.raise_for_status()
 
-        # Save to temporary file
+        # Save to temporary file, streaming the download so it is not held in memory
         demo_file_path = os.path.join(TEMP_DIR, f"demo_data_{uuid.uuid4()}.pkl")
         with open(demo_file_path, "wb") as f:
-            f.write(response.content)
+            for chunk in response.iter_content(chunk_size=1024 * 1024):
+                f.write(chunk)
 
-        # Validate the pickle file
-        with open(demo_file_path, "rb") as f:
-            pickle.load(f)
+        # Validate the pickle file and keep it ready for processing
+        stage_upload(demo_file_path)
 
-        file_size_mb = len(response.content) / (1024 * 1024)
+        file_size_mb = os.path.getsize(demo_file_path) / (1024 * 1024)
 
         return (
             f"Successfully loaded demo data: demo_data.pkl [{round(file_size_mb, 2)} MB]",
@@ -147,156 +225,47 @@ def load_demo_data(n_clicks):
 def process_uploaded_data(
     file_path: Path | str | None, cleanup: bool = True
 ) -> tuple[str | None, str | None, str | None]:
-    """Process the uploaded pickle file and store the processed data.
+    """Process the uploaded pickle file and register the processed data server-side.
+
+    The digest of the file is used as the dataset token. If the same file has been processed
+    before, the processed data is taken from memory or from the on-disk cache without
+    unpickling the file. Otherwise the object graph loaded by `upload_data` is used, and the
+    file is only unpickled here if that handle is not available (e.g. for direct calls).
 
     Args:
         file_path: Path to the uploaded pickle file.
         cleanup: Flag to indicate whether to clean up the file after processing.
 
     Returns:
-        JSON string of processed data or None if processing fails.
+        The dataset token for the data store and the links store, or None if processing fails.
     """
     if file_path is None:
         return None, None, None
 
     try:
-        with open(file_path, "rb") as f:
-            data = pickle.load(f)
-
-        # Extract and process the necessary data
-        _, gcfs, _, mfs, _, links = data
-
-        def process_bgc_class(bgc_class: tuple[str, ...] | None) -> list[str]:
-            if bgc_class is None:
-                return ["Unknown"]
-            return list(bgc_class)  # Convert tuple to list
-
-        processed_data: dict[str, Any] = {
-            "gcf_data": [],
-            "n_bgcs": {},
-            "class_bgcs": {},
-            "mf_data": [],
-        }
+        pending = PENDING_UPLOADS.pop(str(file_path)) or {}
+        digest = pending.get("digest") or file_digest(file_path)
+        if get_dataset(digest) is not None:
+            return digest, digest, None
 
-        for gcf in gcfs:
-            sorted_bgcs = sorted(gcf.bgcs, key=lambda bgc: bgc.id)
-            bgc_ids = [bgc.id for bgc in sorted_bgcs]
-            bgc_classes = [process_bgc_class(bgc.mibig_bgc_class) for bgc in sorted_bgcs]
-
-            processed_data["gcf_data"].append(
-                {
-                    "GCF ID": gcf.id,
-                    "# BGCs": len(gcf.bgcs),
-                    "BGC IDs": bgc_ids,
-                    "BGC Classes": bgc_classes,
-                    "strains": sorted([s.id for s in gcf.strains._strains]),
-                }
-            )
+        data = pending.pop("data", None)
+        if data is None:
+            with open(file_path, "rb") as f:
+                data = pickle.load(f)
 
-            if len(gcf.bgcs) not in processed_data["n_bgcs"]:
-                processed_data["n_bgcs"][len(gcf.bgcs)] = []
-            processed_data["n_bgcs"][len(gcf.bgcs)].append(gcf.id)
-
-            for bgc_class_list in bgc_classes:
-                for bgc_class in bgc_class_list:
-                    if bgc_class not in processed_data["class_bgcs"]:
-                        processed_data["class_bgcs"][bgc_class] = []
-                    processed_data["class_bgcs"][bgc_class].append(gcf.id)
-
-        for mf in mfs:
-            sorted_spectra = sorted(mf.spectra, key=lambda spectrum: spectrum.id)
-            processed_data["mf_data"].append(
-                {
-                    "MF ID": mf.id,
-                    "# Spectra": len(mf.spectra_ids),
-                    "Spectra IDs": list(spectrum.id for spectrum in sorted_spectra),
-                    "Spectra precursor m/z": [spectrum.precursor_mz for spectrum in sorted_spectra],
-                    "Spectra GNPS IDs": [spectrum.gnps_id for spectrum in sorted_spectra],
-                    "strains": sorted([s.id for s in mf.strains._strains]),
-                }
-            )
+        # Build the entity and link tables from the NPLinker objects
+        _, gcfs, spectra, mfs, _, links = data
+        dataset = build_dataset(gcfs, spectra, mfs, links)
 
-        if links is not None:
-            processed_links: dict[str, Any] = {
-                "gm_data": {
-                    "gcf_id": [],
-                    "spectrum": [],
-                    "method": [],
-                    "score": [],
-                    "cutoff": [],
-                    "standardised": [],
-                },
-                "mg_data": {
-                    "mf_id": [],
-                    "gcf": [],
-                    "method": [],
-                    "score": [],
-                    "cutoff": [],
-                    "standardised": [],
-                },
-            }
+        # Release the NPLinker object graph before caching the processed data
+        del data, gcfs, spectra, mfs, links
 
-            for link in links.links:
-                # Helper function to process Genome-Metabolome (GM) links
-                def process_gm_link(gcf, spectrum, methods_data):
-                    processed_links["gm_data"]["gcf_id"].append(gcf.id)
-                    processed_links["gm_data"]["spectrum"].append(
-                        {
-                            "id": spectrum.id,
-                            "strains": sorted([s.id for s in spectrum.strains._strains]),
-                            "precursor_mz": spectrum.precursor_mz,
-                            "gnps_id": spectrum.gnps_id,
-                            "mf_id": spectrum.family.id if spectrum.family else None,
-                        }
-                    )
-                    for method, data in methods_data.items():
-                        processed_links["gm_data"]["method"].append(method)
-                        processed_links["gm_data"]["score"].append(data.value)
-                        processed_links["gm_data"]["cutoff"].append(data.parameter["cutoff"])
-                        processed_links["gm_data"]["standardised"].append(
-                            data.parameter["standardised"]
-                        )
-
-                # Helper function to process Metabolome-Genome (MG) links
-                def process_mg_link(mf, gcf, methods_data):
-                    sorted_bgcs = sorted(gcf.bgcs, key=lambda bgc: bgc.id)
-                    bgc_ids = [bgc.id for bgc in sorted_bgcs]
-                    bgc_classes = [process_bgc_class(bgc.mibig_bgc_class) for bgc in sorted_bgcs]
-
-                    processed_links["mg_data"]["mf_id"].append(mf.id)
-                    processed_links["mg_data"]["gcf"].append(
-                        {
-                            "id": gcf.id,
-                            "strains": sorted([s.id for s in mf.strains._strains]),
-                            "# BGCs": len(gcf.bgcs),
-                            "BGC IDs": bgc_ids,
-                            "BGC Classes": bgc_classes,
-                        }
-                    )
-                    for method, data in methods_data.items():
-                        processed_links["mg_data"]["method"].append(method)
-                        processed_links["mg_data"]["score"].append(data.value)
-                        processed_links["mg_data"]["cutoff"].append(data.parameter["cutoff"])
-                        processed_links["mg_data"]["standardised"].append(
-                            data.parameter["standardised"]
-                        )
-
-                # GCF -> Spectrum links
-                if isinstance(link[1], Spectrum):
-                    process_gm_link(link[0], link[1], link[2])
-                # Spectrum -> GCF links
-                elif isinstance(link[0], Spectrum):
-                    process_gm_link(link[1], link[0], link[2])
-                # GCF -> MF links
-                elif isinstance(link[1], MolecularFamily):
-                    process_mg_link(link[1], link[0], link[2])
-                # MF -> GCF links
-                elif isinstance(link[0], MolecularFamily):
-                    process_mg_link(link[0], link[1], link[2])
-        else:
-            processed_links = {}
-
-        return json.dumps(processed_data), json.dumps(processed_links), None
+        try:
+            PROCESSED_DATA_CACHE.store(digest, dataset)
+        except OSError as e:
+            print(f"Caching processed data failed for {file_path}: {e}")
+        DATASET_REGISTRY.register(dataset, token=digest)
+        return digest, digest, None
     except Exception as e:
         print(f"Error processing file: {str(e)}")
         return None, None, None
@@ -308,6 +277,28 @@ def process_uploaded_data(
             print(f"Cleanup failed for {file_path}: {e}")
 
 
+def get_dataset(token: str | None) -> Dataset | None:
+    """Resolve a dataset token held in a store to the processed data kept server-side.
+
+    Datasets evicted from memory, or processed by another worker, are reloaded from the
+    on-disk cache. Only digests are looked up on disk, as the token comes from the browser.
+
+    Args:
+        token: The dataset token, or None if no data has been processed.
+
+    Returns:
+        The processed dataset, or None if the token is unknown.
+    """
+    if token is None:
+        return None
+    dataset = DATASET_REGISTRY.get(token)
+    if dataset is None and is_digest(token):
+        dataset = PROCESSED_DATA_CACHE.load(token)
+        if dataset is not None:
+            DATASET_REGISTRY.register(dataset, token=token)
+    return dataset
+
+
 @app.callback(
     [
         # GM tab outputs
@@ -456,169 +447,636 @@ def disable_tabs_and_reset_blocks(
 
 
 # ------------------ GM Plot ------------------ #
+# Layout template of the figures, converted once instead of validated with every figure
+GM_PLOT_TEMPLATE = pio.templates["plotly"].to_plotly_json()
+
+
+def gm_plot_buckets(dataset: Dataset, x_axis_selection: str) -> list[tuple[Any, int]]:
+    """Return the bars of the GM plot, read from the GCF counts of the dataset buckets.
+
+    Args:
+        dataset: The processed dataset.
+        x_axis_selection: Selected x-axis type ('n_bgcs' or 'class_bgcs').
+
+    Returns:
+        The x-axis value and number of GCFs of each bar, in plot order.
+    """
+    counts = dataset.bucket_counts[x_axis_selection]
+    if x_axis_selection == "n_bgcs":
+        return sorted(counts.items())
+    # Sort classes by count for better visualization
+    return sorted(counts.items(), key=lambda item: item[1], reverse=True)
+
+
+def gm_plot_clicked_bucket(
+    dataset: Dataset, x_axis_selection: str, click_data: dict | None
+) -> tuple[Any, np.ndarray] | None:
+    """Return the x-axis value and GCF rows of the clicked GM plot bar, None if there is none.
+
+    Args:
+        dataset: The processed dataset.
+        x_axis_selection: Selected x-axis type ('n_bgcs' or 'class_bgcs').
+        click_data: Data of the clicked point of the plot.
+
+    Returns:
+        The x-axis value and sorted, unique GCF rows of the bar, or None.
+    """
+    if not click_data or not click_data.get("points"):
+        return None
+    # Compare as text, the bars of the '# BGCs' axis have integer values
+    x_value = str(click_data["points"][0]["x"])
+    for key in getattr(dataset, x_axis_selection):
+        if str(key) == x_value:
+            return key, dataset.bucket_rows(x_axis_selection, key)
+    return None
+
+
+def gm_plot_gcf_ids(dataset: Dataset, rows: np.ndarray) -> list[str]:
+    """Return the sorted IDs of the GCFs in the given rows."""
+    return sorted(dataset.gcfs["GCF ID"].to_numpy()[rows].tolist())
+
+
+def gm_plot_bucket_title(x_axis_selection: str, x_value: Any) -> str:
+    """Return the description of the GCFs of a GM plot bar."""
+    if x_axis_selection == "n_bgcs":
+        return f"GCFs with {x_value} BGCs"
+    return f"GCFs with BGC class {x_value}"
+
+
+@functools.lru_cache(maxsize=GM_PLOT_CACHE_MAX_FIGURES)
+def gm_plot_figure(dataset_token: str, x_axis_selection: str) -> dict:
+    """Return the GM plot figure, cached per dataset and x-axis.
+
+    The figure is a plain dict, skipping the validation of plotly graph objects. Its hover
+    texts only list the first GCF IDs of each bar, so the figure stays small whatever the
+    number of GCFs; the full list is shown on click by `gm_plot_show_members`.
+
+    Args:
+        dataset_token: Dataset token of the processed data.
+        x_axis_selection: Selected x-axis type ('n_bgcs' or 'class_bgcs').
+
+    Returns:
+        The plot figure.
+
+    Raises:
+        KeyError: If the dataset is not available. Callers resolve the dataset first; raising
+            instead of returning an empty figure keeps the miss out of the cache.
+    """
+    dataset = get_dataset(dataset_token)
+    if dataset is None:
+        raise KeyError(f"Unknown dataset token: {dataset_token}")
+    buckets = gm_plot_buckets(dataset, x_axis_selection)
+    x_values = [x_value for x_value, _ in buckets]
+
+    gcf_ids = dataset.gcfs["GCF ID"].to_numpy()
+    hover_texts = []
+    for x_value, n_gcfs in buckets:
+        rows = dataset.bucket_rows(x_axis_selection, x_value)[:GM_PLOT_HOVER_MAX_IDS]
+        listed = ", ".join(gcf_ids[rows].tolist())
+        if n_gcfs > GM_PLOT_HOVER_MAX_IDS:
+            listed += f", ... ({n_gcfs - GM_PLOT_HOVER_MAX_IDS} more, click to list all)"
+        summary = f"Class: {x_value}<br>" if x_axis_selection == "class_bgcs" else ""
+        hover_texts.append(f"{summary}# GCFs: {n_gcfs}<br>GCF IDs: {listed}")
+
+    bar: dict[str, Any] = {
+        "type": "bar",
+        "x": x_values,
+        "y": [n_gcfs for _, n_gcfs in buckets],
+        "text": hover_texts,
+        "hoverinfo": "text",
+        "textposition": "none",
+    }
+    # Adjust bar width based on number of data points
+    if len(x_values) <= 5:
+        bar["width"] = 0.4
+
+    xaxis: dict[str, Any] = {"type": "category"}
+    if x_axis_selection == "n_bgcs":
+        xaxis["title"] = {"text": "# BGCs"}
+    else:
+        xaxis["title"] = {"text": "BGC Classes"}
+        # Add more space for longer class names
+        xaxis["tickangle"] = -45 if len(x_values) > 5 else 0
+
+    return {
+        "data": [bar],
+        "layout": {
+            "template": GM_PLOT_TEMPLATE,
+            "xaxis": xaxis,
+            "yaxis": {"title": {"text": "# GCFs"}},
+        },
+    }
+
+
 @app.callback(
     Output("gm-graph", "figure"),
     Output("gm-graph", "style"),
     Output("gm-graph-selector-container", "style"),
     [Input("processed-data-store", "data"), Input("gm-graph-x-axis-selector", "value")],
 )
-def gm_plot(stored_data: str | None, x_axis_selection: str) -> tuple[dict | go.Figure, dict, dict]:
+def gm_plot(stored_data: str | None, x_axis_selection: str) -> tuple[dict, dict, dict]:
     """Create a bar plot based on the processed data.
 
     Args:
-        stored_data: JSON string of processed data or None.
+        stored_data: Dataset token of the processed data or None.
         x_axis_selection: Selected x-axis type ('n_bgcs' or 'class_bgcs').
 
     Returns:
         Tuple containing the plot figure, style for graph, and style for selector.
     """
-    if stored_data is None:
+    if get_dataset(stored_data) is None:
         return {}, {"display": "none"}, {"display": "none"}
+    return gm_plot_figure(stored_data, x_axis_selection), {"display": "block"}, {"display": "block"}
 
-    data = json.loads(stored_data)
-
-    if x_axis_selection == "n_bgcs":
-        n_bgcs = data["n_bgcs"]
-        x_values = sorted(map(int, n_bgcs.keys()))
-        y_values = [len(n_bgcs[str(x)]) for x in x_values]
-        hover_texts = [
-            f"GCF IDs: {', '.join(str(gcf_id) for gcf_id in n_bgcs[str(x)])}" for x in x_values
-        ]
 
-        # Adjust bar width based on number of data points
-        bar_width = 0.4 if len(x_values) <= 5 else None
-        # Create the bar plot
-        fig = go.Figure(
-            data=[
-                go.Bar(
-                    x=x_values,
-                    y=y_values,
-                    text=hover_texts,
-                    hoverinfo="text",
-                    textposition="none",
-                    width=bar_width,
-                )
-            ]
-        )
-        # Update layout
-        fig.update_layout(
-            xaxis_title="# BGCs",
-            yaxis_title="# GCFs",
-            xaxis=dict(type="category"),
-        )
+@app.callback(
+    Output("gm-graph-members", "children"),
+    Output("gm-graph-members", "style"),
+    Input("gm-graph", "clickData"),
+    Input("processed-data-store", "data"),
+    Input("gm-graph-x-axis-selector", "value"),
+)
+def gm_plot_show_members(
+    click_data: dict | None, stored_data: str | None, x_axis_selection: str
+) -> tuple[list, dict]:
+    """List all GCFs of the clicked GM plot bar.
 
-    else:  # x_axis_selection == "class_bgcs"
-        class_bgcs = data["class_bgcs"]
-
-        # Count unique GCF IDs for each class
-        class_gcf_counts = {}
-        for bgc_class, gcf_ids in class_bgcs.items():
-            # Count unique GCF IDs
-            class_gcf_counts[bgc_class] = len(set(gcf_ids))
-
-        # Sort classes by count for better visualization
-        sorted_classes = sorted(class_gcf_counts.items(), key=lambda x: x[1], reverse=True)
-        x_values = [item[0] for item in sorted_classes]
-        y_values = [item[1] for item in sorted_classes]
-
-        # Generate hover texts with line breaks for better readability
-        hover_texts = []
-        for bgc_class in x_values:
-            # Get unique GCF IDs for this class
-            unique_gcf_ids = sorted(list(set(class_bgcs[bgc_class])))
-
-            # Format GCF IDs with line breaks every 10 items
-            formatted_gcf_ids = ""
-            for i, gcf_id in enumerate(unique_gcf_ids):
-                formatted_gcf_ids += gcf_id
-                # Add comma if not the last item
-                if i < len(unique_gcf_ids) - 1:
-                    formatted_gcf_ids += ", "
-                # Add line break after every 10 items (but not for the last group)
-                if (i + 1) % 10 == 0 and i < len(unique_gcf_ids) - 1:
-                    formatted_gcf_ids += "<br>"
-
-            hover_text = f"Class: {bgc_class}<br>GCF IDs: {formatted_gcf_ids}"
-            hover_texts.append(hover_text)
-
-        # Adjust bar width based on number of data points
-        bar_width = 0.4 if len(x_values) <= 5 else None
-        # Create the bar plot
-        fig = go.Figure(
-            data=[
-                go.Bar(
-                    x=x_values,
-                    y=y_values,
-                    text=hover_texts,
-                    hoverinfo="text",
-                    textposition="none",
-                    width=bar_width,
-                )
-            ]
-        )
+    The list is hidden again when the data or the x-axis of the plot change.
 
-        # Update layout
-        fig.update_layout(
-            xaxis_title="BGC Classes",
-            yaxis_title="# GCFs",
-            xaxis=dict(
-                type="category",
-                # Add more space for longer class names
-                tickangle=-45 if len(x_values) > 5 else 0,
-            ),
-        )
+    Args:
+        click_data: Data of the clicked point of the plot.
+        stored_data: Dataset token of the processed data or None.
+        x_axis_selection: Selected x-axis type ('n_bgcs' or 'class_bgcs').
 
-    return fig, {"display": "block"}, {"display": "block"}
+    Returns:
+        Tuple containing the member list and its style.
+    """
+    hidden: tuple[list, dict] = ([], {"display": "none"})
+    dataset = get_dataset(stored_data)
+    if ctx.triggered_id != "gm-graph" or dataset is None:
+        return hidden
+    bucket = gm_plot_clicked_bucket(dataset, x_axis_selection, click_data)
+    if bucket is None:
+        return hidden
+
+    x_value, rows = bucket
+    return [
+        html.Strong(f"{gm_plot_bucket_title(x_axis_selection, x_value)} ({len(rows)})"),
+        html.Div(
+            ", ".join(gm_plot_gcf_ids(dataset, rows)),
+            style={"maxHeight": "200px", "overflowY": "auto"},
+        ),
+    ], {"display": "block"}
 
 
 # ------------------ Common Filter and Table Functions ------------------ #
-def filter_add_block(n_clicks: list[int], blocks_id: list[str]) -> list[str]:
-    """Add a new block to the layout when the add button is clicked.
+def filter_split_ids(text: str | None) -> list[str]:
+    """Split the text of an ID filter input into ID terms.
 
-    Generic function to handle both GM and MG filter block additions.
+    Generic function to handle both GM and MG ID inputs. IDs can be separated by commas,
+    semicolons or whitespace, so lists pasted from a spreadsheet column work as well. Spaces
+    around the dash of a range ("100 - 200") are dropped.
 
     Args:
-        n_clicks: List of number of clicks for each add button.
-        blocks_id: Current list of block IDs.
+        text: The text of the input.
 
     Returns:
-        Updated list of block IDs.
+        IDs, integer ranges like "100-2500" and prefixes like "BGC0001*", in input order.
     """
-    if not any(n_clicks):
-        raise dash.exceptions.PreventUpdate
-    # Create a unique ID for the new block
-    new_block_id = str(uuid.uuid4())
-    blocks_id.append(new_block_id)
-    return blocks_id
+    if not text:
+        return []
+    return [term for term in re.split(r"[,;\s]+", re.sub(r"\s*-\s*", "-", text)) if term]
 
 
-def table_toggle_selection(
-    value: list | None,
-    original_rows: list,
-    filtered_rows: list | None,
-) -> list:
-    """Toggle between selecting all rows and deselecting all rows in the current view of a Dash DataTable.
+def filter_split_mz(text: str | None) -> list[float]:
+    """Split the text of an m/z filter input into m/z values, ignoring invalid values.
+
+    Args:
+        text: The text of the input, values separated like the IDs of `filter_split_ids`.
+
+    Returns:
+        The m/z values, in input order.
+    """
+    values = []
+    for term in filter_split_ids(text):
+        try:
+            values.append(float(term))
+        except ValueError:
+            continue
+    return values
+
+
+def filter_parse_mz_tolerance(value: float | str | None, unit: str) -> float | None:
+    """Parse the m/z tolerance of a filter block.
+
+    A cleared input sends an empty string or None, both use the default tolerance of the unit.
+
+    Args:
+        value: The value of the tolerance input.
+        unit: The unit of the tolerance, "PPM" or "DA".
+
+    Returns:
+        The tolerance, None if the value is not a non-negative number.
+    """
+    if value is None or value == "":
+        return float(MG_FILTER_MZ_DEFAULT_TOLERANCES[unit])
+    try:
+        tolerance = float(value)
+    except (TypeError, ValueError):
+        return None
+    if not np.isfinite(tolerance) or tolerance < 0:
+        return None
+    return tolerance
+
+
+# A relational expression of a data table filter query, e.g. `{# BGCs} >= 2` or
+# `{BGC Classes} icontains "nrps"`. Operators prefixed with "i" are case-insensitive.
+_FILTER_QUERY_EXPRESSION = re.compile(
+    r"\{(?P<column>[^}]+)\}\s*(?P<case>[is]?)"
+    r"(?P<operator>contains|datestartswith|eq|ne|le|lt|ge|gt|!=|<=|>=|=|<|>)\s*(?P<value>.+)"
+)
+# Comparison operators by their names, which are also the names of the pandas comparisons
+_FILTER_QUERY_COMPARISONS = {"=": "eq", "!=": "ne", "<=": "le", "<": "lt", ">=": "ge", ">": "gt"}
+
+
+def filter_query_rows(dataset: Dataset, table: str, filter_query: str | None) -> np.ndarray | None:
+    """Return the rows of a data table matching the filter query of its filter row.
+
+    Generic function to handle both GM and MG data tables. The query is the `filter_query` of a
+    data table with `filter_action="custom"`: relational expressions on the displayed values,
+    joined by "&&". Expressions that cannot be parsed, or refer to unknown columns, are ignored.
+
+    Args:
+        dataset: The processed dataset.
+        table: The entity table shown in the data table ("gcfs" or "mfs").
+        filter_query: The filter query of the data table.
+
+    Returns:
+        Sorted rows of the table matching all expressions, None if the query has no valid
+        expression.
+    """
+    frame = dataset.table_frame(table)
+    mask = None
+    for expression in (filter_query or "").split("&&"):
+        match = _FILTER_QUERY_EXPRESSION.fullmatch(expression.strip())
+        if match is None or match["column"] not in frame:
+            continue
+        values = frame[match["column"]]
+        op = _FILTER_QUERY_COMPARISONS.get(match["operator"], match["operator"])
+        value = match["value"].strip()
+        if len(value) > 1 and value[0] == value[-1] and value[0] in "\"'`":
+            value = value[1:-1].replace("\\" + value[0], value[0])
+        try:
+            number = float(value)
+        except ValueError:
+            number = None
+
+        if op in ("contains", "datestartswith") or number is None:
+            texts = values.astype(str)
+            if match["case"] == "i":
+                texts, value = texts.str.lower(), value.lower()
+            if op == "contains":
+                matched = texts.str.contains(value, regex=False)
+            elif op == "datestartswith":
+                matched = texts.str.startswith(value)
+            else:
+                matched = getattr(texts, op)(value)
+        else:
+            # Values that are not numbers never match a numeric comparison
+            numbers = pd.to_numeric(values, errors="coerce")
+            matched = getattr(numbers, op)(number) & numbers.notna()
+        matched_mask = matched.to_numpy(dtype=bool)
+        mask = matched_mask if mask is None else mask & matched_mask
+    return None if mask is None else np.flatnonzero(mask)
 
-    Generic function to handle both GM and MG table row selections.
+
+def filter_strain_rows(
+    dataset: Dataset, table: str, menu: str, text: str | None
+) -> np.ndarray | None:
+    """Return the rows selected by a strain filter block, None if the block has no valid input.
+
+    Generic function to handle both GM and MG strain filters. The rows are looked up in the
+    strain bitsets of the dataset.
 
     Args:
-        value: Value of the select-all checkbox.
-        original_rows: All rows in the table.
-        filtered_rows: Rows visible after filtering, or None if no filter is applied.
+        dataset: The processed dataset.
+        table: The filtered entity table, "gcfs" or "mfs".
+        menu: The filter, "STRAIN" for rows in any of the strains in the text, "MIN_STRAINS" for
+            rows in at least the number of strains in the text.
+        text: The text of the input of the block.
 
     Returns:
-        List of indices of selected rows after toggling.
+        Sorted rows of the table matching the block, or None.
     """
-    is_checked = value and "disabled" in value
+    if menu == "STRAIN":
+        strain_ids = filter_split_ids(text)
+        return dataset.strain_rows(table, strain_ids) if strain_ids else None
+    try:
+        min_strains = int((text or "").strip())
+    except ValueError:
+        return None
+    return dataset.min_strains_rows(table, min_strains)
+
+
+def filter_combine_blocks(
+    bitmaps: list[np.ndarray | None], operators: list[str] | None, n_rows: int
+) -> np.ndarray:
+    """Combine the row bitmaps of filter blocks with the operators between the blocks.
+
+    Generic function to handle both GM and MG filter blocks. Blocks are combined in order, so
+    "A AND B OR C" is "(A AND B) OR C". Blocks without input (None) are left out.
 
-    if filtered_rows is None:
-        # No filtering applied, toggle all rows
-        return list(range(len(original_rows))) if is_checked else []
+    Args:
+        bitmaps: Bitmap of the rows selected by each block, or None for blocks without input.
+        operators: Operator in front of each block after the first ("OR", "AND" or "AND_NOT"),
+            "OR" for blocks without an operator.
+        n_rows: Number of rows of the filtered table.
+
+    Returns:
+        Sorted rows matching the combined filters, all rows if no block has input.
+    """
+    block_operators: list[str | None] = [None, *(operators or [])]
+    result = None
+    for i, bitmap in enumerate(bitmaps):
+        if bitmap is None:
+            continue
+        operator = block_operators[i] if i < len(block_operators) else None
+        if result is None:
+            # A first block behind AND NOT excludes its rows from all rows
+            result = difference(full_bitmap(n_rows), bitmap) if operator == "AND_NOT" else bitmap
+        elif operator == "AND":
+            result = intersection(result, bitmap)
+        elif operator == "AND_NOT":
+            result = difference(result, bitmap)
+        else:
+            result = union([result, bitmap], n_rows)
+
+    if result is None:
+        return np.arange(n_rows)
+    return bitmap_to_rows(result, n_rows)
+
+
+def table_filter_rows(
+    dataset: Dataset, table: str, filter_spec: dict | None, filter_query: str | None = None
+) -> np.ndarray:
+    """Return the rows of a data table matching a filter spec, as kept in its view store.
+
+    Generic function to handle both GM and MG data tables.
+
+    Args:
+        dataset: The processed dataset.
+        table: The entity table shown in the data table ("gcfs" or "mfs").
+        filter_spec: Keyword arguments of `gm_filter_apply` or `mg_filter_apply`, the x-axis and
+            x-axis value of a clicked GM plot bar, or None for all rows.
+        filter_query: The filter query of the filter row of the data table, further restricting
+            the rows (see `filter_query_rows`).
+
+    Returns:
+        Sorted rows of the table matching the filter spec and the filter query.
+    """
+    if filter_spec is None:
+        rows = np.arange(len(getattr(dataset, table)))
+    elif table == "mfs":
+        rows = mg_filter_apply(dataset, **filter_spec)
+    elif "x_axis_selection" in filter_spec:
+        click_data = {"points": [{"x": filter_spec["x_value"]}]}
+        bucket = gm_plot_clicked_bucket(dataset, filter_spec["x_axis_selection"], click_data)
+        rows = bucket[1] if bucket is not None else np.array([], dtype=np.int64)
     else:
-        # Filtering applied, toggle only visible rows
-        return (
-            [i for i, row in enumerate(original_rows) if row in filtered_rows] if is_checked else []
-        )
+        rows = gm_filter_apply(dataset, **filter_spec)
+
+    query_rows = filter_query_rows(dataset, table, filter_query)
+    if query_rows is not None:
+        rows = np.intersect1d(rows, query_rows, assume_unique=True)
+    return rows
+
+
+def table_restore_view(view_data: dict[str, Any] | None) -> TableView | None:
+    """Return the view referenced by a view store, rebuilding it if it is not held in memory.
+
+    Views are registered per process, so a view evicted from memory, or built by another worker,
+    is rebuilt from the filter spec and filter query kept in the view store, under the same token.
+
+    Args:
+        view_data: Data of the view store of a data table.
+
+    Returns:
+        The view, or None if there is no view or its dataset is no longer available.
+    """
+    if not view_data:
+        return None
+    view: TableView | None = TABLE_VIEWS.get(view_data["token"])
+    if view is not None:
+        return view
+    dataset = get_dataset(view_data["dataset"])
+    if dataset is None:
+        return None
+    rows = table_filter_rows(dataset, view_data["table"], view_data["filter"], view_data["query"])
+    view = TableView(dataset_token=view_data["dataset"], table=view_data["table"], rows=rows)
+    TABLE_VIEWS.register(view, token=view_data["token"], nbytes=view.nbytes)
+    return view
+
+
+def table_view(
+    dataset: Dataset,
+    processed_data: str,
+    view_data: dict[str, Any] | None,
+    table: str,
+    filter_spec: dict | None,
+    filter_query: str | None = None,
+) -> tuple[TableView, dict[str, Any], bool]:
+    """Return the filtered rows of a data table, registering a new view if they changed.
+
+    Generic function to handle both GM and MG data tables. The view store keeps the token of the
+    view along with its filter spec and filter query, so that any worker can rebuild the view.
+
+    Args:
+        dataset: The processed dataset.
+        processed_data: Dataset token of the processed data.
+        view_data: Data of the view store of the table.
+        table: The entity table shown in the data table ("gcfs" or "mfs").
+        filter_spec: Newly applied filters (see `table_filter_rows`), or None to keep the
+            filters of the current view.
+        filter_query: The filter query of the filter row of the data table.
+
+    Returns:
+        The view, the data of the view store, and whether it is a new view.
+    """
+    filter_query = filter_query or ""
+    if filter_spec is None and view_data and view_data["dataset"] == processed_data:
+        if view_data["query"] == filter_query:
+            view = table_restore_view(view_data)
+            if view is not None:
+                return view, view_data, False
+        # A new filter query further restricts the rows of the current filters
+        filter_spec = view_data["filter"]
+
+    # On initial load and when processed data changes, show all rows
+    view = TableView(
+        dataset_token=processed_data,
+        table=table,
+        rows=table_filter_rows(dataset, table, filter_spec, filter_query),
+    )
+    view_data = {
+        "token": TABLE_VIEWS.register(view, nbytes=view.nbytes),
+        "dataset": processed_data,
+        "table": table,
+        "filter": filter_spec,
+        "query": filter_query,
+    }
+    return view, view_data, True
+
+
+def table_page(
+    dataset: Dataset,
+    view: TableView,
+    page_current: int | None,
+    page_size: int | None,
+    sort_by: list[dict[str, str]] | None,
+    selection: dict[str, Any] | None,
+) -> tuple[np.ndarray, list[dict], list[int], int, int]:
+    """Gather the visible page of a data table.
+
+    Generic function to handle both GM and MG data tables. Each record carries the row of its
+    entity in the dataset as "id", which identifies the selected rows across pages.
+
+    Args:
+        dataset: The processed dataset.
+        view: The filtered rows of the table.
+        page_current: Index of the requested page.
+        page_size: Number of rows per page.
+        sort_by: Sorted columns as given by the data table.
+        selection: The selection handle of the table.
+
+    Returns:
+        The rows of the page, their records, the indices of the selected records, the number of
+        pages, and the index of the page, which is clamped to the available pages.
+    """
+    page_size = page_size or 10
+    page_count = max(1, -(-len(view.rows) // page_size))
+    page_current = min(max(page_current or 0, 0), page_count - 1)
+
+    start = page_current * page_size
+    rows = view.sort(dataset, sort_by)[start : start + page_size]
+    records = dataset.table_frame(view.table, rows).to_dict("records")
+    for record, row in zip(records, rows.tolist()):
+        record["id"] = row
+
+    # Rows of the page listed in the handle, which are the deselected rows when all are selected
+    listed = np.isin(rows, selection["rows"] if selection else [])
+    if selection and selection["all"]:
+        listed = ~listed
+    selected_rows = np.flatnonzero(listed).tolist()
+    return rows, records, selected_rows, page_count, page_current
+
+
+@functools.lru_cache(maxsize=TABLE_TOOLTIP_CACHE_MAX_ROWS)
+def table_row_tooltip(dataset_token: str, table: str, row: int) -> dict:
+    """Return the tooltip of a data table row, cached per dataset and row.
+
+    Generic function to handle both GM and MG data tables. Tooltips are only prepared for the
+    rows of the visible pages, and paging back to a row reuses its tooltip.
+
+    Args:
+        dataset_token: Dataset token of the processed data.
+        table: The entity table shown in the data table ("gcfs" or "mfs").
+        row: Row of the entity in the dataset.
+
+    Returns:
+        The markdown tooltips of the row, per column.
+
+    Raises:
+        KeyError: If the dataset is not available. Callers resolve the dataset first; raising
+            instead of returning no tooltips keeps the miss out of the cache.
+    """
+    dataset = get_dataset(dataset_token)
+    if dataset is None:
+        raise KeyError(f"Unknown dataset token: {dataset_token}")
+    entity = getattr(dataset, table).iloc[row]
+    return gm_table_tooltip(entity) if table == "gcfs" else mg_table_tooltip(entity)
+
+
+def table_selection(
+    view_token: str | None,
+    select_all: bool = False,
+    rows: Iterable[int] = (),
+    n_rows: int = 0,
+) -> dict[str, Any]:
+    """Return the selection handle of a data table, as kept in its selected store.
+
+    Generic function to handle both GM and MG table row selections. The handle stays small
+    whatever the number of selected rows: selecting all rows matching the filters is a flag on
+    the view of these rows, followed by the rows deselected since. The handle is also read and
+    updated by the clientside callbacks in assets/clientside.js.
+
+    Args:
+        view_token: Token of the filtered table rows.
+        select_all: Whether all rows of the view are selected.
+        rows: Rows deselected from the view if `select_all`, otherwise the selected rows.
+        n_rows: Number of rows of the view.
+
+    Returns:
+        The selection handle.
+    """
+    return {"view": view_token, "all": select_all, "rows": sorted(set(rows)), "n_rows": n_rows}
+
+
+def table_selected_rows(
+    selection: dict[str, Any] | None, view_data: dict[str, Any] | None = None
+) -> np.ndarray | None:
+    """Return the sorted rows of a selection handle, None if its view is no longer available.
+
+    Args:
+        selection: The selection handle of a data table.
+        view_data: Data of the view store of the table, used to rebuild the view of the handle.
+
+    Returns:
+        The selected rows, or None.
+    """
+    if not selection:
+        return np.array([], dtype=np.int64)
+    rows = np.asarray(selection["rows"], dtype=np.int64)
+    if not selection["all"]:
+        return rows
+    if view_data and view_data["token"] == selection["view"]:
+        view = table_restore_view(view_data)
+    else:
+        view = TABLE_VIEWS.get(selection["view"])
+    if view is None:
+        return None
+    return np.setdiff1d(view.rows, rows)
+
+
+def table_update_selection(
+    selected_row_ids: list[int] | None,
+    page_data: list[dict] | None,
+    selection: dict[str, Any] | None,
+) -> dict[str, Any]:
+    """Merge the selection of the visible page into the selection handle of the table.
+
+    Generic function to handle both GM and MG table row selections.
+
+    Args:
+        selected_row_ids: Selected rows of the visible page.
+        page_data: Records of the visible page.
+        selection: The selection handle so far.
+
+    Returns:
+        The updated selection handle.
+    """
+    selection = selection or table_selection(None)
+    page_ids = {record["id"] for record in page_data or []}
+    picked = set(selected_row_ids or [])
+    rows = set(selection["rows"])
+    if selection["all"]:
+        # The rows are the deselected ones
+        new_rows = (rows - picked) | (page_ids - picked)
+    else:
+        new_rows = (rows - page_ids) | picked
+    if new_rows == rows:
+        # Changing pages re-selects the stored rows, it must not count as a change
+        raise dash.exceptions.PreventUpdate
+    return table_selection(selection["view"], selection["all"], new_rows, selection["n_rows"])
 
 
 # ------------------ GM Filter functions ------------------ #
@@ -655,7 +1113,7 @@ def gm_filter_create_initial_block(block_id: str) -> dmc.Grid:
                 [
                     dmc.TextInput(
                         id={"type": "gm-filter-dropdown-ids-text-input", "index": block_id},
-                        placeholder="1, 2, 3, ...",
+                        placeholder="1, 2, 10-20, 3*, ...",
                         className="custom-textinput",
                     ),
                     dcc.Dropdown(
@@ -672,24 +1130,13 @@ def gm_filter_create_initial_block(block_id: str) -> dmc.Grid:
     )
 
 
-@app.callback(
+# Add a new block to the GM filters layout when the add button is clicked
+app.clientside_callback(
+    ClientsideFunction(namespace="nplinker", function_name="add_block"),
     Output("gm-filter-blocks-id", "data"),
     Input({"type": "gm-filter-add-button", "index": ALL}, "n_clicks"),
     State("gm-filter-blocks-id", "data"),
 )
-def gm_filter_add_block(n_clicks: list[int], blocks_id: list[str]) -> list[str]:
-    """Add a new block to the GM filters layout when the add button is clicked.
-
-    Calls the common filter_add_block function.
-
-    Args:
-        n_clicks: List of number of clicks for each add button.
-        blocks_id: Current list of block IDs.
-
-    Returns:
-        Updated list of block IDs.
-    """
-    return filter_add_block(n_clicks, blocks_id)
 
 
 @app.callback(
@@ -723,18 +1170,18 @@ def gm_filter_display_blocks(
                                 id={"type": "gm-filter-add-button", "index": new_block_id},
                                 className="btn-primary",
                             ),
-                            html.Label(
-                                "OR",
-                                id={"type": "gm-filter-or-label", "index": new_block_id},
-                                className="ms-2 px-2 py-1 rounded",
+                            dcc.Dropdown(
+                                options=FILTER_OPERATOR_OPTIONS,
+                                value="OR",
+                                id={"type": "gm-filter-operator", "index": new_block_id},
+                                clearable=False,
+                                searchable=False,
                                 style={
                                     "color": "green",
-                                    "backgroundColor": "#f0f0f0",
-                                    "display": "inline-block",
+                                    "width": "105px",
                                     "position": "absolute",
                                     "left": "50px",  # Adjust based on button width
-                                    "top": "50%",
-                                    "transform": "translateY(-50%)",
+                                    "top": "0",
                                 },
                             ),
                         ],
@@ -755,7 +1202,7 @@ def gm_filter_display_blocks(
                     [
                         dmc.TextInput(
                             id={"type": "gm-filter-dropdown-ids-text-input", "index": new_block_id},
-                            placeholder="1, 2, 3, ...",
+                            placeholder="1, 2, 10-20, 3*, ...",
                             className="custom-textinput",
                         ),
                         dcc.Dropdown(
@@ -774,7 +1221,7 @@ def gm_filter_display_blocks(
             gutter="md",
         )
 
-        # Hide the add button and OR label on the previous last block
+        # Hide the add button on the previous last block, its operator stays visible
         if len(existing_blocks) == 1:
             existing_blocks[-1]["props"]["children"][0]["props"]["children"]["props"]["style"] = {
                 "display": "none"
@@ -839,7 +1286,7 @@ def gm_filter_update_placeholder(
         return (
             {"display": "block"},
             {"display": "none"},
-            "1, 2, 3, ...",
+            "1, 2, 10-20, 3*, ...",
             "",
             text_value,
             new_bgc_value,
@@ -855,6 +1302,16 @@ def gm_filter_update_placeholder(
             new_bgc_value,
             bgc_options,
         )
+    elif selected_value in FILTER_STRAIN_PLACEHOLDERS:
+        return (
+            {"display": "block"},
+            {"display": "none"},
+            FILTER_STRAIN_PLACEHOLDERS[selected_value],
+            "",
+            text_value,
+            new_bgc_value,
+            bgc_options,
+        )
     else:
         # This case should never occur due to the Literal type, but it satisfies mypy
         return (
@@ -869,6 +1326,45 @@ def gm_filter_update_placeholder(
 
 
 # ------------------ MG Filter functions ------------------ #
+def mg_filter_create_mz_inputs(block_id: str) -> html.Div:
+    """Create the hidden precursor m/z inputs of the MG filter block with the given ID.
+
+    Args:
+        block_id: A unique identifier for the block.
+
+    Returns:
+        A Div with the target m/z values, the tolerance and the unit of the tolerance.
+    """
+    return html.Div(
+        [
+            dmc.TextInput(
+                id={"type": "mg-filter-dropdown-mz-text-input", "index": block_id},
+                placeholder="301.14, 455.29, ...",
+                className="custom-textinput",
+                style={"flex": "1"},
+            ),
+            dmc.NumberInput(
+                id={"type": "mg-filter-mz-tolerance-input", "index": block_id},
+                value=MG_FILTER_MZ_DEFAULT_TOLERANCES["PPM"],
+                min=0,
+                allowNegative=False,
+                className="custom-textinput",
+                style={"width": "90px"},
+            ),
+            dcc.Dropdown(
+                id={"type": "mg-filter-mz-unit-dropdown", "index": block_id},
+                options=MG_FILTER_MZ_TOLERANCE_UNIT_OPTIONS,
+                value="PPM",
+                clearable=False,
+                searchable=False,
+                style={"width": "80px"},
+            ),
+        ],
+        id={"type": "mg-filter-mz-inputs", "index": block_id},
+        style={"display": "none"},
+    )
+
+
 def mg_filter_create_initial_block(block_id: str) -> dmc.Grid:
     """Create the initial filter block component for the MG tab with the given ID.
 
@@ -902,15 +1398,16 @@ def mg_filter_create_initial_block(block_id: str) -> dmc.Grid:
                 [
                     dmc.TextInput(
                         id={"type": "mg-filter-dropdown-mf-ids-text-input", "index": block_id},
-                        placeholder="1, 2, 3, ...",
+                        placeholder="1, 2, 10-20, 3*, ...",
                         className="custom-textinput",
                     ),
                     dmc.TextInput(
                         id={"type": "mg-filter-dropdown-spec-ids-text-input", "index": block_id},
-                        placeholder="1, 2, 3, ...",
+                        placeholder="1, 2, 10-20, 3*, ...",
                         className="custom-textinput",
                         style={"display": "none"},
                     ),
+                    mg_filter_create_mz_inputs(block_id),
                 ],
                 span=6,
             ),
@@ -919,24 +1416,13 @@ def mg_filter_create_initial_block(block_id: str) -> dmc.Grid:
     )
 
 
-@app.callback(
+# Add a new block to the MG filters layout when the add button is clicked
+app.clientside_callback(
+    ClientsideFunction(namespace="nplinker", function_name="add_block"),
     Output("mg-filter-blocks-id", "data"),
     Input({"type": "mg-filter-add-button", "index": ALL}, "n_clicks"),
     State("mg-filter-blocks-id", "data"),
 )
-def mg_filter_add_block(n_clicks: list[int], blocks_id: list[str]) -> list[str]:
-    """Add a new block to the MG filters layout when the add button is clicked.
-
-    Calls the common filter_add_block function.
-
-    Args:
-        n_clicks: List of number of clicks for each add button.
-        blocks_id: Current list of block IDs.
-
-    Returns:
-        Updated list of block IDs.
-    """
-    return filter_add_block(n_clicks, blocks_id)
 
 
 @app.callback(
@@ -970,18 +1456,18 @@ def mg_filter_display_blocks(
                                 id={"type": "mg-filter-add-button", "index": new_block_id},
                                 className="btn-primary",
                             ),
-                            html.Label(
-                                "OR",
-                                id={"type": "mg-filter-or-label", "index": new_block_id},
-                                className="ms-2 px-2 py-1 rounded",
+                            dcc.Dropdown(
+                                options=FILTER_OPERATOR_OPTIONS,
+                                value="OR",
+                                id={"type": "mg-filter-operator", "index": new_block_id},
+                                clearable=False,
+                                searchable=False,
                                 style={
                                     "color": "green",
-                                    "backgroundColor": "#f0f0f0",
-                                    "display": "inline-block",
+                                    "width": "105px",
                                     "position": "absolute",
                                     "left": "50px",  # Adjust based on button width
-                                    "top": "50%",
-                                    "transform": "translateY(-50%)",
+                                    "top": "0",
                                 },
                             ),
                         ],
@@ -1005,7 +1491,7 @@ def mg_filter_display_blocks(
                                 "type": "mg-filter-dropdown-mf-ids-text-input",
                                 "index": new_block_id,
                             },
-                            placeholder="1, 2, 3, ...",
+                            placeholder="1, 2, 10-20, 3*, ...",
                             className="custom-textinput",
                         ),
                         dmc.TextInput(
@@ -1013,10 +1499,11 @@ def mg_filter_display_blocks(
                                 "type": "mg-filter-dropdown-spec-ids-text-input",
                                 "index": new_block_id,
                             },
-                            placeholder="1, 2, 3, ...",
+                            placeholder="1, 2, 10-20, 3*, ...",
                             className="custom-textinput",
                             style={"display": "none"},
                         ),
+                        mg_filter_create_mz_inputs(new_block_id),
                     ],
                     span=6,
                 ),
@@ -1024,7 +1511,7 @@ def mg_filter_display_blocks(
             gutter="md",
         )
 
-        # Hide the add button and OR label on the previous last block
+        # Hide the add button on the previous last block, its operator stays visible
         if len(existing_blocks) == 1:
             existing_blocks[-1]["props"]["children"][0]["props"]["children"]["props"]["style"] = {
                 "display": "none"
@@ -1045,80 +1532,143 @@ def mg_filter_display_blocks(
     Output({"type": "mg-filter-dropdown-spec-ids-text-input", "index": MATCH}, "placeholder"),
     Output({"type": "mg-filter-dropdown-mf-ids-text-input", "index": MATCH}, "value"),
     Output({"type": "mg-filter-dropdown-spec-ids-text-input", "index": MATCH}, "value"),
+    Output({"type": "mg-filter-mz-inputs", "index": MATCH}, "style"),
+    Output({"type": "mg-filter-dropdown-mz-text-input", "index": MATCH}, "value"),
     Input({"type": "mg-filter-dropdown-menu", "index": MATCH}, "value"),
 )
 def mg_filter_update_placeholder(
     selected_value: str,
-) -> tuple[dict[str, str], dict[str, str], str, str, str, list[Any]]:
+) -> tuple[dict[str, str], dict[str, str], str, str, str, list[Any], dict[str, str], str]:
     """Update the placeholder text and style of input fields based on the dropdown selection.
 
     Args:
         selected_value: The value selected in the dropdown menu.
 
     Returns:
-        A tuple containing style, placeholder, and value updates for the input fields.
+        A tuple containing style, placeholder, and value updates for the input fields, followed
+        by the style of the precursor m/z inputs and the value of the target m/z input.
     """
     if not ctx.triggered:
         # Callback was not triggered by user interaction, don't change anything
         raise dash.exceptions.PreventUpdate
+    hidden_mz = {"display": "none"}
     if selected_value == "MF_ID":
-        return {"display": "block"}, {"display": "none"}, "1, 2, 3, ...", "", "", []
+        return (
+            {"display": "block"},
+            {"display": "none"},
+            "1, 2, 10-20, 3*, ...",
+            "",
+            "",
+            [],
+            hidden_mz,
+            "",
+        )
     elif selected_value == "SPECTRUM_ID":
         return (
             {"display": "none"},
             {"display": "block"},
             "",
-            "1, 2, 3, ...",
+            "1, 2, 10-20, 3*, ...",
             "",
             [],
+            hidden_mz,
+            "",
+        )
+    elif selected_value in FILTER_STRAIN_PLACEHOLDERS:
+        # The strain filters take their strains or count from the MF IDs text input
+        return (
+            {"display": "block"},
+            {"display": "none"},
+            FILTER_STRAIN_PLACEHOLDERS[selected_value],
+            "",
+            "",
+            [],
+            hidden_mz,
+            "",
+        )
+    elif selected_value == "PRECURSOR_MZ":
+        return (
+            {"display": "none"},
+            {"display": "none"},
+            "",
+            "",
+            "",
+            [],
+            {"display": "flex", "gap": "8px"},
+            "",
         )
     else:
         # This case should never occur due to the Literal type, but it satisfies mypy
-        return {"display": "none"}, {"display": "none"}, "", "", "", []
+        return {"display": "none"}, {"display": "none"}, "", "", "", [], hidden_mz, ""
 
 
 # ------------------ GM Data Table functions ------------------ #
 def gm_filter_apply(
-    df: pd.DataFrame,
+    dataset: Dataset,
     dropdown_menus: list[str],
     text_inputs: list[str],
     bgc_class_dropdowns: list[list[str]],
-) -> pd.DataFrame:
-    """Apply filters to the DataFrame based on user inputs.
+    operators: list[str] | None = None,
+) -> np.ndarray:
+    """Apply filters to the GCF table based on user inputs.
+
+    Each filter block selects a bitmap of GCF rows, BGC classes are looked up in the class index
+    of the dataset and strains in its strain bitsets. The blocks are combined with their
+    operators, OR by default.
 
     Args:
-        df: The input DataFrame.
+        dataset: The processed dataset.
         dropdown_menus: List of selected dropdown menu options.
-        text_inputs: List of text inputs for GCF IDs.
+        text_inputs: List of text inputs for GCF IDs, strains or minimum numbers of strains.
         bgc_class_dropdowns: List of selected BGC classes.
+        operators: List of operators in front of the blocks after the first.
 
     Returns:
-        Filtered DataFrame.
+        Sorted rows of the GCF table matching the filters, all rows if no filter is set.
     """
-    masks = []
+    n_rows = len(dataset.gcfs)
+    bitmaps: list[np.ndarray | None] = []
 
     for menu, text_input, bgc_classes in zip(dropdown_menus, text_inputs, bgc_class_dropdowns):
+        bitmap = None
         if menu == "GCF_ID" and text_input:
-            gcf_ids = [id.strip() for id in text_input.split(",") if id.strip()]
+            gcf_ids = filter_split_ids(text_input)
             if gcf_ids:
-                mask = df["GCF ID"].astype(str).isin(gcf_ids)
-                masks.append(mask)
+                bitmap = rows_to_bitmap(dataset.gcf_rows(gcf_ids), n_rows)
         elif menu == "BGC_CLASS" and bgc_classes:
-            # Get unique classes for filtering
-            mask = df["BGC Classes"].apply(
-                lambda x: any(
-                    bc.lower() in {item.lower() for sublist in x for item in sublist}
-                    for bc in bgc_classes
-                )
-            )
-            masks.append(mask)
+            bitmap = dataset.bgc_class_bitmap(bgc_classes)
+        elif menu in ("STRAIN", "MIN_STRAINS"):
+            rows = filter_strain_rows(dataset, "gcfs", menu, text_input)
+            if rows is not None:
+                bitmap = rows_to_bitmap(rows, n_rows)
+        bitmaps.append(bitmap)
 
-    if masks:
-        # Combine all masks with OR operation
-        final_mask = pd.concat(masks, axis=1).any(axis=1)
-        return df[final_mask]
-    else:
-        return df
+    return filter_combine_blocks(bitmaps, operators, n_rows)
+
+
+def gm_table_tooltip(gcf: pd.Series) -> dict:
+    """Prepare the tooltip of a GM data table row.
+
+    Args:
+        gcf: The GCF table row shown in the data table.
+
+    Returns:
+        The markdown tooltips of the row, per column.
+    """
+    bgc_tooltip_markdown = "| BGC ID | Class |\n|---------|--------|\n" + "\n".join(
+        [
+            f"| {bgc_id} | {', '.join(bgc_class)} |"
+            for bgc_id, bgc_class in zip(gcf["BGC IDs"], gcf["BGC Classes"])
+        ]
+    )
+    strains_markdown = "| Strains |\n|----------|\n" + "\n".join(
+        [f"| {strain} |" for strain in gcf["strains"]]
+    )
+
+    return {
+        "# BGCs": {"value": bgc_tooltip_markdown, "type": "markdown"},
+        "GCF ID": {"value": strains_markdown, "type": "markdown"},
+    }
 
 
 @app.callback(
@@ -1129,12 +1679,25 @@ def gm_filter_apply(
     Output("gm-table", "selected_rows", allow_duplicate=True),
     Output("gm-table-select-all-checkbox", "value"),
     Output("loading-spinner-container", "children", allow_duplicate=True),
+    Output("gm-table", "page_count"),
+    Output("gm-table", "page_current"),
+    Output("gm-table-view-store", "data"),
+    Output("gm-table-selected-store", "data", allow_duplicate=True),
     Input("processed-data-store", "data"),
     Input("gm-filter-apply-button", "n_clicks"),
     State({"type": "gm-filter-dropdown-menu", "index": ALL}, "value"),
     State({"type": "gm-filter-dropdown-ids-text-input", "index": ALL}, "value"),
     State({"type": "gm-filter-dropdown-bgc-class-dropdown", "index": ALL}, "value"),
     State("gm-table-select-all-checkbox", "value"),
+    Input("gm-table", "page_current"),
+    Input("gm-table", "page_size"),
+    Input("gm-table", "sort_by"),
+    State("gm-table-view-store", "data"),
+    State("gm-table-selected-store", "data"),
+    State({"type": "gm-filter-operator", "index": ALL}, "value"),
+    Input("gm-graph", "clickData"),
+    State("gm-graph-x-axis-selector", "value"),
+    Input("gm-table", "filter_query"),
     prevent_initial_call=True,
 )
 def gm_table_update_datatable(
@@ -1144,68 +1707,75 @@ def gm_table_update_datatable(
     text_inputs: list[str],
     bgc_class_dropdowns: list[list[str]],
     checkbox_value: list | None,
-) -> tuple[list[dict], list[dict], list[dict], dict, list, list, str | None]:
-    """Update the DataTable based on processed data and applied filters when the button is clicked.
+    page_current: int | None = 0,
+    page_size: int | None = 10,
+    sort_by: list[dict[str, str]] | None = None,
+    view_data: dict[str, Any] | None = None,
+    selection: dict[str, Any] | None = None,
+    operators: list[str] | None = None,
+    click_data: dict | None = None,
+    x_axis_selection: str | None = None,
+    filter_query: str | None = None,
+) -> tuple:
+    """Update the visible page of the DataTable based on processed data, applied filters and sorting.
+
+    Filters are applied when the button is clicked, and the matching rows are kept server-side.
+    Clicking a bar of the GM plot shows the GCFs of that bar instead, until the filters are
+    applied again. The filter row of the table further restricts these rows by the displayed
+    values. Paging and sorting the table only gathers the requested page of these rows.
 
     Args:
-        processed_data: JSON string of processed data.
+        processed_data: Dataset token of the processed data.
         n_clicks: Number of times the Apply Filters button has been clicked.
         dropdown_menus: List of selected dropdown menu options.
         text_inputs: List of text inputs for GCF IDs.
         bgc_class_dropdowns: List of selected BGC classes.
         checkbox_value: Current value of the select-all checkbox.
+        page_current: Index of the requested page.
+        page_size: Number of rows per page.
+        sort_by: Sorted columns of the table.
+        view_data: Token, filter spec and filter query of the filtered table rows.
+        selection: The selection handle of the table.
+        operators: List of operators in front of the filter blocks after the first.
+        click_data: Data of the clicked bar of the GM plot.
+        x_axis_selection: Selected x-axis type of the GM plot ('n_bgcs' or 'class_bgcs').
+        filter_query: Filter query of the filter row of the table.
 
     Returns:
-        Tuple containing table data, column definitions, tooltips data, style, empty selected rows, and updated checkbox value.
+        Tuple containing page data, column definitions, tooltips data, style, selected rows of
+        the page, updated checkbox value, spinner state, page count, page index, view store data and
+        the selected rows on all pages.
     """
-    if processed_data is None:
-        return [], [], [], {"display": "none"}, [], [], None
-
-    try:
-        data = json.loads(processed_data)
-        df = pd.DataFrame(data["gcf_data"])
-    except (json.JSONDecodeError, KeyError, pd.errors.EmptyDataError):
-        return [], [], [], {"display": "none"}, [], [], None
-
-    if ctx.triggered_id == "gm-filter-apply-button":
+    dataset = get_dataset(processed_data)
+    if processed_data is None or dataset is None:
+        return [], [], [], {"display": "none"}, [], [], None, 0, 0, None, table_selection(None)
+
+    filter_spec: dict | None = None
+    bucket = None
+    if ctx.triggered_id == "gm-graph" and x_axis_selection is not None:
+        bucket = gm_plot_clicked_bucket(dataset, x_axis_selection, click_data)
+    if bucket is not None:
+        # Show the GCFs of the clicked bar of the GM plot, resolved through its bucket rows
+        filter_spec = {"x_axis_selection": x_axis_selection, "x_value": str(bucket[0])}
+    elif ctx.triggered_id == "gm-filter-apply-button":
         # Apply filters only when the button is clicked
-        filtered_df = gm_filter_apply(df, dropdown_menus, text_inputs, bgc_class_dropdowns)
-        # Reset the checkbox when filters are applied
-        new_checkbox_value = []
-    else:
-        # On initial load or when processed data changes, show all data
-        filtered_df = df
-        new_checkbox_value = checkbox_value if checkbox_value is not None else []
-
-    # Prepare tooltip data
-    tooltip_data = []
-    for _, row in filtered_df.iterrows():
-        bgc_tooltip_markdown = "| BGC ID | Class |\n|---------|--------|\n" + "\n".join(
-            [
-                f"| {bgc_id} | {', '.join(bgc_class)} |"
-                for bgc_id, bgc_class in zip(row["BGC IDs"], row["BGC Classes"])
-            ]
-        )
-        strains_markdown = "| Strains |\n|----------|\n" + "\n".join(
-            [f"| {strain} |" for strain in row["strains"]]
-        )
-
-        tooltip_data.append(
-            {
-                "# BGCs": {"value": bgc_tooltip_markdown, "type": "markdown"},
-                "GCF ID": {"value": strains_markdown, "type": "markdown"},
-            }
-        )
+        filter_spec = {
+            "dropdown_menus": dropdown_menus,
+            "text_inputs": text_inputs,
+            "bgc_class_dropdowns": bgc_class_dropdowns,
+            "operators": operators,
+        }
 
-    # Prepare the data for display
-    filtered_df["BGC IDs"] = filtered_df["BGC IDs"].apply(lambda x: ", ".join(map(str, x)))
-    filtered_df["BGC Classes"] = filtered_df["BGC Classes"].apply(
-        lambda x: ", ".join({item for sublist in x for item in sublist})  # Unique flattened classes
+    view, view_data, new_view = table_view(
+        dataset, processed_data, view_data, "gcfs", filter_spec, filter_query
     )
-    filtered_df["MiBIG IDs"] = filtered_df["strains"].apply(
-        lambda x: ", ".join([s for s in x if s.startswith("BGC")]) or "None"
+    if new_view:
+        # The selection refers to the previous rows, start over from the first page
+        selection, page_current = table_selection(view_data["token"], n_rows=len(view.rows)), 0
+
+    rows, data, selected_rows, page_count, page_current = table_page(
+        dataset, view, page_current, page_size, sort_by, selection
     )
-    filtered_df["strains"] = filtered_df["strains"].apply(", ".join)
 
     columns = [
         {"name": "GCF ID", "id": "GCF ID"},
@@ -1215,118 +1785,187 @@ def gm_table_update_datatable(
     ]
 
     return (
-        filtered_df.to_dict("records"),
+        data,
         columns,
-        tooltip_data,
+        [table_row_tooltip(processed_data, "gcfs", row) for row in rows.tolist()],
         {"display": "block"},
-        [],
-        new_checkbox_value,
+        selected_rows,
+        # Only reset the checkbox for new rows: an unchanged value would still trigger the
+        # select-all toggle, which would clear the rows selected on other pages
+        [] if new_view else dash.no_update,
         None,
+        page_count,
+        page_current,
+        view_data,
+        selection if new_view else dash.no_update,
     )
 
 
-@app.callback(
+# Toggle between selecting all rows and deselecting all rows in the GM DataTable
+app.clientside_callback(
+    ClientsideFunction(namespace="nplinker", function_name="toggle_selection"),
+    Output("gm-table-selected-store", "data", allow_duplicate=True),
     Output("gm-table", "selected_rows", allow_duplicate=True),
     Input("gm-table-select-all-checkbox", "value"),
+    State("gm-table-selected-store", "data"),
     State("gm-table", "data"),
-    State("gm-table", "derived_virtual_data"),
     prevent_initial_call=True,
 )
-def gm_table_toggle_selection(
-    value: list | None,
-    original_rows: list,
-    filtered_rows: list | None,
-) -> list:
-    """Toggle between selecting all rows and deselecting all rows in the GM DataTable.
-
-    Calls the common table_toggle_selection function.
-
-    Args:
-        value: Value of the select-all checkbox.
-        original_rows: All rows in the table.
-        filtered_rows: Rows visible after filtering, or None if no filter is applied.
-
-    Returns:
-        List of indices of selected rows after toggling.
-    """
-    return table_toggle_selection(value, original_rows, filtered_rows)
 
 
 @app.callback(
-    Output("gm-table-output1", "children"),
-    Output("gm-table-output2", "children"),
-    Input("gm-table", "derived_virtual_data"),
-    Input("gm-table", "derived_virtual_selected_rows"),
+    Output("gm-table-selected-store", "data", allow_duplicate=True),
+    Input("gm-table", "selected_row_ids"),
+    State("gm-table", "data"),
+    State("gm-table-selected-store", "data"),
+    prevent_initial_call=True,
 )
-def gm_table_select_rows(
-    rows: list[dict[str, Any]], selected_rows: list[int] | None
-) -> tuple[str, str]:
-    """Display the total number of rows and the number of selected rows in the table.
+def gm_table_update_selection(
+    selected_row_ids: list[int] | None,
+    page_data: list[dict] | None,
+    selection: dict[str, Any] | None,
+) -> dict[str, Any]:
+    """Keep the rows selected on the visible page of the GM DataTable.
+
+    Calls the common table_update_selection function.
 
     Args:
-        rows: List of row data from the DataTable.
-        selected_rows: Indices of selected rows.
+        selected_row_ids: Selected rows of the visible page.
+        page_data: Records of the visible page.
+        selection: The selection handle so far.
 
     Returns:
-        Strings describing total rows and selected rows.
+        The selected rows on all pages.
     """
-    if not rows:
-        return "No data available.", "No rows selected."
-
-    df = pd.DataFrame(rows)
-
-    if selected_rows is None:
-        selected_rows = []
+    return table_update_selection(selected_row_ids, page_data, selection)
 
-    output1 = f"Total rows: {len(df)}"
-    output2 = f"Selected rows: {len(selected_rows)}\n"
 
-    return output1, output2
+# Display the number of rows matching the filters and the number of selected rows
+app.clientside_callback(
+    ClientsideFunction(namespace="nplinker", function_name="select_rows"),
+    Output("gm-table-output1", "children"),
+    Output("gm-table-output2", "children"),
+    Input("gm-table-selected-store", "data"),
+)
 
 
 # ------------------ MG Data Table functions ------------------ #
 def mg_filter_apply(
-    df: pd.DataFrame,
+    dataset: Dataset,
     dropdown_menus: list[str],
     mf_text_inputs: list[str],
     spec_text_inputs: list[str],
-) -> pd.DataFrame:
-    """Apply filters to the DataFrame based on user inputs.
+    operators: list[str] | None = None,
+    mz_text_inputs: list[str] | None = None,
+    mz_tolerances: list[float | str | None] | None = None,
+    mz_units: list[str] | None = None,
+) -> np.ndarray:
+    """Apply filters to the MF table based on user inputs.
+
+    Each filter block selects a bitmap of MF rows, spectrum IDs are looked up in the spectrum
+    index of the dataset, target m/z values in its sorted precursor m/z and strains in its strain
+    bitsets. The blocks are combined with their operators, OR by default.
 
     Args:
-        df: The input DataFrame.
+        dataset: The processed dataset.
         dropdown_menus: List of selected dropdown menu options.
-        mf_text_inputs: List of text inputs for MF IDs.
+        mf_text_inputs: List of text inputs for MF IDs, strains or minimum numbers of strains.
         spec_text_inputs: List of text inputs for Spectrum IDs.
+        operators: List of operators in front of the blocks after the first.
+        mz_text_inputs: List of text inputs for target precursor m/z values.
+        mz_tolerances: List of m/z tolerances around the targets, the default tolerance of
+            the unit if empty.
+        mz_units: List of units of the m/z tolerances, "PPM" or "DA".
 
     Returns:
-        Filtered DataFrame.
+        Sorted rows of the MF table matching the filters, all rows if no filter is set.
     """
-    masks = []
-
-    for menu, mf_text_input, spec_text_input in zip(
-        dropdown_menus, mf_text_inputs, spec_text_inputs
+    n_rows = len(dataset.mfs)
+    bitmaps: list[np.ndarray | None] = []
+    n_blocks = len(dropdown_menus)
+    mz_text_inputs = mz_text_inputs or [""] * n_blocks
+    mz_tolerances = mz_tolerances or [None] * n_blocks
+    mz_units = mz_units or ["PPM"] * n_blocks
+
+    for menu, mf_text_input, spec_text_input, mz_text_input, mz_tolerance, mz_unit in zip(
+        dropdown_menus, mf_text_inputs, spec_text_inputs, mz_text_inputs, mz_tolerances, mz_units
     ):
+        bitmap = None
         if menu == "MF_ID" and mf_text_input:
-            mf_ids = [id.strip() for id in mf_text_input.split(",") if id.strip()]
+            mf_ids = filter_split_ids(mf_text_input)
             if mf_ids:
-                mask = df["MF ID"].astype(str).isin(mf_ids)
-                masks.append(mask)
+                bitmap = rows_to_bitmap(dataset.mf_rows(mf_ids), n_rows)
         elif menu == "SPECTRUM_ID" and spec_text_input:
-            spectrum_ids = [id.strip() for id in spec_text_input.split(",") if id.strip()]
+            spectrum_ids = filter_split_ids(spec_text_input)
             if spectrum_ids:
-                # Convert to set of strings for efficient lookup
-                spectrum_ids_set = set(spectrum_ids)
-                # Check if any of the spectrum IDs exactly match any ID in the Spectra IDs list
-                mask = df["Spectra IDs"].apply(lambda x: any(str(s) in spectrum_ids_set for s in x))
-                masks.append(mask)
-
-    if masks:
-        # Combine all masks with OR operation
-        final_mask = pd.concat(masks, axis=1).any(axis=1)
-        return df[final_mask]
-    else:
-        return df
+                # MFs containing any of the matching spectra
+                bitmap = rows_to_bitmap(dataset.spectrum_mf_rows(spectrum_ids), n_rows)
+        elif menu in ("STRAIN", "MIN_STRAINS"):
+            rows = filter_strain_rows(dataset, "mfs", menu, mf_text_input)
+            if rows is not None:
+                bitmap = rows_to_bitmap(rows, n_rows)
+        elif menu == "PRECURSOR_MZ" and mz_text_input:
+            targets = filter_split_mz(mz_text_input)
+            tolerance = filter_parse_mz_tolerance(mz_tolerance, mz_unit)
+            # A block with an invalid tolerance is ignored, like one without valid targets
+            if targets and tolerance is not None:
+                # MFs with a spectrum within the tolerance of any target, a tolerance of 0 only
+                # keeps exact matches
+                rows = dataset.precursor_mz_mf_rows(targets, tolerance, mz_unit)
+                bitmap = rows_to_bitmap(rows, n_rows)
+        bitmaps.append(bitmap)
+
+    return filter_combine_blocks(bitmaps, operators, n_rows)
+
+
+def mg_table_tooltip(mf: pd.Series) -> dict:
+    """Prepare the tooltip of a MG data table row.
+
+    Args:
+        mf: The MF table row shown in the data table.
+
+    Returns:
+        The markdown tooltips of the row, per column.
+    """
+    # Limit spectra entries in tooltip with 'more entries' indicator
+    max_tooltip_entries = 10
+    spectra_ids = mf["Spectra IDs"]
+    precursor_mzs = mf["Spectra precursor m/z"]
+    spectra_count = len(spectra_ids)
+
+    # Create spectra tooltip without GNPS ID column
+    spectra_tooltip_markdown = "| Spectrum ID | Precursor m/z |\n|------------|-------------|\n"
+
+    # Add top entries limited to max_tooltip_entries
+    for i in range(min(max_tooltip_entries, spectra_count)):
+        spec_id = spectra_ids[i]
+        precursor_mz = precursor_mzs[i]
+        spectra_tooltip_markdown += f"| {spec_id} | {precursor_mz:.4f} |\n"
+
+    # Add indication of more entries if applicable
+    if spectra_count > max_tooltip_entries:
+        remaining = spectra_count - max_tooltip_entries
+        spectra_tooltip_markdown += f"\n... {remaining} more entries ..."
+
+    # Limit strains entries in tooltip with 'more entries' indicator
+    strains = mf["strains"]
+    strains_count = len(strains)
+    max_strains_entries = 10
+
+    strains_markdown = "| Strains |\n|----------|\n"
+    # Add top entries limited to max_strains_entries
+    for i in range(min(max_strains_entries, strains_count)):
+        strains_markdown += f"| {strains[i]} |\n"
+
+    # Add indication of more entries if applicable
+    if strains_count > max_strains_entries:
+        remaining = strains_count - max_strains_entries
+        strains_markdown += f"\n... {remaining} more entries ..."
+
+    return {
+        "# Spectra": {"value": spectra_tooltip_markdown, "type": "markdown"},
+        "MF ID": {"value": strains_markdown, "type": "markdown"},
+    }
 
 
 @app.callback(
@@ -1337,12 +1976,26 @@ def mg_filter_apply(
     Output("mg-table", "selected_rows", allow_duplicate=True),
     Output("mg-table-select-all-checkbox", "value"),
     Output("loading-spinner-container", "children", allow_duplicate=True),
+    Output("mg-table", "page_count"),
+    Output("mg-table", "page_current"),
+    Output("mg-table-view-store", "data"),
+    Output("mg-table-selected-store", "data", allow_duplicate=True),
     Input("processed-data-store", "data"),
     Input("mg-filter-apply-button", "n_clicks"),
     State({"type": "mg-filter-dropdown-menu", "index": ALL}, "value"),
     State({"type": "mg-filter-dropdown-mf-ids-text-input", "index": ALL}, "value"),
     State({"type": "mg-filter-dropdown-spec-ids-text-input", "index": ALL}, "value"),
     State("mg-table-select-all-checkbox", "value"),
+    Input("mg-table", "page_current"),
+    Input("mg-table", "page_size"),
+    Input("mg-table", "sort_by"),
+    State("mg-table-view-store", "data"),
+    State("mg-table-selected-store", "data"),
+    State({"type": "mg-filter-operator", "index": ALL}, "value"),
+    State({"type": "mg-filter-dropdown-mz-text-input", "index": ALL}, "value"),
+    State({"type": "mg-filter-mz-tolerance-input", "index": ALL}, "value"),
+    State({"type": "mg-filter-mz-unit-dropdown", "index": ALL}, "value"),
+    Input("mg-table", "filter_query"),
     prevent_initial_call=True,
 )
 def mg_table_update_datatable(
@@ -1352,173 +2005,144 @@ def mg_table_update_datatable(
     mf_text_inputs: list[str],
     spec_text_inputs: list[str],
     checkbox_value: list | None,
-) -> tuple[list[dict], list[dict], list[dict], dict, list, list, str | None]:
-    """Update the DataTable based on processed data and applied filters when the button is clicked.
+    page_current: int | None = 0,
+    page_size: int | None = 10,
+    sort_by: list[dict[str, str]] | None = None,
+    view_data: dict[str, Any] | None = None,
+    selection: dict[str, Any] | None = None,
+    operators: list[str] | None = None,
+    mz_text_inputs: list[str] | None = None,
+    mz_tolerances: list[float | str | None] | None = None,
+    mz_units: list[str] | None = None,
+    filter_query: str | None = None,
+) -> tuple:
+    """Update the visible page of the DataTable based on processed data, applied filters and sorting.
+
+    Filters are applied when the button is clicked, and the matching rows are kept server-side.
+    The filter row of the table further restricts these rows by the displayed values. Paging and
+    sorting the table only gathers the requested page of these rows.
 
     Args:
-        processed_data: JSON string of processed data.
+        processed_data: Dataset token of the processed data.
         n_clicks: Number of times the Apply Filters button has been clicked.
         dropdown_menus: List of selected dropdown menu options.
         mf_text_inputs: List of text inputs for MF IDs.
         spec_text_inputs: List of text inputs for Spectrum IDs.
         checkbox_value: Current value of the select-all checkbox.
+        page_current: Index of the requested page.
+        page_size: Number of rows per page.
+        sort_by: Sorted columns of the table.
+        view_data: Token, filter spec and filter query of the filtered table rows.
+        selection: The selection handle of the table.
+        operators: List of operators in front of the filter blocks after the first.
+        mz_text_inputs: List of text inputs for target precursor m/z values.
+        mz_tolerances: List of m/z tolerances around the targets, the default tolerance of
+            the unit if empty.
+        mz_units: List of units of the m/z tolerances.
+        filter_query: Filter query of the filter row of the table.
 
     Returns:
-        Tuple containing table data, column definitions, tooltips data, style, empty selected rows, and updated checkbox value.
+        Tuple containing page data, column definitions, tooltips data, style, selected rows of
+        the page, updated checkbox value, spinner state, page count, page index, view store data and
+        the selected rows on all pages.
     """
-    if processed_data is None:
-        return [], [], [], {"display": "none"}, [], [], None
-
-    try:
-        data = json.loads(processed_data)
-        df = pd.DataFrame(data["mf_data"])
-    except (json.JSONDecodeError, KeyError, pd.errors.EmptyDataError):
-        return [], [], [], {"display": "none"}, [], [], None
+    dataset = get_dataset(processed_data)
+    if processed_data is None or dataset is None:
+        return [], [], [], {"display": "none"}, [], [], None, 0, 0, None, table_selection(None)
 
+    filter_spec: dict | None = None
     if ctx.triggered_id == "mg-filter-apply-button":
         # Apply filters only when the button is clicked
-        filtered_df = mg_filter_apply(df, dropdown_menus, mf_text_inputs, spec_text_inputs)
-        # Reset the checkbox when filters are applied
-        new_checkbox_value = []
-    else:
-        # On initial load or when processed data changes, show all data
-        filtered_df = df
-        new_checkbox_value = checkbox_value if checkbox_value is not None else []
-
-    # Prepare tooltip data
-    tooltip_data = []
-    for _, row in filtered_df.iterrows():
-        # Limit spectra entries in tooltip with 'more entries' indicator
-        max_tooltip_entries = 10
-        spectra_count = len(row["Spectra IDs"])
-
-        # Create spectra tooltip without GNPS ID column
-        spectra_tooltip_markdown = "| Spectrum ID | Precursor m/z |\n|------------|-------------|\n"
-
-        # Add top entries limited to max_tooltip_entries
-        for i in range(min(max_tooltip_entries, spectra_count)):
-            spec_id = row["Spectra IDs"][i]
-            precursor_mz = row["Spectra precursor m/z"][i]
-            spectra_tooltip_markdown += f"| {spec_id} | {precursor_mz:.4f} |\n"
-
-        # Add indication of more entries if applicable
-        if spectra_count > max_tooltip_entries:
-            remaining = spectra_count - max_tooltip_entries
-            spectra_tooltip_markdown += f"\n... {remaining} more entries ..."
-
-        # Limit strains entries in tooltip with 'more entries' indicator
-        strains = row["strains"]
-        strains_count = len(strains)
-        max_strains_entries = 10
-
-        strains_markdown = "| Strains |\n|----------|\n"
-        # Add top entries limited to max_strains_entries
-        for i in range(min(max_strains_entries, strains_count)):
-            strains_markdown += f"| {strains[i]} |\n"
-
-        # Add indication of more entries if applicable
-        if strains_count > max_strains_entries:
-            remaining = strains_count - max_strains_entries
-            strains_markdown += f"\n... {remaining} more entries ..."
-
-        tooltip_data.append(
-            {
-                "# Spectra": {"value": spectra_tooltip_markdown, "type": "markdown"},
-                "MF ID": {"value": strains_markdown, "type": "markdown"},
-            }
-        )
+        filter_spec = {
+            "dropdown_menus": dropdown_menus,
+            "mf_text_inputs": mf_text_inputs,
+            "spec_text_inputs": spec_text_inputs,
+            "operators": operators,
+            "mz_text_inputs": mz_text_inputs,
+            "mz_tolerances": mz_tolerances,
+            "mz_units": mz_units,
+        }
 
-    # Prepare the data for display
-    filtered_df["Spectra GNPS IDs"] = filtered_df["Spectra GNPS IDs"].apply(
-        lambda x: ", ".join({str(gnps_id) for gnps_id in x if gnps_id}) if x else "None"
-    )
-    filtered_df["Display Spectra GNPS IDs"] = filtered_df["Spectra GNPS IDs"].apply(
-        lambda x: ", ".join({str(gnps_id) for gnps_id in x if gnps_id and str(gnps_id) != "None"})
-        or "None"
+    view, view_data, new_view = table_view(
+        dataset, processed_data, view_data, "mfs", filter_spec, filter_query
     )
+    if new_view:
+        # The selection refers to the previous rows, start over from the first page
+        selection, page_current = table_selection(view_data["token"], n_rows=len(view.rows)), 0
 
-    filtered_df["Spectra IDs"] = filtered_df["Spectra IDs"].apply(lambda x: ", ".join(map(str, x)))
-
-    # Calculate average precursor m/z and display
-    filtered_df["Spectra precursor m/z"] = filtered_df["Spectra precursor m/z"].apply(
-        lambda x: ", ".join([str(round(val, 4)) for val in x]) if x else "N/A"
+    rows, data, selected_rows, page_count, page_current = table_page(
+        dataset, view, page_current, page_size, sort_by, selection
     )
-    filtered_df["strains"] = filtered_df["strains"].apply(", ".join)
 
     columns = [
         {"name": "MF ID", "id": "MF ID"},
         {"name": "# Spectra", "id": "# Spectra", "type": "numeric"},
-        {"name": "Spectra GNPS IDs", "id": "Display Spectra GNPS IDs"},
+        {"name": "Spectra GNPS IDs", "id": "Spectra GNPS IDs"},
     ]
 
     return (
-        filtered_df.to_dict("records"),
+        data,
         columns,
-        tooltip_data,
+        [table_row_tooltip(processed_data, "mfs", row) for row in rows.tolist()],
         {"display": "block"},
-        [],
-        new_checkbox_value,
+        selected_rows,
+        # Only reset the checkbox for new rows: an unchanged value would still trigger the
+        # select-all toggle, which would clear the rows selected on other pages
+        [] if new_view else dash.no_update,
         None,
+        page_count,
+        page_current,
+        view_data,
+        selection if new_view else dash.no_update,
     )
 
 
-@app.callback(
+# Toggle between selecting all rows and deselecting all rows in the MG DataTable
+app.clientside_callback(
+    ClientsideFunction(namespace="nplinker", function_name="toggle_selection"),
+    Output("mg-table-selected-store", "data", allow_duplicate=True),
     Output("mg-table", "selected_rows", allow_duplicate=True),
     Input("mg-table-select-all-checkbox", "value"),
+    State("mg-table-selected-store", "data"),
     State("mg-table", "data"),
-    State("mg-table", "derived_virtual_data"),
     prevent_initial_call=True,
 )
-def mg_table_toggle_selection(
-    value: list | None,
-    original_rows: list,
-    filtered_rows: list | None,
-) -> list:
-    """Toggle between selecting all rows and deselecting all rows in the MG DataTable.
-
-    Calls the common table_toggle_selection function.
-
-    Args:
-        value: Value of the select-all checkbox.
-        original_rows: All rows in the table.
-        filtered_rows: Rows visible after filtering, or None if no filter is applied.
-
-    Returns:
-        List of indices of selected rows after toggling.
-    """
-    return table_toggle_selection(value, original_rows, filtered_rows)
 
 
 @app.callback(
-    Output("mg-table-output1", "children"),
-    Output("mg-table-output2", "children"),
-    Input("mg-table", "derived_virtual_data"),
-    Input("mg-table", "derived_virtual_selected_rows"),
+    Output("mg-table-selected-store", "data", allow_duplicate=True),
+    Input("mg-table", "selected_row_ids"),
+    State("mg-table", "data"),
+    State("mg-table-selected-store", "data"),
+    prevent_initial_call=True,
 )
-def mg_table_select_rows(
-    rows: list[dict[str, Any]], selected_rows: list[int] | None
-) -> tuple[str, str]:
-    """Display the total number of rows and the number of selected rows in the table.
+def mg_table_update_selection(
+    selected_row_ids: list[int] | None,
+    page_data: list[dict] | None,
+    selection: dict[str, Any] | None,
+) -> dict[str, Any]:
+    """Keep the rows selected on the visible page of the MG DataTable.
+
+    Calls the common table_update_selection function.
 
     Args:
-        rows: List of row data from the DataTable.
-        selected_rows: Indices of selected rows.
+        selected_row_ids: Selected rows of the visible page.
+        page_data: Records of the visible page.
+        selection: The selection handle so far.
 
     Returns:
-        Strings describing total rows and selected rows.
+        The selected rows on all pages.
     """
-    if not rows:
-        return "No data available.", "No rows selected."
-
-    df = pd.DataFrame(rows)
+    return table_update_selection(selected_row_ids, page_data, selection)
 
-    if selected_rows is None:
-        selected_rows = []
 
-    output1 = f"Total rows: {len(df)}"
-    output2 = f"Selected rows: {len(selected_rows)}\n"
-
-    return output1, output2
+# Display the number of rows matching the filters and the number of selected rows
+app.clientside_callback(
+    ClientsideFunction(namespace="nplinker", function_name="select_rows"),
+    Output("mg-table-output1", "children"),
+    Output("mg-table-output2", "children"),
+    Input("mg-table-selected-store", "data"),
+)
 
 
 # ------------------ Common Scoring functions ------------------ #
@@ -1592,26 +2216,6 @@ def scoring_create_initial_block(block_id: str, tab_prefix: str = "gm") -> dmc.G
     )
 
 
-def scoring_add_block(n_clicks: list[int], blocks_id: list[str]) -> list[str]:
-    """Add a new block to the scoring layout when the add button is clicked.
-
-    Generic function to handle both GM and MG scoring block additions.
-
-    Args:
-        n_clicks: List of number of clicks for each add button.
-        blocks_id: Current list of block IDs.
-
-    Returns:
-        Updated list of block IDs.
-    """
-    if not any(n_clicks):
-        raise dash.exceptions.PreventUpdate
-    # Create a unique ID for the new block
-    new_block_id = str(uuid.uuid4())
-    blocks_id.append(new_block_id)
-    return blocks_id
-
-
 def scoring_display_blocks(
     blocks_id: list[str], existing_blocks: list[dmc.Grid], tab_prefix: str = "gm"
 ) -> list[dmc.Grid]:
@@ -1712,7 +2316,7 @@ def scoring_display_blocks(
             style={"marginTop": "30px"},
         )
 
-        # Hide the add button and OR label on the previous last block
+        # Hide the add button on the previous last block, its operator stays visible
         if len(existing_blocks) == 1:
             existing_blocks[-1]["props"]["children"][2]["props"]["children"]["props"]["style"] = {
                 "display": "none"
@@ -1750,52 +2354,108 @@ def scoring_update_placeholder(
 
 
 def scoring_apply(
-    df: pd.DataFrame, dropdown_menus: list[str], radiobuttons: list[str], cutoffs_met: list[str]
-) -> pd.DataFrame:
-    """Apply scoring filters to the DataFrame based on user inputs.
+    links: LinkTable,
+    rows: np.ndarray,
+    dropdown_menus: list[str],
+    radiobuttons: list[str],
+    cutoffs_met: list[str],
+) -> np.ndarray:
+    """Apply scoring filters to the link scores based on user inputs.
+
+    Each filter block selects the scores of one method, raw or standardised, with a cutoff of at
+    least the given value. This is a contiguous slice of the precomputed, cutoff-sorted
+    partitions of the link table, so checking a score only compares its rank in the partition.
+    A score is kept if it matches any of the filter blocks.
 
     Args:
-        df: The input DataFrame.
+        links: The link table.
+        rows: Score rows to filter.
         dropdown_menus: List of selected dropdown menu options.
         radiobuttons: List of selected radio button options.
         cutoffs_met: List of cutoff values for METCALF method.
 
     Returns:
-        Filtered DataFrame.
+        The filtered score rows, in their original order.
     """
+    if not dropdown_menus:
+        return rows
+
+    ranks = links.partition_rank[rows]
+    mask = np.zeros(len(rows), dtype=bool)
     for menu, radiobutton, cutoff_met in zip(dropdown_menus, radiobuttons, cutoffs_met):
-        if menu == "METCALF":
-            masked_df = df[df["method"] == "metcalf"]
-            if radiobutton == "RAW":
-                masked_df = masked_df[~masked_df["standardised"]]
-            else:
-                masked_df = masked_df[masked_df["standardised"]]
+        start, end = links.cutoff_range(
+            menu.lower(),
+            standardised=radiobutton != "RAW",
+            cutoff=float(cutoff_met) if cutoff_met else None,
+        )
+        mask |= (ranks >= start) & (ranks < end)
+    return rows[mask]
 
-            if cutoff_met:
-                masked_df = masked_df[masked_df["cutoff"] >= float(cutoff_met)]
 
-        return masked_df
-    else:
-        return df
+def select_top_k(scores: np.ndarray, segment_bounds: np.ndarray, k: int) -> np.ndarray:
+    """Select the k highest scores of each segment of a score array.
 
+    Segments with more than k scores use a partial selection (`np.argpartition`), so large
+    segments are never fully sorted; only the selected scores are ordered.
 
-# ------------------ GM Scoring functions ------------------ #
-@app.callback(
-    Output("gm-scoring-blocks-id", "data"),
-    Input({"type": "gm-scoring-add-button", "index": ALL}, "n_clicks"),
-    State("gm-scoring-blocks-id", "data"),
-)
-def gm_scoring_add_block(n_clicks: list[int], blocks_id: list[str]) -> list[str]:
-    """Add a new block to the GM scoring layout when the add button is clicked.
+    Args:
+        scores: The scores, grouped in contiguous segments.
+        segment_bounds: Start of each segment, followed by the total number of scores.
+        k: Maximum number of scores to select per segment.
+
+    Returns:
+        Indices of the selected scores, grouped by segment and sorted by descending score.
+    """
+    counts = np.diff(segment_bounds)
+    segment_ids = np.repeat(np.arange(len(counts)), counts)
+    keep = np.ones(len(scores), dtype=bool)
+    for segment in np.flatnonzero(counts > k):
+        start, end = segment_bounds[segment], segment_bounds[segment + 1]
+        best = np.argpartition(-scores[start:end], k - 1)[:k]
+        keep[start:end] = False
+        keep[start + best] = True
+    selected = np.flatnonzero(keep)
+    return selected[np.lexsort((-scores[selected], segment_ids[selected]))]
+
+
+def segment_order_selected_first(
+    segment_bounds: np.ndarray, selected: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    """Order the indices of each segment with the selected ones first, without sorting.
 
     Args:
-        n_clicks: List of number of clicks for each add button.
-        blocks_id: Current list of block IDs.
+        segment_bounds: Start of each segment, followed by the total number of indices.
+        selected: Selected indices, grouped by segment, in the order to keep.
 
     Returns:
-        Updated list of block IDs.
+        All indices, grouped by segment, the selected indices of each segment first and the
+        others after them in index order, and the number of selected indices per segment.
     """
-    return scoring_add_block(n_clicks, blocks_id)
+    counts = np.diff(segment_bounds)
+    segment_ids = np.repeat(np.arange(len(counts)), counts)
+    is_selected = np.zeros(len(segment_ids), dtype=bool)
+    is_selected[selected] = True
+    others = np.flatnonzero(~is_selected)
+
+    n_selected = np.bincount(segment_ids[selected], minlength=len(counts))
+    order = np.empty(len(segment_ids), dtype=np.int64)
+    for indices, heads in ((selected, np.zeros_like(n_selected)), (others, n_selected)):
+        groups = segment_ids[indices]
+        n_group = np.bincount(groups, minlength=len(counts))
+        # Rank of each index within its segment, placed after the heads of the segment
+        ranks = np.arange(len(indices)) - (np.cumsum(n_group) - n_group)[groups]
+        order[segment_bounds[groups] + heads[groups] + ranks] = indices
+    return order, n_selected
+
+
+# ------------------ GM Scoring functions ------------------ #
+# Add a new block to the GM scoring layout when the add button is clicked
+app.clientside_callback(
+    ClientsideFunction(namespace="nplinker", function_name="add_block"),
+    Output("gm-scoring-blocks-id", "data"),
+    Input({"type": "gm-scoring-add-button", "index": ALL}, "n_clicks"),
+    State("gm-scoring-blocks-id", "data"),
+)
 
 
 @app.callback(
@@ -1839,22 +2499,13 @@ def gm_scoring_update_placeholder(
 
 
 # ------------------ MG Scoring functions ------------------ #
-@app.callback(
+# Add a new block to the MG scoring layout when the add button is clicked
+app.clientside_callback(
+    ClientsideFunction(namespace="nplinker", function_name="add_block"),
     Output("mg-scoring-blocks-id", "data"),
     Input({"type": "mg-scoring-add-button", "index": ALL}, "n_clicks"),
     State("mg-scoring-blocks-id", "data"),
 )
-def mg_scoring_add_block(n_clicks: list[int], blocks_id: list[str]) -> list[str]:
-    """Add a new block to the MG scoring layout when the add button is clicked.
-
-    Args:
-        n_clicks: List of number of clicks for each add button.
-        blocks_id: Current list of block IDs.
-
-    Returns:
-        Updated list of block IDs.
-    """
-    return scoring_add_block(n_clicks, blocks_id)
 
 
 @app.callback(
@@ -1898,44 +2549,173 @@ def mg_scoring_update_placeholder(
 
 
 # ------------------ Common Results Table Functions ------------------
+def results_candidate_links(
+    dataset: Dataset,
+    dataset_token: str,
+    prefix: str,
+    sources: np.ndarray,
+    dropdown_menus: list[str],
+    radiobuttons: list[str],
+    cutoffs_met: list,
+    top_k_selection: str | None,
+) -> tuple[CandidateLinks, np.ndarray]:
+    """Score the links of the selected items and gather their candidate links.
+
+    Generic function to handle both GM and MG results. The candidate links only depend on the
+    dataset, the selected items and the scoring parameters, so they can be rebuilt from these.
+
+    Args:
+        dataset: The processed dataset.
+        dataset_token: Dataset token of the processed data.
+        prefix: Tab prefix ('gm' or 'mg').
+        sources: Selected rows of the GCF (GM tab) or MF (MG tab) table.
+        dropdown_menus: List of selected dropdown menu options.
+        radiobuttons: List of selected radio button options.
+        cutoffs_met: List of cutoff values for METCALF method.
+        top_k_selection: Number of candidates to list per item, or "best" to list the
+            candidates tying for the highest score.
+
+    Returns:
+        The candidate links of the items, ordered by item ID, and the positions of the listed
+        candidates in their rows, grouped by item and sorted by descending score.
+    """
+    link_table = dataset.gm_links if prefix == "gm" else dataset.mg_links
+    entities = dataset.gcfs if prefix == "gm" else dataset.mfs
+    source_ids = entities["GCF ID" if prefix == "gm" else "MF ID"].to_numpy()
+    if link_table is None:
+        raise ValueError("No processed links available.")
+
+    sources = sources[(sources >= 0) & (sources < len(entities))]
+
+    # Visit the items in the order of their IDs, so results are sorted by ID
+    sources = sources[np.argsort(source_ids[sources], kind="stable")]
+
+    # Gather only the links of the selected items and apply the scoring filters
+    rows = scoring_apply(
+        link_table,
+        link_table.score_rows(sources),
+        dropdown_menus,
+        radiobuttons,
+        cutoffs_met,
+    )
+    if len(rows) == 0:
+        candidates = CandidateLinks(
+            dataset_token=dataset_token,
+            prefix=prefix,
+            item_ids=source_ids[:0],
+            rows=rows,
+            bounds=np.zeros(1, dtype=np.int64),
+        )
+        return candidates, rows
+
+    # The rows are grouped by item, split them into one segment per item
+    row_sources = link_table.source[link_table.link[rows]]
+    row_scores = link_table.score[rows]
+    segment_starts = np.flatnonzero(np.r_[True, row_sources[1:] != row_sources[:-1]])
+    segment_bounds = np.r_[segment_starts, len(rows)]
+    segment_ids = np.repeat(np.arange(len(segment_starts)), np.diff(segment_bounds))
+
+    # All candidates of each item are kept for the tooltips and the download, the segments
+    # keep their bounds
+    if top_k_selection is None or top_k_selection == "best":
+        # Sort the rows by descending score within their segment, and list the rows tying
+        # for the highest score of their segment
+        order = np.lexsort((-row_scores, segment_ids))
+        highest_scores = np.maximum.reduceat(row_scores, segment_starts)
+        listed = np.flatnonzero(row_scores[order] == highest_scores[segment_ids[order]])
+        n_sorted = None
+    else:
+        # List the k best rows of each segment, selected without sorting whole segments. The
+        # other candidates follow them unsorted
+        top_items = select_top_k(row_scores, segment_bounds, int(top_k_selection))
+        order, n_sorted = segment_order_selected_first(segment_bounds, top_items)
+        # The selected rows lead their segment, in the order of the selection
+        positions = np.arange(len(rows)) - segment_bounds[segment_ids]
+        listed = np.flatnonzero(positions < n_sorted[segment_ids])
+
+    candidates = CandidateLinks(
+        dataset_token=dataset_token,
+        prefix=prefix,
+        item_ids=source_ids[row_sources[segment_starts]],
+        rows=rows[order],
+        bounds=segment_bounds,
+        n_sorted=n_sorted,
+    )
+    return candidates, listed
+
+
+def results_restore_candidates(results_data: dict[str, Any] | None) -> CandidateLinks | None:
+    """Return the candidate links of a results table, rebuilding them if not held in memory.
+
+    Candidate links are registered per process, so candidate links evicted from memory, or
+    gathered by another worker, are rebuilt from the selection and scoring parameters kept in
+    the detailed data store, under the same token.
+
+    Args:
+        results_data: Data of the detailed data store of a results table.
+
+    Returns:
+        The candidate links, or None if there are no results or their dataset or selected rows
+        are no longer available.
+    """
+    if not results_data:
+        return None
+    candidates: CandidateLinks | None = RESULTS_REGISTRY.get(results_data["token"])
+    if candidates is not None:
+        return candidates
+    dataset = get_dataset(results_data["dataset"])
+    sources = table_selected_rows(results_data["selection"], results_data["view"])
+    if dataset is None or sources is None:
+        return None
+    candidates, _ = results_candidate_links(
+        dataset,
+        results_data["dataset"],
+        results_data["prefix"],
+        sources,
+        **results_data["scoring"],
+    )
+    RESULTS_REGISTRY.register(candidates, token=results_data["token"], nbytes=candidates.nbytes)
+    return candidates
+
+
 def update_results_datatable(
     n_clicks,
-    virtual_data,
-    selected_rows,
+    selection,
     processed_links,
     dropdown_menus,
     radiobuttons,
     cutoffs_met,
+    top_k_selection,
     prefix,
     item_type,
+    view_data=None,
 ):
     """Common function for updating results DataTable based on scoring filters.
 
     Args:
         n_clicks: Number of times the "Show Results" button has been clicked.
-        virtual_data: Current filtered data from the table.
-        selected_rows: Indices of selected rows in the table.
-        processed_links: JSON string of processed links data.
+        selection: The selection handle of the items in the data table.
+        processed_links: Dataset token of the processed links data.
         dropdown_menus: List of selected dropdown menu options.
         radiobuttons: List of selected radio button options.
         cutoffs_met: List of cutoff values for METCALF method.
+        top_k_selection: Number of candidates to show per item, or "best" to show the
+            candidates tying for the highest score.
         prefix: Tab prefix ('gm' or 'mg').
         item_type: Type of item being processed ('GCF' or 'MF').
+        view_data: Token and filter spec of the filtered rows of the data table.
 
     Returns:
-        Tuple containing alert message, visibility state, table data and settings, header style, and spinner state.
+        Tuple containing alert message, visibility state, table data and settings, header style, spinner state, and the detailed data store data.
     """
-    triggered_id = ctx.triggered_id
-
-    if triggered_id in [f"{prefix}-table-select-all-checkbox", f"{prefix}-table"]:
-        return "", False, [], [], {"display": "none"}, {"color": "#888888"}, True, None, {}
-
     if n_clicks is None:
         return "", False, [], [], {"display": "none"}, {"color": "#888888"}, True, None, {}
 
-    if not selected_rows:
+    # All rows matching the filters are resolved from the filtered rows kept server-side
+    sources = table_selected_rows(selection, view_data)
+    if sources is None:
         return (
-            f"No {item_type}s selected. Please select {item_type}s and try again.",
+            "The selected rows are no longer available. Please apply the filters again.",
             True,
             [],
             [],
@@ -1943,12 +2723,12 @@ def update_results_datatable(
             {"color": "#888888"},
             True,
             None,
-            {},
+            None,
         )
 
-    if not virtual_data:
+    if len(sources) == 0:
         return (
-            "No data available.",
+            f"No {item_type}s selected. Please select {item_type}s and try again.",
             True,
             [],
             [],
@@ -1956,12 +2736,25 @@ def update_results_datatable(
             {"color": "#888888"},
             True,
             None,
-            {},
+            None,
         )
 
     try:
-        links_data = json.loads(processed_links)
-        if len(links_data) == 0:
+        dataset = get_dataset(processed_links)
+        if dataset is None:
+            return (
+                "Processed data is no longer available. Please upload the file again.",
+                True,
+                [],
+                [],
+                {"display": "none"},
+                {"color": "#888888"},
+                True,
+                None,
+                None,
+            )
+        link_table = dataset.gm_links if prefix == "gm" else dataset.mg_links
+        if link_table is None:
             return (
                 "No processed links available.",
                 True,
@@ -1971,56 +2764,21 @@ def update_results_datatable(
                 {"color": "#888888"},
                 True,
                 None,
-                {},
+                None,
             )
 
-        links_data = links_data[f"{prefix}_data"]
-
-        # Process specific to GM or MG data
-        if prefix == "gm":
-            # Get selected GCF IDs and their corresponding data
-            selected_items = {
-                row["GCF ID"]: {
-                    "MiBIG IDs": row["MiBIG IDs"],
-                    "BGC Classes": row["BGC Classes"],
-                }
-                for i, row in enumerate(virtual_data)
-                if i in selected_rows
-            }
-            id_field = "gcf_id"
-            item_field = "spectrum"
-            score_field = "score"
-        else:  # MG
-            # Get selected MF IDs
-            selected_items = {
-                row["MF ID"]: {
-                    "Spectra IDs": row["Spectra IDs"].split(", ")
-                    if isinstance(row["Spectra IDs"], str)
-                    else [],
-                    "Spectra GNPS IDs": row["Spectra GNPS IDs"].split(", ")
-                    if isinstance(row["Spectra GNPS IDs"], str)
-                    else [],
-                    "Spectra precursor m/z": row["Spectra precursor m/z"].split(", ")
-                    if isinstance(row["Spectra precursor m/z"], str)
-                    else [],
-                }
-                for i, row in enumerate(virtual_data)
-                if i in selected_rows
-            }
-            id_field = "mf_id"
-            item_field = "gcf"
-            score_field = "score"
-
-        # Convert links data to DataFrame
-        links_df = pd.DataFrame(links_data)
-
-        # Apply scoring filters
-        filtered_df = scoring_apply(links_df, dropdown_menus, radiobuttons, cutoffs_met)
-
-        # Filter once for all selected items
-        filtered_df = filtered_df[filtered_df[id_field].isin(selected_items.keys())]
+        scoring = {
+            "dropdown_menus": dropdown_menus,
+            "radiobuttons": radiobuttons,
+            "cutoffs_met": cutoffs_met,
+            "top_k_selection": top_k_selection,
+        }
+        candidates, top_items = results_candidate_links(
+            dataset, processed_links, prefix, sources, **scoring
+        )
+        rows = candidates.rows
 
-        if filtered_df.empty:
+        if len(rows) == 0:
             return (
                 f"No matching links found for selected {item_type}s.",
                 True,
@@ -2030,204 +2788,174 @@ def update_results_datatable(
                 {"color": "#888888"},
                 True,
                 None,
-                {},
+                None,
             )
 
-        # Prepare for results using vectorized operations
-        results = []
-        detailed_data = {}  # Only store additional data needed for Excel export
-
-        # Group by the ID field
-        for item_id, group in filtered_df.groupby(id_field):
-            # Sort by score in descending order
-            group = group.sort_values(score_field, ascending=False)
-
-            # Calculate aggregate values once per group
-            avg_score = round(group[score_field].mean(), 2)
-            n_links = len(group)
-
-            # Get the highest score
-            highest_score = group[score_field].max()
+        # Keep the candidate links server-side. The detailed data store holds their token, along
+        # with what they were gathered from, so that any worker can rebuild them
+        results_data = {
+            "token": RESULTS_REGISTRY.register(candidates, nbytes=candidates.nbytes),
+            "dataset": processed_links,
+            "prefix": prefix,
+            "selection": selection,
+            "view": view_data,
+            "scoring": scoring,
+        }
 
-            # Get all items with the highest score - as a DataFrame
-            top_items = group[group[score_field] == highest_score]
+        # Process specific to GM or MG data
+        targets = dataset.spectra if prefix == "gm" else dataset.gcfs
+
+        # The rows are grouped by item, in one segment per item
+        row_sources = link_table.source[link_table.link[rows]]
+        row_targets = link_table.target[link_table.link[rows]]
+        row_scores = link_table.score[rows]
+        segment_bounds = candidates.bounds
+        segment_starts = segment_bounds[:-1]
+        n_links = np.diff(segment_bounds)
+        segment_ids = np.repeat(np.arange(len(segment_starts)), n_links)
+        item_ids = candidates.item_ids
+
+        # Aggregate all segments at once
+        avg_scores = np.round(np.add.reduceat(row_scores, segment_starts) / n_links, 2)
+
+        # Compare the strains of the item and the target of the listed links only
+        if prefix == "gm":
+            strain_tables = ("gcfs", "spectra")
+        else:
+            strain_tables = ("mfs", "gcfs")
+        shared_strains, *only_strains = dataset.strain_overlap(
+            strain_tables[0], row_sources[top_items], strain_tables[1], row_targets[top_items]
+        )
+        n_shared = count(shared_strains)
+        n_only_item, n_only_target = (count(strains) for strains in only_strains)
 
-            # Process all top items at once using vectorized operations
-            if prefix == "gm":
-                # Convert to dictionary format for faster processing
-                top_items_dict = top_items.to_dict("records")
+        results = []
 
-                # Only create the extra data field once per GCF ID
-                detailed_data[str(item_id)] = {
-                    "spectrum_ids_str": "|".join([str(s.get("id", "")) for s in group[item_field]]),
-                    "spectrum_mf_ids_str": "|".join(
-                        [str(s.get("mf_id", "None")) for s in group[item_field]]
-                    ),
-                    "spectrum_scores_str": "|".join(
-                        [str(score) for score in group[score_field].tolist()]
-                    ),
-                    "spectrum_mz_str": "|".join(
-                        [str(s.get("precursor_mz", "None")) for s in group[item_field]]
-                    ),
-                    "spectrum_gnps_id_str": "|".join(
-                        [str(s.get("gnps_id", "None")) for s in group[item_field]]
-                    ),
+        if prefix == "gm":
+            spectrum_ids = targets["Spectrum ID"].to_numpy()
+            mf_ids = targets["MF ID"].to_numpy()
+            precursor_mzs = targets["Precursor m/z"].to_numpy()
+            gnps_ids = targets["GNPS ID"].to_numpy()
+            items = dataset.table_frame("gcfs", row_sources[segment_starts])
+            mibig_ids = items["MiBIG IDs"].to_numpy()
+            bgc_classes = items["BGC Classes"].to_numpy()
+
+            # Create results for each top item
+            for i, row in enumerate(top_items):
+                item_id = item_ids[segment_ids[row]]
+                target = row_targets[row]
+                score = row_scores[row]
+                result = {
+                    # Mandatory fields
+                    "GCF ID": int(item_id) if pd.notna(item_id) else float("nan"),
+                    "# Links": int(n_links[segment_ids[row]]),
+                    "Average Score": avg_scores[segment_ids[row]],
+                    # Optional fields
+                    "Top Spectrum ID": int(spectrum_ids[target])
+                    if pd.notna(spectrum_ids[target])
+                    else float("nan"),
+                    "Top Spectrum MF ID": int(mf_ids[target])
+                    if pd.notna(mf_ids[target])
+                    else float("nan"),
+                    "Top Spectrum Precursor m/z": round(precursor_mzs[target], 4)
+                    if pd.notna(precursor_mzs[target])
+                    else float("nan"),
+                    "Top Spectrum GNPS ID": gnps_ids[target]
+                    if pd.notna(gnps_ids[target])
+                    else "None",
+                    "Top Spectrum Score": round(score, 4) if pd.notna(score) else float("nan"),
+                    "MiBIG IDs": mibig_ids[segment_ids[row]],
+                    "BGC Classes": bgc_classes[segment_ids[row]],
+                    "# Shared Strains": int(n_shared[i]),
+                    "# Strains Only in GCF": int(n_only_item[i]),
+                    "# Strains Only in Spectrum": int(n_only_target[i]),
                 }
-
-                # Create results for each top item
-                for top_item in top_items_dict:
-                    spectrum_data = top_item[item_field]
-                    result = {
-                        # Mandatory fields
-                        "GCF ID": int(item_id) if pd.notna(item_id) else float("nan"),  # type: ignore
-                        "# Links": n_links,
-                        "Average Score": avg_score,
-                        # Optional fields
-                        "Top Spectrum ID": int(spectrum_data.get("id", float("nan")))
-                        if spectrum_data.get("id") is not None
-                        else float("nan"),
-                        "Top Spectrum MF ID": int(spectrum_data.get("mf_id", float("nan")))
-                        if spectrum_data.get("mf_id") is not None
-                        else float("nan"),
-                        "Top Spectrum Precursor m/z": round(
-                            spectrum_data.get("precursor_mz", float("nan")), 4
-                        )
-                        if spectrum_data.get("precursor_mz") is not None
-                        else float("nan"),
-                        "Top Spectrum GNPS ID": spectrum_data.get("gnps_id", "None")
-                        if spectrum_data.get("gnps_id") is not None
-                        else "None",
-                        "Top Spectrum Score": round(top_item.get(score_field, float("nan")), 4)
-                        if top_item.get(score_field) is not None
-                        else float("nan"),
-                        "MiBIG IDs": selected_items[item_id]["MiBIG IDs"],
-                        "BGC Classes": selected_items[item_id]["BGC Classes"],
-                    }
-                    results.append(result)
-            else:  # MG
-                # Convert to dictionary format for faster processing
-                top_items_dict = top_items.to_dict("records")
-
-                # Only create the extra data field once per MF ID
-                detailed_data[str(item_id)] = {
-                    "gcf_ids_str": "|".join([str(gcf.get("id", "")) for gcf in group[item_field]]),
-                    "gcf_scores_str": "|".join(
-                        [str(score) for score in group[score_field].tolist()]
-                    ),
-                    "gcf_bgc_classes_str": "|".join(
-                        [
-                            ", ".join(
-                                {item for sublist in gcf.get("BGC Classes", []) for item in sublist}
-                            )
-                            for gcf in group[item_field]
-                        ]
-                    ),
-                    "gcf_bgc_ids_str": "|".join(
-                        [
-                            ", ".join([str(bgc_id) for bgc_id in gcf.get("BGC IDs", [])])
-                            for gcf in group[item_field]
-                        ]
-                    ),
-                    "gcf_num_bgcs_str": "|".join(
-                        [str(gcf.get("# BGCs", 0)) for gcf in group[item_field]]
-                    ),
+                results.append(result)
+        else:  # MG
+            gcf_ids = targets["GCF ID"].to_numpy()
+            gcf_n_bgcs = targets["# BGCs"].to_numpy()
+            gcf_bgc_ids = targets["BGC IDs"].to_numpy()
+            # The unique BGC classes of every GCF are formatted once, when the data is processed
+            gcf_bgc_classes = dataset.table_frame("gcfs")["BGC Classes"].to_numpy()
+
+            # Create results for each top item
+            for i, row in enumerate(top_items):
+                item_id = item_ids[segment_ids[row]]
+                target = row_targets[row]
+                result = {
+                    # Mandatory fields
+                    "MF ID": int(item_id) if pd.notna(item_id) else float("nan"),
+                    "# Links": int(n_links[segment_ids[row]]),
+                    "Average Score": avg_scores[segment_ids[row]],
+                    # Optional fields
+                    "Top GCF ID": int(gcf_ids[target])
+                    if pd.notna(gcf_ids[target])
+                    else float("nan"),
+                    "Top GCF # BGCs": int(gcf_n_bgcs[target]),
+                    "Top GCF BGC IDs": ", ".join([str(s) for s in gcf_bgc_ids[target]]),
+                    "Top GCF BGC Classes": gcf_bgc_classes[target],
+                    "Top GCF Score": round(row_scores[row], 4),
+                    "# Shared Strains": int(n_shared[i]),
+                    "# Strains Only in MF": int(n_only_item[i]),
+                    "# Strains Only in GCF": int(n_only_target[i]),
                 }
-
-                # Create results for each top item
-                for top_item in top_items_dict:
-                    gcf_data = top_item[item_field]
-                    result = {
-                        # Mandatory fields
-                        "MF ID": int(item_id) if pd.notna(item_id) else float("nan"),  # type: ignore
-                        "# Links": n_links,
-                        "Average Score": avg_score,
-                        # Optional fields
-                        "Top GCF ID": int(gcf_data.get("id", float("nan")))
-                        if gcf_data.get("id") is not None
-                        else float("nan"),
-                        "Top GCF # BGCs": gcf_data.get("# BGCs", 0),
-                        "Top GCF BGC IDs": ", ".join([str(s) for s in gcf_data.get("BGC IDs", [])]),
-                        "Top GCF BGC Classes": ", ".join(
-                            {
-                                item
-                                for sublist in gcf_data.get("BGC Classes", [])
-                                for item in sublist
-                            }
-                        ),
-                        "Top GCF Score": round(top_item.get(score_field, float("nan")), 4),
-                    }
-                    results.append(result)
+                results.append(result)
 
         tooltip_data = []
         # Only generate tooltips if we have a reasonable number of rows
         if len(results) > MAX_TOOLTIP_ROWS:
             alert_message = f"Tooltips disabled for performance (showing {len(results)} rows)."
         else:
-            # Prepare tooltip data
             alert_message = ""
-            for result in results:
-                if prefix == "gm":
-                    # Get the detailed data for this result
-                    detail = detailed_data.get(str(result["GCF ID"]), {})
-                    ids = (
-                        detail.get("spectrum_ids_str", "").split("|")
-                        if detail.get("spectrum_ids_str")
-                        else []
-                    )
-                    scores = (
-                        [float(s) for s in detail.get("spectrum_scores_str", "").split("|")]
-                        if detail.get("spectrum_scores_str")
-                        else []
-                    )
-                    mf_ids = (
-                        detail.get("spectrum_mf_ids_str", "").split("|")
-                        if detail.get("spectrum_mf_ids_str")
-                        else []
-                    )
-                else:  # MG
-                    # Get the detailed data for this result
-                    detail = detailed_data.get(str(result["MF ID"]), {})
-                    ids = (
-                        detail.get("gcf_ids_str", "").split("|")
-                        if detail.get("gcf_ids_str")
-                        else []
-                    )
-                    scores = (
-                        [float(s) for s in detail.get("gcf_scores_str", "").split("|")]
-                        if detail.get("gcf_scores_str")
-                        else []
-                    )
-
-                # Show only top 5 items in tooltip
-                max_tooltip_entries = 5
-                total_entries = len(ids)
-
-                if prefix == "gm":
-                    items_table = "| Spectrum ID | MF ID | Score |\n|--------|--------|--------|\n"
-
-                    # Add top entries for GM tab
-                    for idx in range(min(max_tooltip_entries, len(ids))):
-                        item_id = ids[idx] if idx < len(ids) else ""
-                        score = scores[idx] if idx < len(scores) else 0
-                        mf_id = mf_ids[idx] if idx < len(mf_ids) else ""
-                        items_table += f"| {item_id} | {mf_id} | {round(float(score), 4)} |\n"
-                else:
-                    items_table = "| GCF ID | Score |\n|--------|--------|\n"
-                    # Add top entries for MG tab
-                    for idx in range(min(max_tooltip_entries, len(ids))):
-                        item_id = ids[idx] if idx < len(ids) else ""
-                        score = scores[idx] if idx < len(scores) else 0
-                        items_table += f"| {item_id} | {round(float(score), 4)} |\n"
-
-                # Add indication of more entries if applicable
-                if total_entries > max_tooltip_entries:
-                    remaining = total_entries - max_tooltip_entries
-                    items_table += f"\n... {remaining} more entries ..."
-
-                row_tooltip = {
-                    "# Links": {"value": items_table, "type": "markdown"},
-                }
-                tooltip_data.append(row_tooltip)
+            # Show only top 5 items in tooltip
+            max_tooltip_entries = 5
+            segment_tooltips = {}
+            for i, row in enumerate(top_items):
+                segment = segment_ids[row]
+                if segment not in segment_tooltips:
+                    # The best candidates of the item, which are sorted by descending score
+                    start, end = segment_bounds[segment], segment_bounds[segment + 1]
+                    n_listed = min(candidates.sorted_count(segment), max_tooltip_entries)
+                    listed = candidates.rows[start : start + n_listed]
+                    listed_targets = link_table.target[link_table.link[listed]]
+                    listed_scores = link_table.score[listed]
+
+                    if prefix == "gm":
+                        items_table = (
+                            "| Spectrum ID | MF ID | Score |\n|--------|--------|--------|\n"
+                        )
+                        for target, score in zip(listed_targets, listed_scores):
+                            mf_id = mf_ids[target] if pd.notna(mf_ids[target]) else "None"
+                            items_table += (
+                                f"| {spectrum_ids[target]} | {mf_id} | {round(float(score), 4)} |\n"
+                            )
+                    else:
+                        items_table = "| GCF ID | Score |\n|--------|--------|\n"
+                        for target, score in zip(listed_targets, listed_scores):
+                            items_table += f"| {gcf_ids[target]} | {round(float(score), 4)} |\n"
+
+                    # Add indication of more entries if applicable
+                    remaining = end - start - n_listed
+                    if remaining > 0:
+                        items_table += f"\n... {remaining} more entries ..."
+
+                    segment_tooltips[segment] = {
+                        "# Links": {"value": items_table, "type": "markdown"},
+                    }
+                # List the shared strains of the link
+                strains = dataset.strain_names(shared_strains[i])
+                strains_table = "| Shared Strains |\n|----------|\n" + "".join(
+                    f"| {strain} |\n" for strain in strains[:max_tooltip_entries]
+                )
+                if len(strains) > max_tooltip_entries:
+                    remaining = len(strains) - max_tooltip_entries
+                    strains_table += f"\n... {remaining} more entries ..."
+                tooltip_data.append(
+                    {
+                        **segment_tooltips[segment],
+                        "# Shared Strains": {"value": strains_table, "type": "markdown"},
+                    }
+                )
 
         return (
             alert_message,
@@ -2238,7 +2966,7 @@ def update_results_datatable(
             {},
             False,
             None,
-            detailed_data,
+            results_data,
         )
 
     except Exception as e:
@@ -2251,28 +2979,10 @@ def update_results_datatable(
             {"color": "#888888"},
             True,
             None,
-            {},
+            None,
         )
 
 
-def toggle_column_settings_modal(n1, n2, is_open):
-    """Toggle the visibility of the column settings modal.
-
-    Generic function to handle both GM and MG column settings modal toggling.
-
-    Args:
-        n1: Number of clicks on the open button.
-        n2: Number of clicks on the close button.
-        is_open: Current state of the modal (open or closed).
-
-    Returns:
-        The new state of the modal (open or closed).
-    """
-    if n1 or n2:
-        return not is_open
-    return is_open
-
-
 def update_columns(
     selected_columns: list[str] | None,
     n_clicks: int | None,
@@ -2311,29 +3021,72 @@ def update_columns(
     return columns
 
 
-def toggle_download_button(table_data):
-    """Enable/disable download button based on data availability.
-
-    Generic function to handle both GM and MG download button toggling.
+def candidate_links_frame(
+    dataset: Dataset, candidates: CandidateLinks, item_ids: list[str]
+) -> pd.DataFrame:
+    """Gather the listed candidate links of the given items into a DataFrame.
 
     Args:
-        table_data: Current data in the results table.
+        dataset: The dataset the candidate links refer to.
+        candidates: The candidate links of a results table.
+        item_ids: IDs of the GCFs (GM tab) or MFs (MG tab) to include.
 
     Returns:
-        Tuple containing disabled state, alert visibility, and alert message.
+        One row per candidate link, grouped by item and sorted by descending score.
     """
-    if not table_data:
-        return True, False, ""
-    return False, False, ""
+    links = dataset.gm_links if candidates.prefix == "gm" else dataset.mg_links
+    if links is None:
+        return pd.DataFrame()
+
+    item_ids = [item_id for item_id in item_ids if item_id in candidates.positions]
+    item_ids.sort(key=candidates.positions.__getitem__)
+    # Only the best candidates of each item may be sorted, sort all of them for the download
+    item_rows = [candidates.item_rows(item_id) for item_id in item_ids]
+    item_rows = [r[np.argsort(-links.score[r], kind="stable")] for r in item_rows]
+    rows = np.concatenate(item_rows) if item_rows else candidates.rows[:0]
+    primary_ids = pd.to_numeric(
+        pd.Series(np.repeat(item_ids, [len(r) for r in item_rows]), dtype=object),
+        errors="coerce",
+    )
+
+    if candidates.prefix == "gm":
+        spectra = dataset.spectra.iloc[links.target[links.link[rows]]]
+        return pd.DataFrame(
+            {
+                "GCF ID": primary_ids,
+                "Spectrum ID": pd.to_numeric(spectra["Spectrum ID"], errors="coerce").to_numpy(),
+                "MF ID": pd.to_numeric(spectra["MF ID"], errors="coerce").to_numpy(),
+                "Score": links.score[rows],
+                "Precursor m/z": spectra["Precursor m/z"].to_numpy(dtype=float),
+                "GNPS ID": spectra["GNPS ID"].fillna("None").to_numpy(),
+            }
+        )
+
+    targets = links.target[links.link[rows]]
+    gcfs = dataset.gcfs.iloc[targets]
+    return pd.DataFrame(
+        {
+            "MF ID": primary_ids,
+            "GCF ID": [int(gcf_id) if gcf_id.isdigit() else gcf_id for gcf_id in gcfs["GCF ID"]],
+            "Score": links.score[rows],
+            # The unique BGC classes of every GCF, as listed in the results table
+            "BGC Classes": dataset.table_frame("gcfs", targets)["BGC Classes"].to_numpy(),
+            "BGC IDs": [
+                ", ".join(str(bgc_id) for bgc_id in bgc_ids) for bgc_ids in gcfs["BGC IDs"]
+            ],
+            "# BGCs": gcfs["# BGCs"].to_numpy(),
+        }
+    )
 
 
-def generate_excel(n_clicks, table_data, detailed_data, tab_prefix):
+def generate_excel(n_clicks, table_data, results_data, tab_prefix):
     """Generate Excel file with two sheets: full results and detailed data.
 
     Args:
         n_clicks: Number of clicks on the download button.
         table_data: Data from the results table.
-        detailed_data: Detailed data for each row in the table.
+        results_data: Data of the detailed data store, referencing the candidate links listed in
+            the results table.
         tab_prefix: Tab prefix ('gm' or 'mg').
 
     Returns:
@@ -2342,6 +3095,18 @@ def generate_excel(n_clicks, table_data, detailed_data, tab_prefix):
     if not ctx.triggered or not table_data:
         return None, False, "", None
 
+    # The candidate links are kept server-side, per process, and are rebuilt if evicted
+    candidates = results_restore_candidates(results_data)
+    dataset = get_dataset(candidates.dataset_token) if candidates is not None else None
+    if candidates is None or dataset is None:
+        return (
+            None,
+            True,
+            "The candidate links of the results are no longer available. "
+            "Please show the results again before downloading them.",
+            None,
+        )
+
     try:
         output = io.BytesIO()
         with pd.ExcelWriter(output, engine="xlsxwriter") as writer:
@@ -2349,125 +3114,11 @@ def generate_excel(n_clicks, table_data, detailed_data, tab_prefix):
             results_df = pd.DataFrame(table_data)
             results_df.to_excel(writer, sheet_name="Best Candidate Links", index=False)
 
-            # Sheet 2: Detailed data
-            detailed_data_list = []
-
-            # Get unique primary IDs to avoid redundant processing
-            if tab_prefix == "gm":
-                unique_primary_ids = {row["GCF ID"] for row in table_data}
-            else:  # MG
-                unique_primary_ids = {row["MF ID"] for row in table_data}
-
-            # Process each unique primary ID only once
-            for primary_id in unique_primary_ids:
-                if tab_prefix == "gm":
-                    detail = detailed_data.get(str(primary_id), {})
-
-                    if not detail:
-                        continue
-
-                    ids = (
-                        [
-                            int(s) if s and s != "None" else float("nan")
-                            for s in detail.get("spectrum_ids_str", "").split("|")
-                        ]
-                        if detail.get("spectrum_ids_str")
-                        else []
-                    )
-                    mf_ids = (
-                        [
-                            int(s) if s and s != "None" else float("nan")
-                            for s in detail.get("spectrum_mf_ids_str", "").split("|")
-                        ]
-                        if detail.get("spectrum_mf_ids_str")
-                        else []
-                    )
-                    scores = (
-                        [
-                            float(s) if s and s != "None" else float("nan")
-                            for s in detail.get("spectrum_scores_str", "").split("|")
-                        ]
-                        if detail.get("spectrum_scores_str")
-                        else []
-                    )
-                    mz_values = (
-                        [
-                            float(s) if s and s != "None" else float("nan")
-                            for s in detail.get("spectrum_mz_str", "").split("|")
-                        ]
-                        if detail.get("spectrum_mz_str")
-                        else []
-                    )
-                    gnps_ids = (
-                        detail.get("spectrum_gnps_id_str", "").split("|")
-                        if detail.get("spectrum_gnps_id_str")
-                        else []
-                    )
-
-                    # Add all entries without truncation
-                    for item_id, mf_id, score, mz, gnps_id in zip(
-                        ids, mf_ids, scores, mz_values, gnps_ids
-                    ):
-                        detail_row = {
-                            "GCF ID": primary_id,
-                            "Spectrum ID": item_id,
-                            "MF ID": mf_id,
-                            "Score": score,
-                            "Precursor m/z": mz,
-                            "GNPS ID": gnps_id,
-                        }
-                        detailed_data_list.append(detail_row)
-                else:  # MG
-                    detail = detailed_data.get(str(primary_id), {})
-
-                    if not detail:
-                        continue
-
-                    ids = (
-                        detail.get("gcf_ids_str", "").split("|")
-                        if detail.get("gcf_ids_str")
-                        else []
-                    )
-                    scores = (
-                        [float(s) for s in detail.get("gcf_scores_str", "").split("|")]
-                        if detail.get("gcf_scores_str")
-                        else []
-                    )
-                    bgc_classes = (
-                        detail.get("gcf_bgc_classes_str", "").split("|")
-                        if detail.get("gcf_bgc_classes_str")
-                        else []
-                    )
-                    bgc_ids = (
-                        detail.get("gcf_bgc_ids_str", "").split("|")
-                        if detail.get("gcf_bgc_ids_str")
-                        else []
-                    )
-                    num_bgcs = (
-                        [
-                            int(s) if s and s.isdigit() else 0
-                            for s in detail.get("gcf_num_bgcs_str", "").split("|")
-                        ]
-                        if detail.get("gcf_num_bgcs_str")
-                        else []
-                    )
-
-                    # Add all entries without truncation
-                    for item_id, score, bgc_class, bgc_id, num_bgc in zip(
-                        ids, scores, bgc_classes, bgc_ids, num_bgcs
-                    ):
-                        detail_row = {
-                            "MF ID": primary_id,
-                            "GCF ID": int(item_id) if item_id.isdigit() else item_id,
-                            "Score": score,
-                            "BGC Classes": bgc_class,
-                            "BGC IDs": bgc_id,
-                            "# BGCs": num_bgc,
-                        }
-                        detailed_data_list.append(detail_row)
-
-            if detailed_data_list:
-                detailed_df = pd.DataFrame(detailed_data_list)
+            # Sheet 2: Detailed data, gathered from the link table
+            id_column = "GCF ID" if tab_prefix == "gm" else "MF ID"
+            item_ids = list(dict.fromkeys(str(row[id_column]) for row in table_data))
+            detailed_df = candidate_links_frame(dataset, candidates, item_ids)
+            if not detailed_df.empty:
                 detail_sheet_name = "All Candidate Links"
                 detailed_df.to_excel(writer, sheet_name=detail_sheet_name, index=False)
 
@@ -2482,7 +3133,9 @@ def generate_excel(n_clicks, table_data, detailed_data, tab_prefix):
 
 
 # ------------------ GM Results table functions ------------------ #
-@app.callback(
+# Toggle the visibility of the GM column settings modal
+app.clientside_callback(
+    ClientsideFunction(namespace="nplinker", function_name="toggle_modal"),
     Output("gm-results-table-column-settings-modal", "is_open"),
     [
         Input("gm-results-table-column-settings-button", "n_clicks"),
@@ -2490,18 +3143,6 @@ def generate_excel(n_clicks, table_data, detailed_data, tab_prefix):
     ],
     [State("gm-results-table-column-settings-modal", "is_open")],
 )
-def gm_toggle_column_settings_modal(n1, n2, is_open):
-    """Toggle the visibility of the GM column settings modal.
-
-    Args:
-        n1: Number of clicks on the open button.
-        n2: Number of clicks on the close button.
-        is_open: Current state of the modal (open or closed).
-
-    Returns:
-        The new state of the modal (open or closed).
-    """
-    return toggle_column_settings_modal(n1, n2, is_open)
 
 
 @app.callback(
@@ -2529,6 +3170,22 @@ def gm_update_columns(selected_columns: list[str] | None, n_clicks: int | None)
     )
 
 
+# Clear the GM results table when the selected rows change
+app.clientside_callback(
+    ClientsideFunction(namespace="nplinker", function_name="reset_results"),
+    Output("gm-results-alert", "children", allow_duplicate=True),
+    Output("gm-results-alert", "is_open", allow_duplicate=True),
+    Output("gm-results-table", "data", allow_duplicate=True),
+    Output("gm-results-table", "tooltip_data", allow_duplicate=True),
+    Output("gm-results-table-card-body", "style", allow_duplicate=True),
+    Output("gm-results-table-card-header", "style", allow_duplicate=True),
+    Output("gm-results-table-column-settings-button", "disabled", allow_duplicate=True),
+    Output("gm-detailed-data-store", "data", allow_duplicate=True),
+    Input("gm-table-selected-store", "data"),
+    prevent_initial_call=True,
+)
+
+
 @app.callback(
     Output("gm-results-alert", "children"),
     Output("gm-results-alert", "is_open"),
@@ -2540,38 +3197,43 @@ def gm_update_columns(selected_columns: list[str] | None, n_clicks: int | None)
     Output("loading-spinner-container", "children", allow_duplicate=True),
     Output("gm-detailed-data-store", "data"),
     Input("gm-results-button", "n_clicks"),
-    Input("gm-table", "derived_virtual_data"),
-    Input("gm-table", "derived_virtual_selected_rows"),
+    State("gm-table-selected-store", "data"),
     State("processed-links-store", "data"),
     State({"type": "gm-scoring-dropdown-menu", "index": ALL}, "value"),
     State({"type": "gm-scoring-radio-items", "index": ALL}, "value"),
     State({"type": "gm-scoring-dropdown-ids-cutoff-met", "index": ALL}, "value"),
+    State("gm-results-top-k-selector", "value"),
+    State("gm-table-view-store", "data"),
     prevent_initial_call=True,
 )
 def gm_update_results_datatable(
     n_clicks,
-    virtual_data,
-    selected_rows,
+    selection,
     processed_links,
     dropdown_menus,
     radiobuttons,
     cutoffs_met,
+    top_k_selection,
+    view_data=None,
 ):
     """Update the GM results DataTable based on scoring filters."""
     return update_results_datatable(
         n_clicks,
-        virtual_data,
-        selected_rows,
+        selection,
         processed_links,
         dropdown_menus,
         radiobuttons,
         cutoffs_met,
+        top_k_selection,
         "gm",
         "GCF",
+        view_data,
     )
 
 
-@app.callback(
+# Enable/disable download button for GM tab based on data availability
+app.clientside_callback(
+    ClientsideFunction(namespace="nplinker", function_name="toggle_download_button"),
     [
         Output("gm-download-button", "disabled"),
         Output("gm-download-alert", "is_open"),
@@ -2581,9 +3243,6 @@ def gm_update_results_datatable(
         Input("gm-results-table", "data"),
     ],
 )
-def gm_toggle_download_button(table_data):
-    """Enable/disable download button for GM tab based on data availability."""
-    return toggle_download_button(table_data)
 
 
 @app.callback(
@@ -2600,13 +3259,15 @@ def gm_toggle_download_button(table_data):
     ],
     prevent_initial_call=True,
 )
-def gm_generate_excel(n_clicks, table_data, detailed_data):
+def gm_generate_excel(n_clicks, table_data, results_data):
     """Generate Excel file for GM data."""
-    return generate_excel(n_clicks, table_data, detailed_data, "gm")
+    return generate_excel(n_clicks, table_data, results_data, "gm")
 
 
 # ------------------ MG Results table functions ------------------ #
-@app.callback(
+# Toggle the visibility of the MG column settings modal
+app.clientside_callback(
+    ClientsideFunction(namespace="nplinker", function_name="toggle_modal"),
     Output("mg-results-table-column-settings-modal", "is_open"),
     [
         Input("mg-results-table-column-settings-button", "n_clicks"),
@@ -2614,18 +3275,6 @@ def gm_generate_excel(n_clicks, table_data, detailed_data):
     ],
     [State("mg-results-table-column-settings-modal", "is_open")],
 )
-def mg_toggle_column_settings_modal(n1, n2, is_open):
-    """Toggle the visibility of the MG column settings modal.
-
-    Args:
-        n1: Number of clicks on the open button.
-        n2: Number of clicks on the close button.
-        is_open: Current state of the modal (open or closed).
-
-    Returns:
-        The new state of the modal (open or closed).
-    """
-    return toggle_column_settings_modal(n1, n2, is_open)
 
 
 @app.callback(
@@ -2653,6 +3302,22 @@ def mg_update_columns(selected_columns: list[str] | None, n_clicks: int | None)
     )
 
 
+# Clear the MG results table when the selected rows change
+app.clientside_callback(
+    ClientsideFunction(namespace="nplinker", function_name="reset_results"),
+    Output("mg-results-alert", "children", allow_duplicate=True),
+    Output("mg-results-alert", "is_open", allow_duplicate=True),
+    Output("mg-results-table", "data", allow_duplicate=True),
+    Output("mg-results-table", "tooltip_data", allow_duplicate=True),
+    Output("mg-results-table-card-body", "style", allow_duplicate=True),
+    Output("mg-results-table-card-header", "style", allow_duplicate=True),
+    Output("mg-results-table-column-settings-button", "disabled", allow_duplicate=True),
+    Output("mg-detailed-data-store", "data", allow_duplicate=True),
+    Input("mg-table-selected-store", "data"),
+    prevent_initial_call=True,
+)
+
+
 @app.callback(
     Output("mg-results-alert", "children"),
     Output("mg-results-alert", "is_open"),
@@ -2664,38 +3329,43 @@ def mg_update_columns(selected_columns: list[str] | None, n_clicks: int | None)
     Output("loading-spinner-container", "children", allow_duplicate=True),
     Output("mg-detailed-data-store", "data"),
     Input("mg-results-button", "n_clicks"),
-    Input("mg-table", "derived_virtual_data"),
-    Input("mg-table", "derived_virtual_selected_rows"),
+    State("mg-table-selected-store", "data"),
     State("processed-links-store", "data"),
     State({"type": "mg-scoring-dropdown-menu", "index": ALL}, "value"),
     State({"type": "mg-scoring-radio-items", "index": ALL}, "value"),
     State({"type": "mg-scoring-dropdown-ids-cutoff-met", "index": ALL}, "value"),
+    State("mg-results-top-k-selector", "value"),
+    State("mg-table-view-store", "data"),
     prevent_initial_call=True,
 )
 def mg_update_results_datatable(
     n_clicks,
-    virtual_data,
-    selected_rows,
+    selection,
     processed_links,
     dropdown_menus,
     radiobuttons,
     cutoffs_met,
+    top_k_selection,
+    view_data=None,
 ):
     """Update the MG results DataTable based on scoring filters."""
     return update_results_datatable(
         n_clicks,
-        virtual_data,
-        selected_rows,
+        selection,
         processed_links,
         dropdown_menus,
         radiobuttons,
         cutoffs_met,
+        top_k_selection,
         "mg",
         "MF",
+        view_data,
     )
 
 
-@app.callback(
+# Enable/disable download button for MG tab based on data availability
+app.clientside_callback(
+    ClientsideFunction(namespace="nplinker", function_name="toggle_download_button"),
     [
         Output("mg-download-button", "disabled"),
         Output("mg-download-alert", "is_open"),
@@ -2705,9 +3375,6 @@ def mg_update_results_datatable(
         Input("mg-results-table", "data"),
     ],
 )
-def mg_toggle_download_button(table_data):
-    """Enable/disable download button for MG tab based on data availability."""
-    return toggle_download_button(table_data)
 
 
 @app.callback(
@@ -2724,6 +3391,6 @@ def mg_toggle_download_button(table_data):
     ],
     prevent_initial_call=True,
 )
-def mg_generate_excel(n_clicks, table_data, detailed_data):
+def mg_generate_excel(n_clicks, table_data, results_data):
     """Generate Excel file for MG data."""
-    return generate_excel(n_clicks, table_data, detailed_data, "mg")
+    return generate_excel(n_clicks, table_data, results_data, "mg")
@@ -1,7 +1,19 @@
+import os
+
+
+# Operators combining a filter block with the blocks above it
+FILTER_OPERATOR_OPTIONS = [
+    {"label": "OR", "value": "OR"},
+    {"label": "AND", "value": "AND"},
+    {"label": "AND NOT", "value": "AND_NOT"},
+]
+
 # GM Table Configurations
 GM_FILTER_DROPDOWN_MENU_OPTIONS = [
     {"label": "GCF ID", "value": "GCF_ID"},
     {"label": "BGC Class", "value": "BGC_CLASS"},
+    {"label": "Strain", "value": "STRAIN"},
+    {"label": "Min. # Strains", "value": "MIN_STRAINS"},
 ]
 
 # BGC class options for different MIBiG versions
@@ -45,6 +57,9 @@ GM_RESULTS_TABLE_OPTIONAL_COLUMNS = [
     {"name": "Top Spectrum Score", "id": "Top Spectrum Score", "type": "numeric"},
     {"name": "MiBIG IDs", "id": "MiBIG IDs", "type": "text"},
     {"name": "BGC Classes", "id": "BGC Classes", "type": "text"},
+    {"name": "# Shared Strains", "id": "# Shared Strains", "type": "numeric"},
+    {"name": "# Strains Only in GCF", "id": "# Strains Only in GCF", "type": "numeric"},
+    {"name": "# Strains Only in Spectrum", "id": "# Strains Only in Spectrum", "type": "numeric"},
 ]
 
 GM_RESULTS_TABLE_CHECKL_OPTIONAL_COLUMNS = [
@@ -55,13 +70,33 @@ GM_RESULTS_TABLE_CHECKL_OPTIONAL_COLUMNS = [
     "Top Spectrum Score",
     "MiBIG IDs",
     "BGC Classes",
+    "# Shared Strains",
+    "# Strains Only in GCF",
+    "# Strains Only in Spectrum",
 ]
 
 # MG Table Configurations
 MG_FILTER_DROPDOWN_MENU_OPTIONS = [
     {"label": "MF ID", "value": "MF_ID"},
     {"label": "Spectrum ID", "value": "SPECTRUM_ID"},
+    {"label": "Precursor m/z", "value": "PRECURSOR_MZ"},
+    {"label": "Strain", "value": "STRAIN"},
+    {"label": "Min. # Strains", "value": "MIN_STRAINS"},
+]
+
+# Placeholders of the text inputs of the strain filters, shared by the GM and MG tabs
+FILTER_STRAIN_PLACEHOLDERS = {
+    "STRAIN": "Strain IDs, e.g. strain1, strain2, strain3*, ...",
+    "MIN_STRAINS": "Minimum number of strains, e.g. 3",
+}
+
+# Tolerance of the precursor m/z filter around each target m/z
+MG_FILTER_MZ_TOLERANCE_UNIT_OPTIONS = [
+    {"label": "ppm", "value": "PPM"},
+    {"label": "Da", "value": "DA"},
 ]
+# Tolerance used when the tolerance input is left empty, per unit
+MG_FILTER_MZ_DEFAULT_TOLERANCES = {"PPM": 10, "DA": 0.01}
 
 MG_RESULTS_TABLE_MANDATORY_COLUMNS = [
     {"name": "MF ID", "id": "MF ID", "type": "numeric"},
@@ -75,6 +110,9 @@ MG_RESULTS_TABLE_OPTIONAL_COLUMNS = [
     {"name": "Top GCF BGC IDs", "id": "Top GCF BGC IDs", "type": "text"},
     {"name": "Top GCF BGC Classes", "id": "Top GCF BGC Classes", "type": "text"},
     {"name": "Top GCF Score", "id": "Top GCF Score", "type": "numeric"},
+    {"name": "# Shared Strains", "id": "# Shared Strains", "type": "numeric"},
+    {"name": "# Strains Only in MF", "id": "# Strains Only in MF", "type": "numeric"},
+    {"name": "# Strains Only in GCF", "id": "# Strains Only in GCF", "type": "numeric"},
 ]
 
 MG_RESULTS_TABLE_CHECKL_OPTIONAL_COLUMNS = [
@@ -83,9 +121,46 @@ MG_RESULTS_TABLE_CHECKL_OPTIONAL_COLUMNS = [
     "Top GCF BGC IDs",
     "Top GCF BGC Classes",
     "Top GCF Score",
+    "# Shared Strains",
+    "# Strains Only in MF",
+    "# Strains Only in GCF",
 ]
 
 # Scoring Configurations
 SCORING_DROPDOWN_MENU_OPTIONS = [{"label": "Metcalf", "value": "METCALF"}]
 
+# Candidates shown per GCF/MF in the results tables
+RESULTS_TOP_K_OPTIONS = [
+    {"label": "Best (incl. ties)", "value": "best"},
+    {"label": "Top 3", "value": "3"},
+    {"label": "Top 10", "value": "10"},
+]
+
 MAX_TOOLTIP_ROWS = 500
+
+# GCF IDs listed in the hover text of a GM plot bar, the full list is shown on click
+GM_PLOT_HOVER_MAX_IDS = 10
+
+# Server-side data registry configuration
+DATASET_REGISTRY_MAX_MB = 4096
+# Uploads validated but not yet processed; each one holds a fully unpickled NPLinker object graph
+PENDING_UPLOADS_MAX_ENTRIES = 2
+# Candidate links listed in the results tables, used for tooltips and the Excel download
+RESULTS_REGISTRY_MAX_MB = 512
+# Filtered rows of the GM and MG data tables, which are paged and sorted server-side
+TABLE_VIEWS_MAX_MB = 256
+# Tooltips of the data table rows that have been shown, cached per dataset and row
+TABLE_TOOLTIP_CACHE_MAX_ROWS = 10000
+# Figures of the GM plot, cached per dataset and x-axis
+GM_PLOT_CACHE_MAX_FIGURES = 32
+
+# On-disk cache of processed uploads, keyed by the digest of the uploaded file. The default
+# directory is per user, since the cache holds pickles that must only be written by that user
+PROCESSED_DATA_CACHE_DIR = os.environ.get(
+    "NPLINKER_WEBAPP_CACHE_DIR",
+    os.path.join(
+        os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"),
+        "nplinker-webapp",
+    ),
+)
+PROCESSED_DATA_CACHE_MAX_MB = 8192
@@ -0,0 +1,851 @@
+import re
+from collections.abc import Callable
+from collections.abc import Iterable
+from dataclasses import dataclass
+from dataclasses import field
+from typing import Any
+import numpy as np
+import pandas as pd
+from app.bitmaps import bitmap_to_rows
+from app.bitmaps import bitsets
+from app.bitmaps import count
+from app.bitmaps import difference
+from app.bitmaps import intersection
+from app.bitmaps import rows_to_bitmap
+from app.bitmaps import union
+from app.registry import estimate_nbytes
+from nplinker.metabolomics.molecular_family import MolecularFamily
+from nplinker.metabolomics.spectrum import Spectrum
+
+
+GCF_COLUMNS = ["GCF ID", "# BGCs", "BGC IDs", "BGC Classes", "strains"]
+MF_COLUMNS = [
+    "MF ID",
+    "# Spectra",
+    "Spectra IDs",
+    "Spectra precursor m/z",
+    "Spectra GNPS IDs",
+    "strains",
+]
+SPECTRUM_COLUMNS = ["Spectrum ID", "Precursor m/z", "GNPS ID", "MF ID", "strains"]
+
+_SCORE_COLUMNS = ("link", "method", "score", "cutoff", "standardised")
+# An inclusive range of integer IDs, e.g. "100-2500"
+_ID_RANGE = re.compile(r"(\d+)-(\d+)")
+
+
+@dataclass(eq=False)
+class LinkTable:
+    """Scored links between the rows of two entity tables, stored as parallel NumPy columns.
+
+    `source` and `target` hold one entry per link: the row indices into the entity table the
+    links start from and the entity table they point to, so that the linked entities are stored
+    only once. The scores are kept in long format with one entry per link and scoring method:
+    `link` is the index of the scored link and `method` the code of the scoring method in
+    `methods`. A link scored by several methods is therefore stored only once.
+
+    The scores are ordered by the source row of their link, and `offsets` is a CSR index over
+    them: the scores of the links starting from source row `i` are the score rows
+    `offsets[i]:offsets[i + 1]`. `n_sources` is the number of rows of the source entity table.
+
+    The scores are also partitioned by (method, standardised), partition `2 * method +
+    standardised`, and sorted by cutoff within each partition. `partition_order` lists the score
+    rows in that order, with the partitions delimited by `partition_offsets`, and
+    `partition_rank` maps each score row back to its position. A cutoff filter therefore
+    selects a contiguous slice of `partition_order`, found by binary search.
+    """
+
+    source: np.ndarray
+    target: np.ndarray
+    link: np.ndarray
+    method: np.ndarray
+    score: np.ndarray
+    cutoff: np.ndarray
+    standardised: np.ndarray
+    methods: tuple[str, ...] = ()
+    n_sources: int = 0
+    offsets: np.ndarray = field(init=False)
+    partition_order: np.ndarray = field(init=False)
+    partition_cutoffs: np.ndarray = field(init=False)
+    partition_offsets: np.ndarray = field(init=False)
+    partition_rank: np.ndarray = field(init=False)
+
+    def __post_init__(self) -> None:
+        self.source = np.asarray(self.source, dtype=np.int32)
+        self.target = np.asarray(self.target, dtype=np.int32)
+        self.link = np.asarray(self.link, dtype=np.int32)
+        self.method = np.asarray(self.method, dtype=np.int8)
+        self.score = np.asarray(self.score, dtype=np.float64)
+        self.cutoff = np.asarray(self.cutoff, dtype=np.float64)
+        self.standardised = np.asarray(self.standardised, dtype=bool)
+        self.methods = tuple(self.methods)
+
+        # Order the scores by source row and index them per source row
+        score_sources = self.source[self.link]
+        order = np.argsort(score_sources, kind="stable")
+        for name in _SCORE_COLUMNS:
+            setattr(self, name, getattr(self, name)[order])
+        self.n_sources = max(self.n_sources, int(score_sources.max(initial=-1)) + 1)
+        self.offsets = np.zeros(self.n_sources + 1, dtype=np.int64)
+        np.cumsum(np.bincount(score_sources, minlength=self.n_sources), out=self.offsets[1:])
+
+        # Partition the scores by (method, standardised), sorted by cutoff within a partition
+        partitions = self.method.astype(np.int64) * 2 + self.standardised
+        n_partitions = 2 * len(self.methods)
+        self.partition_order = np.lexsort((self.cutoff, partitions))
+        self.partition_cutoffs = self.cutoff[self.partition_order]
+        self.partition_offsets = np.zeros(n_partitions + 1, dtype=np.int64)
+        np.cumsum(np.bincount(partitions, minlength=n_partitions), out=self.partition_offsets[1:])
+        self.partition_rank = np.empty(self.n_scores, dtype=np.int64)
+        self.partition_rank[self.partition_order] = np.arange(self.n_scores)
+
+    def __len__(self) -> int:
+        return len(self.source)
+
+    @property
+    def n_scores(self) -> int:
+        """Number of scores, i.e. of (link, scoring method) pairs."""
+        return len(self.link)
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the columns, in bytes."""
+        return sum(
+            column.nbytes
+            for column in (
+                self.source,
+                self.target,
+                self.link,
+                self.method,
+                self.score,
+                self.cutoff,
+                self.standardised,
+                self.offsets,
+                self.partition_order,
+                self.partition_cutoffs,
+                self.partition_offsets,
+                self.partition_rank,
+            )
+        )
+
+    def cutoff_range(
+        self, method: str, standardised: bool, cutoff: float | None = None
+    ) -> tuple[int, int]:
+        """Find the scores of a method with a cutoff of at least `cutoff`.
+
+        Args:
+            method: Name of the scoring method.
+            standardised: Whether to select standardised or raw scores.
+            cutoff: Minimum cutoff of the scores. All cutoffs are accepted if None.
+
+        Returns:
+            The bounds of the matching slice of `partition_order`. The slice is empty if the
+            method is not in the table.
+        """
+        if method not in self.methods:
+            return 0, 0
+        partition = 2 * self.methods.index(method) + int(standardised)
+        start = int(self.partition_offsets[partition])
+        end = int(self.partition_offsets[partition + 1])
+        if cutoff is not None:
+            start += int(np.searchsorted(self.partition_cutoffs[start:end], cutoff, side="left"))
+        return start, end
+
+    def score_rows(self, sources: np.ndarray) -> np.ndarray:
+        """Gather the score rows of the links starting from the given source rows.
+
+        Only the CSR segments of the requested sources are visited, so the cost is proportional
+        to the number of links of these sources rather than to the size of the table.
+
+        Args:
+            sources: Unique row indices into the source entity table.
+
+        Returns:
+            The score row indices, grouped by source in the order of `sources`.
+        """
+        sources = np.asarray(sources, dtype=np.int64)
+        sources = sources[(sources >= 0) & (sources < self.n_sources)]
+        starts = self.offsets[sources]
+        lengths = self.offsets[sources + 1] - starts
+        # Concatenate the ranges starts[i]:starts[i] + lengths[i] without a Python loop
+        segment_starts = np.cumsum(lengths) - lengths
+        return np.repeat(starts - segment_starts, lengths) + np.arange(lengths.sum())
+
+    def to_frame(self, rows: np.ndarray | None = None) -> pd.DataFrame:
+        """Return the scores as a DataFrame, with the source and target rows of their links.
+
+        The scoring method is returned as a categorical column of method names.
+
+        Args:
+            rows: Score rows to include. All scores are included if None.
+
+        Returns:
+            The DataFrame with one row per score.
+        """
+        if rows is None:
+            rows = np.arange(self.n_scores)
+        links = self.link[rows]
+        return pd.DataFrame(
+            {
+                "source": self.source[links],
+                "target": self.target[links],
+                "method": pd.Categorical.from_codes(self.method[rows], categories=self.methods),
+                "score": self.score[rows],
+                "cutoff": self.cutoff[rows],
+                "standardised": self.standardised[rows],
+            }
+        )
+
+
+class _LinkTableBuilder:
+    """Collect links and their scores, assigning a code to each scoring method."""
+
+    def __init__(self) -> None:
+        self.source: list[int] = []
+        self.target: list[int] = []
+        self.scores: dict[str, list] = {
+            "link": [],
+            "method": [],
+            "score": [],
+            "cutoff": [],
+            "standardised": [],
+        }
+        self.methods: dict[str, int] = {}
+
+    def add(self, source: int, target: int, methods_data: dict[str, Any]) -> None:
+        link = len(self.source)
+        self.source.append(source)
+        self.target.append(target)
+        for method, score in methods_data.items():
+            self.scores["link"].append(link)
+            self.scores["method"].append(self.methods.setdefault(method, len(self.methods)))
+            self.scores["score"].append(score.value)
+            self.scores["cutoff"].append(score.parameter["cutoff"])
+            self.scores["standardised"].append(score.parameter["standardised"])
+
+    def build(self, n_sources: int) -> LinkTable:
+        return LinkTable(
+            source=np.asarray(self.source),
+            target=np.asarray(self.target),
+            **{key: np.asarray(values) for key, values in self.scores.items()},
+            methods=tuple(self.methods),
+            n_sources=n_sources,
+        )
+
+
+@dataclass(eq=False)
+class IdIndex:
+    """Index from the IDs of entities to table rows, for exact, range and prefix lookups.
+
+    `ids[i]` maps to `rows[i]`. The IDs are kept sorted as text, for binary searches of exact IDs
+    and prefixes ("BGC0001*"), and integer IDs are also kept sorted by value for ranges
+    ("100-2500"). Binary searches of a sorted array beat hash lookups for long pasted ID lists.
+    """
+
+    ids: np.ndarray
+    rows: np.ndarray
+    text_ids: np.ndarray = field(init=False)
+    text_rows: np.ndarray = field(init=False)
+    numbers: np.ndarray = field(init=False)
+    number_rows: np.ndarray = field(init=False)
+
+    def __post_init__(self) -> None:
+        self.ids = np.asarray(self.ids).astype(str)
+        self.rows = np.asarray(self.rows, dtype=np.int64)
+
+        order = np.argsort(self.ids, kind="stable")
+        self.text_ids = self.ids[order]
+        self.text_rows = self.rows[order]
+
+        numbers = pd.to_numeric(pd.Series(self.ids, dtype=object), errors="coerce").to_numpy(float)
+        is_integer = np.isfinite(numbers) & (numbers == np.round(numbers))
+        order = np.flatnonzero(is_integer)[np.argsort(numbers[is_integer], kind="stable")]
+        self.numbers = numbers[order]
+        self.number_rows = self.rows[order]
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory held by the index, in bytes."""
+        return estimate_nbytes(
+            [self.ids, self.rows, self.text_ids, self.text_rows, self.numbers, self.number_rows]
+        )
+
+    def match(self, terms: Iterable[str]) -> np.ndarray:
+        """Return the sorted, unique rows of the IDs matching any of the terms.
+
+        Args:
+            terms: IDs, integer ranges like "100-2500" (both ends included) or prefixes like
+                "BGC0001*". Unknown IDs are ignored.
+
+        Returns:
+            The matching rows.
+        """
+        matches = []
+        exact = []
+        for term in terms:
+            id_range = _ID_RANGE.fullmatch(term)
+            if id_range:
+                low, high = sorted(int(bound) for bound in id_range.groups())
+                start = np.searchsorted(self.numbers, low, side="left")
+                end = np.searchsorted(self.numbers, high, side="right")
+                matches.append(self.number_rows[start:end])
+            elif term.endswith("*"):
+                prefix = term[:-1]
+                start = np.searchsorted(self.text_ids, prefix, side="left")
+                end = np.searchsorted(self.text_ids, prefix + "\U0010ffff", side="left")
+                matches.append(self.text_rows[start:end])
+            else:
+                exact.append(term)
+
+        if exact:
+            # The slices of the sorted IDs equal to each exact ID, empty for unknown IDs
+            exact_ids = np.asarray(exact, dtype=str)
+            starts = np.searchsorted(self.text_ids, exact_ids, side="left")
+            ends = np.searchsorted(self.text_ids, exact_ids, side="right")
+            matches.append(self.text_rows[_slice_positions(starts, ends)])
+        if not matches:
+            return self.rows[:0]
+        return np.unique(np.concatenate(matches))
+
+
+@dataclass(eq=False)
+class Dataset:
+    """Processed content of an uploaded NPLinker pickle file.
+
+    GCFs, MFs and spectra are kept in entity tables holding one row per entity. Links refer to
+    the rows of these tables by index, GCF -> spectrum links in `gm_links` and MF -> GCF links in
+    `mg_links`. The link tables are None if the upload did not contain any links.
+    The GCFs are also grouped in buckets, holding the sorted, unique GCF rows: per number of
+    BGCs in `n_bgcs` and per BGC class in `class_bgcs`.
+    """
+
+    gcfs: pd.DataFrame
+    mfs: pd.DataFrame
+    spectra: pd.DataFrame
+    n_bgcs: dict[int, np.ndarray]
+    class_bgcs: dict[str, np.ndarray]
+    gm_links: LinkTable | None = None
+    mg_links: LinkTable | None = None
+    gcf_index: IdIndex = field(init=False)
+    mf_index: IdIndex = field(init=False)
+    spectrum_index: IdIndex = field(init=False)
+    precursor_mz: np.ndarray = field(init=False)
+    precursor_mz_rows: np.ndarray = field(init=False)
+    class_index: dict[str, np.ndarray] = field(init=False)
+    strain_index: IdIndex = field(init=False)
+    strain_bitsets: dict[str, np.ndarray] = field(init=False)
+    bucket_counts: dict[str, dict[Any, int]] = field(init=False)
+    display: dict[str, pd.DataFrame] = field(init=False)
+    sort_keys: dict[str, dict[str, np.ndarray]] = field(init=False, default_factory=dict)
+
+    def __post_init__(self) -> None:
+        # Indexes from entity IDs to their rows, reused by every lookup
+        self.gcf_index = IdIndex(self.gcfs["GCF ID"].to_numpy(), np.arange(len(self.gcfs)))
+        self.mf_index = IdIndex(self.mfs["MF ID"].to_numpy(), np.arange(len(self.mfs)))
+        # Index from the spectrum IDs of every MF to the row of that MF
+        n_spectra = np.fromiter(
+            map(len, self.mfs["Spectra IDs"]), dtype=np.int64, count=len(self.mfs)
+        )
+        spectrum_rows = np.repeat(np.arange(len(self.mfs)), n_spectra)
+        self.spectrum_index = IdIndex(
+            np.asarray([spectrum_id for ids in self.mfs["Spectra IDs"] for spectrum_id in ids]),
+            spectrum_rows,
+        )
+        # Sorted precursor m/z of the spectra of every MF, with the row of that MF
+        precursor_mz = pd.to_numeric(
+            pd.Series(
+                [mz for mzs in self.mfs["Spectra precursor m/z"] for mz in mzs], dtype=object
+            ),
+            errors="coerce",
+        ).to_numpy(float)
+        order = np.argsort(precursor_mz, kind="stable")
+        order = order[~np.isnan(precursor_mz[order])]
+        self.precursor_mz = precursor_mz[order]
+        self.precursor_mz_rows = spectrum_rows[order]
+        # Inverted index from lowercase BGC class to the bitmap of the GCFs with that class
+        self.class_index = _class_index(self.gcfs)
+        # Dictionary of all strains, and per table one bitset per row of the strains it is in
+        tables = {"gcfs": self.gcfs, "mfs": self.mfs, "spectra": self.spectra}
+        strain_ids = np.unique(
+            np.asarray(
+                [strain for table in tables.values() for ids in table["strains"] for strain in ids],
+                dtype=str,
+            )
+        )
+        self.strain_index = IdIndex(strain_ids, np.arange(len(strain_ids)))
+        self.strain_bitsets = {
+            name: _strain_bitsets(table["strains"], strain_ids) for name, table in tables.items()
+        }
+        # Number of GCFs in each bucket
+        self.bucket_counts = {
+            buckets: {key: len(rows) for key, rows in getattr(self, buckets).items()}
+            for buckets in ("n_bgcs", "class_bgcs")
+        }
+        # Display values of the data tables, formatted once so paging only slices rows
+        self.display = {
+            table: to_display(getattr(self, table)) for table, to_display in _TABLE_DISPLAY.items()
+        }
+
+    def gcf_rows(self, gcf_ids: Iterable[str]) -> np.ndarray:
+        """Return the sorted, unique rows of the GCFs matching the IDs, ranges or prefixes."""
+        return self.gcf_index.match(gcf_ids)
+
+    def mf_rows(self, mf_ids: Iterable[str]) -> np.ndarray:
+        """Return the sorted, unique rows of the MFs matching the IDs, ranges or prefixes."""
+        return self.mf_index.match(mf_ids)
+
+    def spectrum_mf_rows(self, spectrum_ids: Iterable[str]) -> np.ndarray:
+        """Return the sorted, unique rows of the MFs containing any of the matching spectra."""
+        return self.spectrum_index.match(spectrum_ids)
+
+    def bucket_rows(self, buckets: str, key: Any) -> np.ndarray:
+        """Return the sorted, unique rows of the GCFs in a bucket.
+
+        Args:
+            buckets: The buckets, "n_bgcs" (per number of BGCs) or "class_bgcs" (per BGC class).
+            key: The number of BGCs or BGC class of the bucket.
+
+        Returns:
+            The GCF rows, empty for an unknown bucket.
+        """
+        rows: np.ndarray | None = getattr(self, buckets).get(key)
+        if rows is None:
+            return np.empty(0, dtype=np.int64)
+        return rows
+
+    def precursor_mz_mf_rows(
+        self, targets: Iterable[float], tolerance: float, unit: str = "PPM"
+    ) -> np.ndarray:
+        """Return the sorted, unique rows of the MFs with a spectrum close to any target m/z.
+
+        Args:
+            targets: Target precursor m/z values.
+            tolerance: Largest difference from a target, both sides included.
+            unit: Unit of the tolerance, "PPM" (parts per million of the target) or "DA".
+
+        Returns:
+            The matching MF rows.
+        """
+        target_mz = np.asarray(list(targets), dtype=float)
+        width = (
+            target_mz * tolerance * 1e-6 if unit == "PPM" else np.full_like(target_mz, tolerance)
+        )
+        starts = np.searchsorted(self.precursor_mz, target_mz - width, side="left")
+        ends = np.searchsorted(self.precursor_mz, target_mz + width, side="right")
+        return np.unique(self.precursor_mz_rows[_slice_positions(starts, ends)])
+
+    def strain_rows(self, table: str, strain_ids: Iterable[str]) -> np.ndarray:
+        """Return the sorted rows of the GCFs ("gcfs") or MFs ("mfs") in any of the strains.
+
+        Args:
+            table: The entity table to filter.
+            strain_ids: Strain IDs, or prefixes like "Strain_1*". Unknown strains are ignored.
+
+        Returns:
+            The matching rows.
+        """
+        mask = rows_to_bitmap(self.strain_index.match(strain_ids), len(self.strain_index.ids))
+        return np.flatnonzero((self.strain_bitsets[table] & mask).any(axis=1))
+
+    def min_strains_rows(self, table: str, min_strains: int) -> np.ndarray:
+        """Return the sorted rows of the GCFs ("gcfs") or MFs ("mfs") in at least `min_strains`."""
+        return np.flatnonzero(count(self.strain_bitsets[table]) >= min_strains)
+
+    def strain_overlap(
+        self, table: str, rows: np.ndarray, other_table: str, other_rows: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Compare the strains of pairs of rows of two entity tables.
+
+        Args:
+            table: The entity table of the first row of each pair.
+            rows: The first row of each pair.
+            other_table: The entity table of the second row of each pair.
+            other_rows: The second row of each pair.
+
+        Returns:
+            Strain bitsets of each pair: the shared strains, the strains only in the first row
+            and the strains only in the second row.
+        """
+        strains = self.strain_bitsets[table][rows]
+        other_strains = self.strain_bitsets[other_table][other_rows]
+        return (
+            intersection(strains, other_strains),
+            difference(strains, other_strains),
+            difference(other_strains, strains),
+        )
+
+    def strain_names(self, bitset: np.ndarray) -> list[str]:
+        """Return the IDs of the strains in a strain bitset."""
+        rows = bitmap_to_rows(bitset, len(self.strain_index.ids))
+        return [str(strain) for strain in self.strain_index.ids[rows]]
+
+    def bgc_class_bitmap(self, bgc_classes: Iterable[str]) -> np.ndarray:
+        """Return the bitmap of the GCFs with a BGC of any of the classes, ignoring case."""
+        return union(
+            [
+                self.class_index[key]
+                for key in {bgc_class.lower() for bgc_class in bgc_classes}
+                if key in self.class_index
+            ],
+            len(self.gcfs),
+        )
+
+    def table_frame(self, table: str, rows: np.ndarray | None = None) -> pd.DataFrame:
+        """Return the display values of the GCF ("gcfs") or MF ("mfs") data table.
+
+        Args:
+            table: The entity table shown in the data table.
+            rows: Rows of the entity table to return, all rows if None.
+
+        Returns:
+            One record per row, with the columns shown in the data table.
+        """
+        frame = self.display[table]
+        return frame if rows is None else frame.iloc[rows]
+
+    def table_sort_keys(self, table: str) -> dict[str, np.ndarray]:
+        """Return the sort key of every row of a data table, per column.
+
+        Sorting a data table by a column is sorting its rows by the key of that column. The keys
+        are computed on first use and kept with the dataset.
+        """
+        keys = self.sort_keys.get(table)
+        if keys is None:
+            frame = self.table_frame(table)
+            keys = self.sort_keys[table] = {column: _sort_key(frame[column]) for column in frame}
+        return keys
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory held by the dataset, in bytes."""
+        total = estimate_nbytes(
+            [
+                self.gcfs,
+                self.mfs,
+                self.spectra,
+                self.n_bgcs,
+                self.class_bgcs,
+                self.gcf_index,
+                self.mf_index,
+                self.spectrum_index,
+                self.precursor_mz,
+                self.precursor_mz_rows,
+                self.class_index,
+                self.strain_index,
+                self.strain_bitsets,
+                self.bucket_counts,
+                self.display,
+                self.sort_keys,
+            ]
+        )
+        for links in (self.gm_links, self.mg_links):
+            if links is not None:
+                total += links.nbytes
+        return total
+
+
+@dataclass(eq=False)
+class CandidateLinks:
+    """Candidate links listed in a results table, as score rows of a dataset's link table.
+
+    The score rows of the candidates of item `item_ids[i]` are `rows[bounds[i]:bounds[i + 1]]`.
+    The first `n_sorted[i]` of them are the best candidates, sorted by descending score, and the
+    others follow in no particular order; all of them are sorted if `n_sorted` is None. The rows
+    refer to `gm_links` or `mg_links` of the dataset registered under `dataset_token`, depending
+    on `prefix`.
+    """
+
+    dataset_token: str
+    prefix: str
+    item_ids: np.ndarray
+    rows: np.ndarray
+    bounds: np.ndarray
+    n_sorted: np.ndarray | None = None
+    positions: dict[str, int] = field(init=False)
+
+    def __post_init__(self) -> None:
+        self.positions = {str(item_id): i for i, item_id in enumerate(self.item_ids)}
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory held by the candidate links, in bytes."""
+        return estimate_nbytes(
+            [self.item_ids, self.rows, self.bounds, self.n_sorted, self.positions]
+        )
+
+    def sorted_count(self, position: int) -> int:
+        """Return the number of leading candidates of the item at `position` that are sorted."""
+        n_candidates = int(self.bounds[position + 1] - self.bounds[position])
+        if self.n_sorted is None:
+            return n_candidates
+        return int(self.n_sorted[position])
+
+    def item_rows(self, item_id: str) -> np.ndarray:
+        """Return the candidate score rows of an item, or no rows if it is not listed."""
+        position = self.positions.get(str(item_id))
+        if position is None:
+            return self.rows[:0]
+        return self.rows[self.bounds[position] : self.bounds[position + 1]]
+
+
+@dataclass(eq=False)
+class TableView:
+    """Rows of a GCF or MF data table that match its filters.
+
+    `rows` are rows of the `table` entity table ("gcfs" or "mfs") of the dataset registered under
+    `dataset_token`, in table order. The order of the last requested sort is kept with the view,
+    so paging through a sorted table does not sort it again.
+    """
+
+    dataset_token: str
+    table: str
+    rows: np.ndarray
+    sorted_by: tuple[tuple[str, str], ...] = field(init=False, default=())
+    sorted_rows: np.ndarray = field(init=False)
+
+    def __post_init__(self) -> None:
+        self.sorted_rows = self.rows
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory held by the view, in bytes."""
+        return 2 * self.rows.nbytes
+
+    def sort(self, dataset: Dataset, sort_by: list[dict[str, str]] | None) -> np.ndarray:
+        """Return the rows of the view sorted by the columns of a data table's `sort_by`.
+
+        Args:
+            dataset: The dataset the view refers to.
+            sort_by: Sorted columns, most significant first, as given by the data table.
+
+        Returns:
+            The sorted rows, ties are kept in table order.
+        """
+        sort_keys = dataset.table_sort_keys(self.table)
+        sorted_by = tuple(
+            (item["column_id"], item["direction"])
+            for item in sort_by or []
+            if item["column_id"] in sort_keys
+        )
+        if sorted_by != self.sorted_by:
+            keys = []
+            # np.lexsort sorts by the last key first
+            for column, direction in reversed(sorted_by):
+                key = sort_keys[column][self.rows]
+                keys.append(-key if direction == "desc" else key)
+            self.sorted_rows = self.rows[np.lexsort(keys)] if keys else self.rows
+            self.sorted_by = sorted_by
+        return self.sorted_rows
+
+
+def _slice_positions(starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    """Return the positions in all the slices `starts[i]:ends[i]` of an array, concatenated."""
+    counts = np.maximum(ends - starts, 0)
+    offsets = np.cumsum(counts) - counts
+    positions: np.ndarray = np.repeat(starts - offsets, counts) + np.arange(counts.sum())
+    return positions
+
+
+def _strain_bitsets(strains: pd.Series, strain_ids: np.ndarray) -> np.ndarray:
+    # The strain dictionary is sorted, so the bit of each strain is its position in the dictionary
+    n_strains = np.fromiter(map(len, strains), dtype=np.int64, count=len(strains))
+    flat = np.asarray([strain for ids in strains for strain in ids], dtype=str)
+    return bitsets(
+        np.repeat(np.arange(len(strains)), n_strains),
+        np.searchsorted(strain_ids, flat),
+        len(strains),
+        len(strain_ids),
+    )
+
+
+def _class_index(gcfs: pd.DataFrame) -> dict[str, np.ndarray]:
+    class_rows: dict[str, list[int]] = {}
+    for row, bgc_classes in enumerate(gcfs["BGC Classes"]):
+        for key in {c.lower() for classes in bgc_classes for c in classes}:
+            class_rows.setdefault(key, []).append(row)
+    return {key: rows_to_bitmap(np.array(rows), len(gcfs)) for key, rows in class_rows.items()}
+
+
+class _EntityTable:
+    """Collect one record per entity and map entity IDs to their row index."""
+
+    def __init__(self, to_record: Callable[[Any], dict[str, Any]]) -> None:
+        self.to_record = to_record
+        self.records: list[dict[str, Any]] = []
+        self.rows: dict[str, int] = {}
+
+    def row(self, entity: Any) -> int:
+        row = self.rows.get(entity.id)
+        if row is None:
+            row = self.rows[entity.id] = len(self.records)
+            self.records.append(self.to_record(entity))
+        return row
+
+    def to_frame(self, columns: list[str]) -> pd.DataFrame:
+        return pd.DataFrame(self.records, columns=columns)
+
+
+def _bgc_class(bgc_class: tuple[str, ...] | None) -> list[str]:
+    if bgc_class is None:
+        return ["Unknown"]
+    return list(bgc_class)
+
+
+def _gcf_record(gcf: Any) -> dict[str, Any]:
+    sorted_bgcs = sorted(gcf.bgcs, key=lambda bgc: bgc.id)
+    return {
+        "GCF ID": gcf.id,
+        "# BGCs": len(gcf.bgcs),
+        "BGC IDs": [bgc.id for bgc in sorted_bgcs],
+        "BGC Classes": [_bgc_class(bgc.mibig_bgc_class) for bgc in sorted_bgcs],
+        "strains": sorted([s.id for s in gcf.strains._strains]),
+    }
+
+
+def _mf_record(mf: Any) -> dict[str, Any]:
+    sorted_spectra = sorted(mf.spectra, key=lambda spectrum: spectrum.id)
+    return {
+        "MF ID": mf.id,
+        "# Spectra": len(mf.spectra_ids),
+        "Spectra IDs": [spectrum.id for spectrum in sorted_spectra],
+        "Spectra precursor m/z": [spectrum.precursor_mz for spectrum in sorted_spectra],
+        "Spectra GNPS IDs": [spectrum.gnps_id for spectrum in sorted_spectra],
+        "strains": sorted([s.id for s in mf.strains._strains]),
+    }
+
+
+def _spectrum_record(spectrum: Any) -> dict[str, Any]:
+    return {
+        "Spectrum ID": spectrum.id,
+        "Precursor m/z": spectrum.precursor_mz,
+        "GNPS ID": spectrum.gnps_id,
+        "MF ID": spectrum.family.id if spectrum.family else None,
+        "strains": sorted([s.id for s in spectrum.strains._strains]),
+    }
+
+
+def _gcf_display(gcfs: pd.DataFrame) -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "GCF ID": gcfs["GCF ID"],
+            "# BGCs": gcfs["# BGCs"],
+            # Unique classes of the BGCs, in order of appearance
+            "BGC Classes": [
+                ", ".join(dict.fromkeys(c for classes in bgc_classes for c in classes))
+                for bgc_classes in gcfs["BGC Classes"]
+            ],
+            "MiBIG IDs": [
+                ", ".join(s for s in strains if s.startswith("BGC")) or "None"
+                for strains in gcfs["strains"]
+            ],
+        },
+        index=gcfs.index,
+    )
+
+
+def _mf_display(mfs: pd.DataFrame) -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "MF ID": mfs["MF ID"],
+            "# Spectra": mfs["# Spectra"],
+            "Spectra GNPS IDs": [
+                ", ".join(dict.fromkeys(str(g) for g in gnps_ids if g and str(g) != "None"))
+                or "None"
+                for gnps_ids in mfs["Spectra GNPS IDs"]
+            ],
+        },
+        index=mfs.index,
+    )
+
+
+_TABLE_DISPLAY = {"gcfs": _gcf_display, "mfs": _mf_display}
+
+
+def _sort_key(values: pd.Series) -> np.ndarray:
+    """Rank values for sorting: numbers by value, followed by all other values as text."""
+    numbers = pd.to_numeric(values, errors="coerce")
+    keys = pd.DataFrame(
+        {"text": numbers.isna(), "number": numbers.fillna(0), "string": values.astype(str)}
+    )
+    ranks: np.ndarray = keys.groupby(list(keys), sort=True).ngroup().to_numpy(np.int32)
+    return ranks
+
+
+def build_dataset(
+    gcfs: Iterable[Any] | None,
+    spectra: Iterable[Any] | None,
+    mfs: Iterable[Any] | None,
+    links: Any | None,
+) -> Dataset:
+    """Build the entity and link tables from the NPLinker objects of an uploaded file.
+
+    Every GCF, MF and spectrum is converted once, no matter how many links refer to it.
+    Entities that only appear in links are added to their entity table when first seen.
+
+    Args:
+        gcfs: The GCF objects.
+        spectra: The Spectrum objects.
+        mfs: The MolecularFamily objects.
+        links: The LinkGraph object, or None if the file contains no links.
+
+    Returns:
+        The processed dataset.
+    """
+    gcf_table = _EntityTable(_gcf_record)
+    mf_table = _EntityTable(_mf_record)
+    spectrum_table = _EntityTable(_spectrum_record)
+
+    n_bgcs: dict[int, list[int]] = {}
+    class_bgcs: dict[str, list[int]] = {}
+    for gcf in gcfs or []:
+        row = gcf_table.row(gcf)
+        record = gcf_table.records[row]
+        n_bgcs.setdefault(record["# BGCs"], []).append(row)
+        # Each GCF is added once per class, however many of its BGCs have that class
+        gcf_classes = {bgc_class for classes in record["BGC Classes"] for bgc_class in classes}
+        for bgc_class in gcf_classes:
+            class_bgcs.setdefault(bgc_class, []).append(row)
+
+    for mf in mfs or []:
+        mf_table.row(mf)
+    for spectrum in spectra or []:
+        spectrum_table.row(spectrum)
+
+    gm_links = mg_links = None
+    if links is not None:
+        gm_builder = _LinkTableBuilder()
+        mg_builder = _LinkTableBuilder()
+
+        for u, v, methods_data in links.links:
+            # GCF -> Spectrum links
+            if isinstance(v, Spectrum):
+                gm_builder.add(gcf_table.row(u), spectrum_table.row(v), methods_data)
+            # Spectrum -> GCF links
+            elif isinstance(u, Spectrum):
+                gm_builder.add(gcf_table.row(v), spectrum_table.row(u), methods_data)
+            # GCF -> MF links
+            elif isinstance(v, MolecularFamily):
+                mg_builder.add(mf_table.row(v), gcf_table.row(u), methods_data)
+            # MF -> GCF links
+            elif isinstance(u, MolecularFamily):
+                mg_builder.add(mf_table.row(u), gcf_table.row(v), methods_data)
+
+        gm_links = gm_builder.build(len(gcf_table.records))
+        mg_links = mg_builder.build(len(mf_table.records))
+
+    dataset = Dataset(
+        gcfs=gcf_table.to_frame(GCF_COLUMNS),
+        mfs=mf_table.to_frame(MF_COLUMNS),
+        spectra=spectrum_table.to_frame(SPECTRUM_COLUMNS),
+        n_bgcs={n: np.unique(np.asarray(rows, dtype=np.int64)) for n, rows in n_bgcs.items()},
+        class_bgcs={
+            bgc_class: np.unique(np.asarray(rows, dtype=np.int64))
+            for bgc_class, rows in class_bgcs.items()
+        },
+        gm_links=gm_links,
+        mg_links=mg_links,
+    )
+    # Sort the data tables once here, so the sort keys are cached with the processed data
+    for table in _TABLE_DISPLAY:
+        dataset.table_sort_keys(table)
+    return dataset
@@ -8,6 +8,7 @@ from dash import html
 from app.config import GM_RESULTS_TABLE_CHECKL_OPTIONAL_COLUMNS
 from app.config import MG_RESULTS_TABLE_CHECKL_OPTIONAL_COLUMNS
 from app.config import MIBIG_VERSIONS
+from app.config import RESULTS_TOP_K_OPTIONS
 
 
 # ------------------ Helper Functions ------------------ #
@@ -27,17 +28,21 @@ def create_data_table(table_id, select_all_id):
         data=[],
         tooltip_data=[],
         editable=False,
-        filter_action="none",
-        sort_action="none",
+        # Filtering, sorting and paging are done server-side, see the table callbacks
+        filter_action="custom",
+        filter_query="",
+        sort_action="custom",
         sort_mode="multi",
+        sort_by=[],
         column_selectable=False,
         row_deletable=False,
         row_selectable="multi",
         selected_columns=[],
         selected_rows=[],
-        page_action="native",
+        page_action="custom",
         page_current=0,
         page_size=10,
+        page_count=0,
         style_cell={
             "textAlign": "left",
             "padding": "5px",
@@ -347,6 +352,7 @@ def create_scoring_accordion(control_id, blocks_store_id, blocks_container_id):
 
 def create_results_section(  # noqa: D417
     button_id,
+    top_k_selector_id,
     alert_id,
     table_id,
     table_header_id,
@@ -371,6 +377,19 @@ def create_results_section(  # noqa: D417
     """
     results = html.Div(
         [
+            html.Div(
+                [
+                    html.Label("Candidates per item: ", className="me-2"),
+                    dcc.Dropdown(
+                        id=top_k_selector_id,
+                        options=RESULTS_TOP_K_OPTIONS,
+                        value=RESULTS_TOP_K_OPTIONS[0]["value"],
+                        clearable=False,
+                        style={"width": "200px"},
+                    ),
+                ],
+                className="d-flex align-items-center justify-content-center",
+            ),
             html.Div(
                 dbc.Button(
                     "Show Results",
@@ -471,7 +490,16 @@ def create_results_section(  # noqa: D417
     return [results, results_table, results_download]
 
 
-def create_data_table_card(table_id, header_id, body_id, select_all_id, output1_id, output2_id):  # noqa: D417
+def create_data_table_card(  # noqa: D417
+    table_id,
+    header_id,
+    body_id,
+    select_all_id,
+    output1_id,
+    output2_id,
+    view_store_id,
+    selected_store_id,
+):
     """Create a common data table card.
 
     Args:
@@ -505,6 +533,8 @@ def create_data_table_card(table_id, header_id, body_id, select_all_id, output1_
                         style={"position": "relative", "height": "0px"},
                     ),
                     create_data_table(table_id, select_all_id),
+                    dcc.Store(id=view_store_id),  # Token of the filtered table rows
+                    dcc.Store(id=selected_store_id),  # Selection handle of the rows on all pages
                 ],
                 id=body_id,
                 style={"display": "none"},
@@ -545,6 +575,8 @@ def create_tab_content(prefix, filter_title, checkl_options, no_sort_columns):
         f"{prefix}-table-select-all-checkbox",
         f"{prefix}-table-output1",
         f"{prefix}-table-output2",
+        f"{prefix}-table-view-store",
+        f"{prefix}-table-selected-store",
     )
 
     # Create scoring accordion
@@ -557,6 +589,7 @@ def create_tab_content(prefix, filter_title, checkl_options, no_sort_columns):
     # Create results section
     results_components = create_results_section(
         f"{prefix}-results-button",
+        f"{prefix}-results-top-k-selector",
         f"{prefix}-results-alert",
         f"{prefix}-results-table",
         f"{prefix}-results-table-card-header",
@@ -603,6 +636,8 @@ def create_tab_content(prefix, filter_title, checkl_options, no_sort_columns):
                     id="gm-graph-selector-container",
                 ),
                 dcc.Graph(id="gm-graph"),
+                # GCFs of the clicked bar
+                html.Div(id="gm-graph-members", className="mt-2", style={"display": "none"}),
             ],
             className="mt-5 mb-3",
         )
@@ -684,10 +719,10 @@ uploader = html.Div(
             )
         ),
         dcc.Store(id="file-store"),  # Store to keep the file contents
-        dcc.Store(id="processed-data-store"),  # Store to keep the processed data
-        dcc.Store(id="processed-links-store"),  # Store to keep the processed links
-        dcc.Store(id="gm-detailed-data-store"),  # Store for GM detailed data
-        dcc.Store(id="mg-detailed-data-store"),  # Store for MG detailed data
+        dcc.Store(id="processed-data-store"),  # Store to keep the processed dataset token
+        dcc.Store(id="processed-links-store"),  # Store to keep the processed links token
+        dcc.Store(id="gm-detailed-data-store"),  # Store for GM results candidate links
+        dcc.Store(id="mg-detailed-data-store"),  # Store for MG results candidate links
     ],
     className="p-5 ml-5 mr-5",
 )
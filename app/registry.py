@@ -0,0 +1,156 @@
+import sys
+import threading
+import uuid
+from collections import OrderedDict
+from typing import Any
+import numpy as np
+import pandas as pd
+
+
+def estimate_nbytes(obj: Any) -> int:
+    """Estimate the memory footprint of a processed data structure.
+
+    Containers are walked iteratively so deeply nested link data does not hit the recursion limit.
+    Objects that report their own size through an `nbytes` attribute (NumPy arrays and the like)
+    are trusted, and DataFrames are measured with `memory_usage(deep=True)`.
+
+    Args:
+        obj: The object to measure.
+
+    Returns:
+        Approximate number of bytes held by the object and everything it references.
+    """
+    total = 0
+    seen: set[int] = set()
+    stack = [obj]
+    while stack:
+        item = stack.pop()
+        if id(item) in seen:
+            continue
+        seen.add(id(item))
+
+        if isinstance(item, pd.DataFrame):
+            total += int(item.memory_usage(deep=True).sum())
+        elif isinstance(item, np.ndarray):
+            total += item.nbytes
+            if item.dtype == object:
+                stack.extend(item.ravel().tolist())
+        elif isinstance(item, dict):
+            total += sys.getsizeof(item)
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple, set, frozenset)):
+            total += sys.getsizeof(item)
+            stack.extend(item)
+        elif isinstance(getattr(item, "nbytes", None), int):
+            total += item.nbytes
+        else:
+            total += sys.getsizeof(item)
+    return total
+
+
+class DatasetRegistry:
+    """Thread-safe, memory-bounded LRU registry of server-side data.
+
+    Processed datasets are kept in server memory and referenced from the browser by an opaque
+    token, so that `dcc.Store` components only carry the token instead of the data itself.
+    When the accounted memory exceeds `max_bytes`, or the number of entries exceeds
+    `max_entries`, the least recently used entries are evicted. The most recently registered
+    entry is never evicted, even if it alone exceeds the budget.
+    """
+
+    def __init__(self, max_bytes: int, max_entries: int | None = None) -> None:
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[Any, int]] = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+    def register(self, value: Any, token: str | None = None, nbytes: int | None = None) -> str:
+        """Store a value in the registry.
+
+        Args:
+            value: The object to store.
+            token: Token to store the value under. A new random token is generated if None.
+            nbytes: Memory footprint of the value. Estimated with `estimate_nbytes` if None.
+
+        Returns:
+            The token referencing the stored value.
+        """
+        if nbytes is None:
+            nbytes = estimate_nbytes(value)
+        if token is None:
+            token = str(uuid.uuid4())
+        with self._lock:
+            previous = self._entries.pop(token, None)
+            if previous is not None:
+                self._total_bytes -= previous[1]
+            self._entries[token] = (value, nbytes)
+            self._total_bytes += nbytes
+            self._evict()
+        return token
+
+    def get(self, token: str | None) -> Any | None:
+        """Retrieve a value and mark it as recently used.
+
+        Args:
+            token: The token returned by `register`.
+
+        Returns:
+            The stored value, or None if the token is unknown or has been evicted.
+        """
+        if token is None:
+            return None
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                return None
+            self._entries.move_to_end(token)
+            return entry[0]
+
+    def pop(self, token: str | None) -> Any | None:
+        """Remove a value from the registry and return it.
+
+        Args:
+            token: The token of the value to remove.
+
+        Returns:
+            The removed value, or None if the token is unknown or has been evicted.
+        """
+        if token is None:
+            return None
+        with self._lock:
+            entry = self._entries.pop(token, None)
+            if entry is None:
+                return None
+            self._total_bytes -= entry[1]
+            return entry[0]
+
+    def discard(self, token: str | None) -> None:
+        """Remove a value from the registry if present.
+
+        Args:
+            token: The token of the value to remove.
+        """
+        self.pop(token)
+
+    @property
+    def total_bytes(self) -> int:
+        """Accounted memory of all entries currently held, in bytes."""
+        return self._total_bytes
+
+    def __contains__(self, token: object) -> bool:
+        with self._lock:
+            return token in self._entries
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def _evict(self) -> None:
+        while len(self._entries) > 1 and (
+            self._total_bytes > self.max_bytes
+            or (self.max_entries is not None and len(self._entries) > self.max_entries)
+        ):
+            _, (_, nbytes) = self._entries.popitem(last=False)
+            self._total_bytes -= nbytes
@@ -0,0 +1,45 @@
+import numpy as np
+from app.bitmaps import bitmap_to_rows
+from app.bitmaps import bitsets
+from app.bitmaps import count
+from app.bitmaps import difference
+from app.bitmaps import empty_bitmap
+from app.bitmaps import full_bitmap
+from app.bitmaps import intersection
+from app.bitmaps import rows_to_bitmap
+from app.bitmaps import union
+
+
+def test_rows_to_bitmap_round_trip():
+    bitmap = rows_to_bitmap(np.array([9, 0, 3, 9]), 10)
+
+    assert bitmap.dtype == np.uint8
+    assert len(bitmap) == 2
+    assert bitmap_to_rows(bitmap, 10).tolist() == [0, 3, 9]
+    assert bitmap_to_rows(rows_to_bitmap(np.array([], dtype=int), 10), 10).tolist() == []
+
+
+def test_union():
+    bitmaps = [rows_to_bitmap(np.array([1]), 12), rows_to_bitmap(np.array([1, 11]), 12)]
+
+    assert bitmap_to_rows(union(bitmaps, 12), 12).tolist() == [1, 11]
+    assert (union([], 12) == empty_bitmap(12)).all()
+
+
+def test_intersection_and_difference():
+    a = rows_to_bitmap(np.array([0, 2, 10]), 11)
+    b = rows_to_bitmap(np.array([2, 3]), 11)
+
+    assert bitmap_to_rows(intersection(a, b), 11).tolist() == [2]
+    assert bitmap_to_rows(difference(a, b), 11).tolist() == [0, 10]
+    assert bitmap_to_rows(difference(full_bitmap(11), a), 11).tolist() == [1, 3, 4, 5, 6, 7, 8, 9]
+
+
+def test_bitsets_and_count():
+    # Row 0 has bits 1 (twice) and 9, row 1 none and row 2 bit 0
+    result = bitsets(np.array([0, 0, 2, 0]), np.array([1, 9, 0, 1]), 3, 10)
+
+    assert result.shape == (3, 2)
+    assert [bitmap_to_rows(row, 10).tolist() for row in result] == [[1, 9], [], [0]]
+    assert count(result).tolist() == [2, 0, 1]
+    assert bitsets(np.array([], dtype=int), np.array([], dtype=int), 2, 3).tolist() == [[0], [0]]
@@ -0,0 +1,123 @@
+import hashlib
+import os
+import pickle
+from unittest.mock import patch
+import pytest
+from app.cache import CACHE_SCHEMA_VERSION
+from app.cache import ProcessedDataCache
+from app.cache import file_digest
+from app.cache import is_digest
+from app.cache import load_pickle_with_digest
+
+
+ABC, DEF, FIRST, SECOND, THIRD = (
+    hashlib.sha256(name.encode()).hexdigest() for name in ["abc", "def", "first", "second", "third"]
+)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ProcessedDataCache(tmp_path / "cache", max_bytes=10**6)
+
+
+def test_file_digest(tmp_path):
+    path = tmp_path / "file.bin"
+    content = os.urandom(1024)
+    path.write_bytes(content)
+    assert file_digest(path) == hashlib.sha256(content).hexdigest()
+
+
+def test_load_pickle_with_digest(tmp_path):
+    path = tmp_path / "file.pkl"
+    data = {"gcf_data": list(range(1000)), "blob": os.urandom(1024)}
+    # Trailing bytes after the pickle are part of the digest as well
+    path.write_bytes(pickle.dumps(data, protocol=5) + b"trailing")
+
+    loaded, digest = load_pickle_with_digest(path)
+    assert loaded == data
+    assert digest == file_digest(path)
+
+    path.write_bytes(b"not a pickle")
+    with pytest.raises(pickle.UnpicklingError):
+        load_pickle_with_digest(path)
+
+
+def test_cache_store_and_load(cache):
+    assert cache.load(ABC) is None
+    assert ABC not in cache
+
+    cache.store(ABC, {"gcf_data": [1, 2, 3]})
+    assert ABC in cache
+    assert cache.load(ABC) == {"gcf_data": [1, 2, 3]}
+    assert cache.path_for(ABC).name == f"{ABC}.v{CACHE_SCHEMA_VERSION}.pkl"
+
+
+def test_cache_ignores_corrupt_and_stale_entries(cache):
+    cache.store(ABC, {"gcf_data": []})
+    cache.path_for(ABC).write_bytes(b"not a pickle")
+    assert cache.load(ABC) is None
+    assert ABC not in cache
+
+    # Entries written with another schema version are removed on the next write
+    stale = cache.cache_dir / f"{DEF}.v{CACHE_SCHEMA_VERSION - 1}.pkl"
+    stale.write_bytes(b"")
+    cache.store(ABC, {"gcf_data": []})
+    assert not stale.exists()
+
+
+def test_cache_size_bounded_eviction(tmp_path):
+    cache = ProcessedDataCache(tmp_path / "cache", max_bytes=5000)
+    payload = os.urandom(2000)
+    cache.store(FIRST, payload)
+    cache.store(SECOND, payload)
+    os.utime(cache.path_for(FIRST), (0, 0))
+    os.utime(cache.path_for(SECOND), (1, 1))
+
+    # Loading an entry marks it as recently used
+    assert cache.load(FIRST) == payload
+    cache.store(THIRD, payload)
+
+    assert FIRST in cache
+    assert SECOND not in cache
+    assert THIRD in cache
+
+
+@pytest.mark.skipif(not hasattr(os, "getuid"), reason="requires user IDs")
+def test_cache_is_private_to_the_user(cache):
+    cache.store(ABC, {"gcf_data": []})
+    assert cache.cache_dir.stat().st_mode & 0o777 == 0o700
+
+    # Entries owned by another user are never unpickled
+    with (
+        patch("app.cache.os.getuid", return_value=os.getuid() + 1),
+        patch("app.cache.pickle.load") as mock_load,
+    ):
+        assert cache.load(ABC) is None
+        with pytest.raises(PermissionError):
+            cache.store(DEF, {"gcf_data": []})
+    mock_load.assert_not_called()
+    assert cache.load(ABC) == {"gcf_data": []}
+
+
+@pytest.mark.parametrize("token", ["../x", "abc", ABC.upper(), ABC + "0", f"../{ABC}", None, 1])
+def test_cache_rejects_invalid_digests(cache, token):
+    """Digests come from the browser, other tokens never touch the filesystem."""
+    assert not is_digest(token)
+    cache.store(ABC, {"gcf_data": []})
+    outside = cache.cache_dir.parent / f"x.v{CACHE_SCHEMA_VERSION}.pkl"
+    outside.write_bytes(b"not a pickle")
+
+    with (
+        patch("app.cache.open", create=True) as mock_open,
+        patch("app.cache.Path.unlink") as mock_unlink,
+    ):
+        assert cache.load(token) is None
+        assert token not in cache
+        with pytest.raises(ValueError):
+            cache.path_for(token)
+        with pytest.raises(ValueError):
+            cache.store(token, {"gcf_data": []})
+    mock_open.assert_not_called()
+    mock_unlink.assert_not_called()
+    assert outside.exists()
+    assert cache.load(ABC) == {"gcf_data": []}
@@ -1,33 +1,53 @@
-import json
 import pickle
 import uuid
 from pathlib import Path
 from unittest.mock import patch
 import dash
 import dash_mantine_components as dmc
+import numpy as np
 import pandas as pd
 import pytest
 from dash_uploader import UploadStatus
+from app.cache import file_digest
+from app.callbacks import DATASET_REGISTRY
+from app.callbacks import PENDING_UPLOADS
+from app.callbacks import PROCESSED_DATA_CACHE
+from app.callbacks import RESULTS_REGISTRY
+from app.callbacks import TABLE_VIEWS
+from app.callbacks import app
+from app.callbacks import candidate_links_frame
 from app.callbacks import disable_tabs_and_reset_blocks
-from app.callbacks import gm_filter_add_block
+from app.callbacks import filter_query_rows
+from app.callbacks import filter_split_ids
+from app.callbacks import filter_split_mz
+from app.callbacks import get_dataset
 from app.callbacks import gm_filter_apply
 from app.callbacks import gm_generate_excel
-from app.callbacks import gm_table_select_rows
-from app.callbacks import gm_table_toggle_selection
+from app.callbacks import gm_plot
+from app.callbacks import gm_plot_figure
+from app.callbacks import gm_plot_show_members
 from app.callbacks import gm_table_update_datatable
-from app.callbacks import gm_toggle_download_button
+from app.callbacks import gm_table_update_selection
+from app.callbacks import gm_update_results_datatable
 from app.callbacks import load_demo_data
-from app.callbacks import mg_filter_add_block
 from app.callbacks import mg_filter_apply
 from app.callbacks import mg_generate_excel
-from app.callbacks import mg_table_select_rows
-from app.callbacks import mg_table_toggle_selection
 from app.callbacks import mg_table_update_datatable
 from app.callbacks import process_uploaded_data
 from app.callbacks import scoring_apply
+from app.callbacks import segment_order_selected_first
+from app.callbacks import select_top_k
+from app.callbacks import table_row_tooltip
+from app.callbacks import table_selected_rows
+from app.callbacks import table_selection
 from app.callbacks import upload_data
 from app.config import GM_RESULTS_TABLE_CHECKL_OPTIONAL_COLUMNS
 from app.config import MG_RESULTS_TABLE_CHECKL_OPTIONAL_COLUMNS
+from app.dataset import MF_COLUMNS
+from app.dataset import SPECTRUM_COLUMNS
+from app.dataset import CandidateLinks
+from app.dataset import Dataset
+from app.dataset import LinkTable
 from . import DATA_DIR
 
 
@@ -35,6 +55,14 @@ MOCK_FILE_PATH = DATA_DIR / "mock_obj_data.pkl"
 MOCK_FILE_PATH_NO_LINKS = DATA_DIR / "mock_obj_data_no_links.pkl"
 
 
+@pytest.fixture(autouse=True)
+def processed_data_cache_dir(tmp_path, monkeypatch):
+    # Keep the on-disk cache of processed uploads isolated for each test
+    cache_dir = tmp_path / "cache"
+    monkeypatch.setattr(PROCESSED_DATA_CACHE, "cache_dir", cache_dir)
+    return cache_dir
+
+
 @pytest.fixture
 def mock_uuid(monkeypatch):
     def mock_uuid4():
@@ -50,8 +78,8 @@ def processed_data():
 
 
 @pytest.fixture
-def sample_processed_data():
-    data = {
+def sample_data():
+    return {
         "gcf_data": [
             {
                 "GCF ID": "GCF_1",
@@ -90,8 +118,64 @@ def sample_processed_data():
                 "strains": ["Strain_2", "Strain_3"],
             },
         ],
+        "n_bgcs": {3: np.array([0]), 2: np.array([1])},
+        "class_bgcs": {"NRPS": np.array([0]), "PKS": np.array([0]), "RiPP": np.array([1])},
     }
-    return json.dumps(data)
+
+
+@pytest.fixture
+def sample_links_data():
+    # Two GCFs linked to two spectra, the first link is scored by two methods
+    dataset = Dataset(
+        gcfs=pd.DataFrame(
+            {
+                "GCF ID": ["1", "2"],
+                "# BGCs": [1, 1],
+                "BGC IDs": [["BGC_1"], ["BGC_2"]],
+                "BGC Classes": [[["NRPS"]], [["PKS"]]],
+                "strains": [["Strain_1", "Strain_3"], ["Strain_2"]],
+            }
+        ),
+        mfs=pd.DataFrame(columns=MF_COLUMNS),
+        spectra=pd.DataFrame(
+            {
+                "Spectrum ID": ["10", "11"],
+                "Precursor m/z": [150.5, 220.3],
+                "GNPS ID": ["GNPS_1", None],
+                "MF ID": ["5", None],
+                "strains": [["Strain_1"], ["Strain_2"]],
+            }
+        ),
+        n_bgcs={1: np.array([0, 1])},
+        class_bgcs={"NRPS": np.array([0]), "PKS": np.array([1])},
+        gm_links=LinkTable(
+            source=[0, 0, 1],
+            target=[0, 1, 1],
+            link=[0, 0, 1, 2],
+            method=[0, 1, 0, 0],
+            score=[5.0, 0.9, 3.0, 4.0],
+            cutoff=[0.0, 0.0, 0.0, 0.0],
+            standardised=[False, False, False, False],
+            methods=("metcalf", "rosetta"),
+        ),
+    )
+    token = DATASET_REGISTRY.register(dataset)
+    yield token
+    DATASET_REGISTRY.discard(token)
+
+
+@pytest.fixture
+def sample_processed_data(sample_data):
+    dataset = Dataset(
+        gcfs=pd.DataFrame(sample_data["gcf_data"]),
+        mfs=pd.DataFrame(sample_data["mf_data"]),
+        spectra=pd.DataFrame(columns=SPECTRUM_COLUMNS),
+        n_bgcs=sample_data["n_bgcs"],
+        class_bgcs=sample_data["class_bgcs"],
+    )
+    token = DATASET_REGISTRY.register(dataset)
+    yield token
+    DATASET_REGISTRY.discard(token)
 
 
 def test_upload_data():
@@ -106,6 +190,31 @@ def test_upload_data():
     assert path_string == str(MOCK_FILE_PATH)
 
 
+def test_upload_data_single_unpickle(tmp_path):
+    """The object graph loaded while validating the upload is reused for processing."""
+    upload = tmp_path / "upload.pkl"
+    upload.write_bytes(MOCK_FILE_PATH.read_bytes())
+    DATASET_REGISTRY.discard(file_digest(upload))
+
+    status = UploadStatus(
+        uploaded_files=[upload], n_total=1, uploaded_size_mb=5.39, total_size_mb=5.39
+    )
+    with (
+        patch("app.callbacks.pickle.load", wraps=pickle.load) as mock_load,
+        patch("app.callbacks.pickle.loads", wraps=pickle.loads) as mock_loads,
+        patch("app.callbacks.file_digest", wraps=file_digest) as mock_digest,
+    ):
+        _, path_string, _ = upload_data(status)
+        assert str(upload) in PENDING_UPLOADS
+        token, _, _ = process_uploaded_data(path_string, cleanup=False)
+
+    assert token == file_digest(upload)
+    assert mock_load.call_count + mock_loads.call_count == 1
+    # The digest is computed from the bytes read for unpickling, the file is read only once
+    assert mock_digest.call_count == 0
+    assert str(upload) not in PENDING_UPLOADS
+
+
 def test_load_demo_data():
     """Test the load_demo_data callback function."""
 
@@ -150,36 +259,31 @@ def test_process_uploaded_data_structure():
 
     assert processed_data is not None
     assert processed_links is not None
-    assert processed_data_no_links == processed_data
-    assert len(json.loads(processed_links_no_links)) == 0  # type: ignore
-
-    processed_data = json.loads(processed_data)
-    processed_links = json.loads(processed_links)
-
-    # Check overall structure
-    assert isinstance(processed_data, dict)
-    assert "n_bgcs" in processed_data
-    assert "gcf_data" in processed_data
-    assert "mf_data" in processed_data
-
-    # Add more specific assertions based on the expected content of your mock_obj_data.pkl
-    assert len(processed_data["n_bgcs"]) > 0
-    assert len(processed_data["gcf_data"]) > 0
-    assert len(processed_data["mf_data"]) > 0
+    # The stores only hold the token, the processed data stays on the server
+    assert processed_data == processed_links
+    assert isinstance(processed_data, str)
+    dataset = DATASET_REGISTRY.get(processed_data)
+    dataset_no_links = DATASET_REGISTRY.get(processed_data_no_links)
+    assert dataset is not None
+    assert dataset_no_links is not None
+    assert isinstance(dataset, Dataset)
+    pd.testing.assert_frame_equal(dataset_no_links.gcfs, dataset.gcfs)
+    pd.testing.assert_frame_equal(dataset_no_links.mfs, dataset.mfs)
+    assert dataset_no_links.gm_links is None
+    assert dataset_no_links.mg_links is None
+    assert processed_links_no_links == processed_data_no_links
 
     # Check n_bgcs structure
-    assert isinstance(processed_data["n_bgcs"], dict)
-    for key, value in processed_data["n_bgcs"].items():
-        assert isinstance(key, str)  # Keys should be strings (JSON converts int to str)
-        assert isinstance(value, list)
-
-    # Check gcf_data structure
-    assert isinstance(processed_data["gcf_data"], list)
-    for gcf in processed_data["gcf_data"]:
-        assert isinstance(gcf, dict)
-        assert "GCF ID" in gcf
-        assert "# BGCs" in gcf
-        assert "BGC Classes" in gcf
+    assert len(dataset.n_bgcs) > 0
+    for key, value in dataset.n_bgcs.items():
+        assert isinstance(key, int)
+        assert isinstance(value, np.ndarray)
+
+    # Check the entity tables, each entity is stored exactly once
+    assert list(dataset.gcfs.columns) == ["GCF ID", "# BGCs", "BGC IDs", "BGC Classes", "strains"]
+    assert len(dataset.gcfs) > 0
+    assert dataset.gcfs["GCF ID"].is_unique
+    for gcf in dataset.gcfs.to_dict("records"):
         assert isinstance(gcf["GCF ID"], str)
         assert isinstance(gcf["# BGCs"], int)
         assert isinstance(gcf["BGC Classes"], list)
@@ -189,13 +293,9 @@ def test_process_uploaded_data_structure():
             for cls in bgc_class:
                 assert isinstance(cls, str)
 
-    # Check mf_data structure
-    assert isinstance(processed_data["mf_data"], list)
-    for mf in processed_data["mf_data"]:
-        assert isinstance(mf, dict)
-        assert "MF ID" in mf
-        assert "# Spectra" in mf
-        assert "Spectra IDs" in mf
+    assert len(dataset.mfs) > 0
+    assert dataset.mfs["MF ID"].is_unique
+    for mf in dataset.mfs.to_dict("records"):
         assert isinstance(mf["MF ID"], str)
         assert isinstance(mf["# Spectra"], int)
         assert isinstance(mf["Spectra IDs"], list)
@@ -203,74 +303,32 @@ def test_process_uploaded_data_structure():
         assert isinstance(mf["Spectra GNPS IDs"], list)
         assert isinstance(mf["strains"], list)
 
-    # Check processed_links structure
-    assert isinstance(processed_links, dict)
-    assert "gm_data" in processed_links
-    assert "mg_data" in processed_links
-
-    # Check gm_data structure
-    assert isinstance(processed_links["gm_data"], dict)
-    expected_gm_keys = [
-        "gcf_id",
-        "spectrum",
-        "method",
-        "score",
-        "cutoff",
-        "standardised",
-    ]
-    for key in expected_gm_keys:
-        assert key in processed_links["gm_data"], f"Missing key '{key}' in gm_data"
-        assert isinstance(processed_links["gm_data"][key], list), f"gm_data[{key}] should be a list"
-
-    # Check that all gm_data lists have the same length
-    gm_list_lengths = [len(processed_links["gm_data"][key]) for key in expected_gm_keys]
-    assert all(length == gm_list_lengths[0] for length in gm_list_lengths), (
-        "GM link data lists have inconsistent lengths"
-    )
-
-    # Check spectrum structure in gm_data
-    if gm_list_lengths[0] > 0:  # Only if there are any GM links
-        for spectrum in processed_links["gm_data"]["spectrum"]:
-            assert isinstance(spectrum, dict)
-            assert "id" in spectrum
-            assert "precursor_mz" in spectrum
-            assert "gnps_id" in spectrum
-            assert "mf_id" in spectrum
-            assert "strains" in spectrum
-            assert isinstance(spectrum["strains"], list)
-
-    # Check mg_data structure
-    assert isinstance(processed_links["mg_data"], dict)
-    expected_mg_keys = [
-        "mf_id",
-        "gcf",
-        "method",
-        "score",
-        "cutoff",
-        "standardised",
-    ]
-    for key in expected_mg_keys:
-        assert key in processed_links["mg_data"], f"Missing key '{key}' in mg_data"
-        assert isinstance(processed_links["mg_data"][key], list), f"mg_data[{key}] should be a list"
-
-    # Check that all mg_data lists have the same length
-    mg_list_lengths = [len(processed_links["mg_data"][key]) for key in expected_mg_keys]
-    assert all(length == mg_list_lengths[0] for length in mg_list_lengths), (
-        "MG link data lists have inconsistent lengths"
-    )
-
-    # Check gcf structure in mg_data
-    if mg_list_lengths[0] > 0:  # Only if there are any MG links
-        for gcf in processed_links["mg_data"]["gcf"]:
-            assert isinstance(gcf, dict)
-            assert "id" in gcf
-            assert "# BGCs" in gcf
-            assert "BGC IDs" in gcf
-            assert "BGC Classes" in gcf
-            assert "strains" in gcf
-            assert isinstance(gcf["strains"], list)
-            assert isinstance(gcf["BGC IDs"], list)
-            assert isinstance(gcf["BGC Classes"], list)
+    assert list(dataset.spectra.columns) == SPECTRUM_COLUMNS
+    assert dataset.spectra["Spectrum ID"].is_unique
+    for strains in dataset.spectra["strains"]:
+        assert isinstance(strains, list)
+
+    # Check the link tables, which refer to the entity tables by row index
+    for links, sources, targets in [
+        (dataset.gm_links, dataset.gcfs, dataset.spectra),
+        (dataset.mg_links, dataset.mfs, dataset.gcfs),
+    ]:
+        assert isinstance(links, LinkTable)
+        assert len(links) > 0
+        for column in [links.source, links.target]:
+            assert column.dtype.kind == "i"
+        assert links.source.max() < len(sources)
+        assert links.target.max() < len(targets)
+        assert len(links.target) == len(links)
+        # Scores are stored in long format and refer to the links by index
+        assert links.link.max() < len(links)
+        assert links.method.max() < len(links.methods)
+        assert links.score.dtype == float
+        assert links.standardised.dtype == bool
+        assert all(
+            len(column) == links.n_scores
+            for column in [links.method, links.score, links.cutoff, links.standardised]
+        )
 
 
 def test_process_uploaded_data_cleanup(tmp_path):
@@ -292,6 +350,55 @@ def test_process_uploaded_data_cleanup(tmp_path):
     assert processed_data is not None  # Sanity check: function still processed the file
 
 
+def test_process_uploaded_data_cache(tmp_path):
+    """An identical upload is served from the cache without unpickling the file again."""
+    upload = tmp_path / "upload.pkl"
+    upload.write_bytes(MOCK_FILE_PATH.read_bytes())
+    # Other tests may already have registered the same file
+    DATASET_REGISTRY.discard(file_digest(upload))
+
+    status = UploadStatus(
+        uploaded_files=[upload], n_total=1, uploaded_size_mb=5.39, total_size_mb=5.39
+    )
+    _, path_string, _ = upload_data(status)
+    token, _, _ = process_uploaded_data(path_string, cleanup=False)
+    assert token is not None
+    assert token in PROCESSED_DATA_CACHE
+    expected = DATASET_REGISTRY.get(token)
+
+    # Forget the in-memory copy so the dataset has to come from disk
+    DATASET_REGISTRY.discard(token)
+    with patch("app.callbacks.pickle") as mock_pickle:
+        message, path_string, _ = upload_data(status)
+        assert message.startswith("Successfully uploaded")
+        cached_token, _, _ = process_uploaded_data(path_string, cleanup=True)
+        mock_pickle.load.assert_not_called()
+
+    assert cached_token == token
+    pd.testing.assert_frame_equal(DATASET_REGISTRY.get(token).gcfs, expected.gcfs)
+    assert not upload.exists()
+
+
+def test_process_uploaded_data_stale_token():
+    """A token that is no longer registered behaves like missing data."""
+    empty = ([], [], [], {"display": "none"}, [], [], None, 0, 0, None, table_selection(None))
+    result = gm_table_update_datatable("unknown-token", None, [], [], [], None)
+    assert result == empty
+    result = mg_table_update_datatable("unknown-token", None, [], [], [], None)
+    assert result == empty
+
+
+def test_get_dataset_rejects_paths(processed_data_cache_dir):
+    """Tokens from the browser that are not digests are never looked up on disk."""
+    processed_data_cache_dir.mkdir()
+    target = processed_data_cache_dir.parent / "x.pkl"
+    target.write_bytes(b"not a pickle")
+    with patch("app.callbacks.PROCESSED_DATA_CACHE.load") as mock_load:
+        assert get_dataset("../x") is None
+        mock_load.assert_not_called()
+    assert target.exists()
+
+
 def test_disable_tabs(mock_uuid):
     default_gm_column_value = (
         [GM_RESULTS_TABLE_CHECKL_OPTIONAL_COLUMNS[0]]
@@ -422,112 +529,434 @@ def test_disable_tabs(mock_uuid):
     assert mg_results_table_column_toggle == default_mg_column_value
 
 
-def test_scoring_apply_metcalf_raw():
-    """Test scoring_apply with Metcalf method and raw scores."""
-    # Create test DataFrame
-    df = pd.DataFrame(
-        {
-            "method": ["metcalf", "metcalf", "other"],
-            "standardised": [False, True, False],
-            "cutoff": [1.5, 2.0, 1.0],
-            "score": [2.0, 2.5, 1.5],
-        }
+@pytest.fixture
+def scoring_links():
+    return LinkTable(
+        source=[0, 1, 2, 3],
+        target=[0, 0, 0, 0],
+        link=[0, 1, 2, 3],
+        method=[0, 0, 1, 0],
+        score=[2.0, 2.5, 1.5, 3.0],
+        cutoff=[1.5, 2.0, 1.0, 1.0],
+        standardised=[False, True, False, False],
+        methods=("metcalf", "other"),
     )
 
-    # Test parameters
-    dropdown_menus = ["METCALF"]
-    radiobuttons = ["RAW"]
-    cutoffs_met = ["1.0"]
 
-    result = scoring_apply(df, dropdown_menus, radiobuttons, cutoffs_met)
+def test_scoring_apply_metcalf_raw(scoring_links):
+    """Test scoring_apply with Metcalf method and raw scores."""
+    rows = np.arange(scoring_links.n_scores)
+
+    result = scoring_apply(scoring_links, rows, ["METCALF"], ["RAW"], ["1.5"])
 
     assert len(result) == 1, "Should return one row"
-    assert result.iloc[0]["method"] == "metcalf", "Method should be metcalf"
-    assert not result.iloc[0]["standardised"], "Should be raw (not standardised)"
-    assert result.iloc[0]["cutoff"] >= 1.0, "Cutoff should be >= 1.0"
+    df = scoring_links.to_frame(result)
+    assert df.iloc[0]["method"] == "metcalf", "Method should be metcalf"
+    assert not df.iloc[0]["standardised"], "Should be raw (not standardised)"
+    assert df.iloc[0]["cutoff"] >= 1.5, "Cutoff should be >= 1.5"
 
+    # The cutoff bound is inclusive
+    result = scoring_apply(scoring_links, rows, ["METCALF"], ["RAW"], ["1.0"])
+    assert result.tolist() == [0, 3]
 
-def test_scoring_apply_metcalf_standardised():
-    """Test scoring_apply with Metcalf method and standardised scores."""
-    # Create test DataFrame
-    df = pd.DataFrame(
-        {
-            "method": ["metcalf", "metcalf", "other"],
-            "standardised": [False, True, False],
-            "cutoff": [1.5, 2.0, 1.0],
-            "score": [2.0, 2.5, 1.5],
-        }
-    )
 
-    # Test parameters
-    dropdown_menus = ["METCALF"]
-    radiobuttons = ["STANDARDISED"]
-    cutoffs_met = ["1.5"]
+def test_scoring_apply_metcalf_standardised(scoring_links):
+    """Test scoring_apply with Metcalf method and standardised scores."""
+    rows = np.arange(scoring_links.n_scores)
 
-    result = scoring_apply(df, dropdown_menus, radiobuttons, cutoffs_met)
+    result = scoring_apply(scoring_links, rows, ["METCALF"], ["STANDARDISED"], ["1.5"])
 
     assert len(result) == 1, "Should return one row"
-    assert result.iloc[0]["method"] == "metcalf", "Method should be metcalf"
-    assert result.iloc[0]["standardised"], "Should be standardised"
-    assert result.iloc[0]["cutoff"] >= 1.5, "Cutoff should be >= 1.5"
+    df = scoring_links.to_frame(result)
+    assert df.iloc[0]["method"] == "metcalf", "Method should be metcalf"
+    assert df.iloc[0]["standardised"], "Should be standardised"
+    assert df.iloc[0]["cutoff"] >= 1.5, "Cutoff should be >= 1.5"
+
+
+def test_scoring_apply_subset_and_blocks(scoring_links):
+    """Only the given rows are filtered, and a row is kept if it matches any block."""
+    result = scoring_apply(scoring_links, np.array([1, 2, 3]), ["METCALF"], ["RAW"], [None])
+    assert result.tolist() == [3]
+
+    result = scoring_apply(
+        scoring_links,
+        np.arange(scoring_links.n_scores),
+        ["METCALF", "METCALF"],
+        ["RAW", "STANDARDISED"],
+        ["1.5", None],
+    )
+    assert result.tolist() == [0, 1]
 
 
-def test_scoring_apply_empty_inputs():
+def test_scoring_apply_empty_inputs(scoring_links):
     """Test scoring_apply with empty inputs."""
-    df = pd.DataFrame(
-        {"method": ["metcalf"], "standardised": [False], "cutoff": [1.0], "score": [2.0]}
+    rows = np.arange(scoring_links.n_scores)
+
+    result = scoring_apply(scoring_links, rows, [], [], [])
+
+    assert result.tolist() == rows.tolist(), "Should return all rows unfiltered"
+
+
+def test_gm_update_results_datatable_multiple_methods(sample_links_data):
+    """Links scored by several methods are reported once per matching score."""
+    with patch("app.callbacks.ctx") as mock_ctx:
+        mock_ctx.triggered_id = "gm-results-button"
+        result = gm_update_results_datatable(
+            1,
+            table_selection(None, rows=[1, 0]),
+            sample_links_data,
+            ["METCALF"],
+            ["RAW"],
+            [None],
+            "best",
+        )
+
+    alert_message, _, results, tooltip_data, _, _, _, _, results_data = result
+    assert alert_message == ""
+    assert [(r["GCF ID"], r["# Links"], r["Top Spectrum ID"]) for r in results] == [
+        (1, 2, 10),
+        (2, 1, 11),
+    ]
+    assert results[0]["Top Spectrum MF ID"] == 5
+    assert results[1]["Top Spectrum GNPS ID"] == "None"
+    assert [r["BGC Classes"] for r in results] == ["NRPS", "PKS"]
+    assert "| 10 | 5 | 5.0 |" in tooltip_data[0]["# Links"]["value"]
+
+    # The strains of each listed GCF and spectrum are compared
+    assert [
+        (r["# Shared Strains"], r["# Strains Only in GCF"], r["# Strains Only in Spectrum"])
+        for r in results
+    ] == [(1, 1, 0), (1, 0, 0)]
+    assert "| Strain_1 |" in tooltip_data[0]["# Shared Strains"]["value"]
+    assert "| Strain_2 |" in tooltip_data[1]["# Shared Strains"]["value"]
+
+    # The listed links are kept server-side and gathered from the link table
+    detailed_df = candidate_links_frame(
+        DATASET_REGISTRY.get(sample_links_data),
+        RESULTS_REGISTRY.get(results_data["token"]),
+        ["1", "2"],
+    )
+    assert detailed_df["GCF ID"].tolist() == [1, 1, 2]
+    assert detailed_df["Spectrum ID"].tolist() == [10, 11, 11]
+    assert detailed_df["MF ID"].iloc[0] == 5
+    assert pd.isna(detailed_df["MF ID"].iloc[1])
+    assert detailed_df["Score"].tolist() == [5.0, 3.0, 4.0]
+    assert detailed_df["GNPS ID"].tolist() == ["GNPS_1", "None", "None"]
+
+
+def test_candidate_links_frame_mg(sample_processed_data):
+    """The BGC classes of the MG candidate links are listed as in the results table."""
+    dataset = DATASET_REGISTRY.get(sample_processed_data)
+    dataset.mg_links = LinkTable(
+        source=[0, 1],
+        target=[1, 0],
+        link=[0, 1],
+        method=[0, 0],
+        score=[2.0, 3.0],
+        cutoff=[0.0, 0.0],
+        standardised=[False, False],
+        methods=("metcalf",),
+    )
+    candidates = CandidateLinks(
+        dataset_token=sample_processed_data,
+        prefix="mg",
+        item_ids=np.array(["MF_1", "MF_2"]),
+        rows=np.array([0, 1]),
+        bounds=np.array([0, 1, 2]),
     )
 
-    result = scoring_apply(df, [], [], [])
+    detailed_df = candidate_links_frame(dataset, candidates, ["MF_2", "MF_1"])
+    assert detailed_df["GCF ID"].tolist() == ["GCF_2", "GCF_1"]
+    assert detailed_df["BGC Classes"].tolist() == ["RiPP, Terpene", "NRPS, PKS"]
+    assert detailed_df["BGC Classes"].tolist() == [
+        dataset.table_frame("gcfs")["BGC Classes"].iloc[row] for row in (1, 0)
+    ]
 
-    assert len(result) == 1, "Should return original DataFrame"
-    assert result.equals(df), "Should return unmodified DataFrame"
 
+def test_gm_update_results_datatable_ties(sample_links_data):
+    """All links tying for the highest score of an item are reported."""
+    dataset = DATASET_REGISTRY.get(sample_links_data)
+    dataset.gm_links = LinkTable(
+        source=[1, 0, 0],
+        target=[1, 0, 1],
+        link=[0, 1, 2],
+        method=[0, 0, 0],
+        score=[1.0, 4.0, 4.0],
+        cutoff=[0.0, 0.0, 0.0],
+        standardised=[False, False, False],
+        methods=("metcalf",),
+    )
+    with patch("app.callbacks.ctx") as mock_ctx:
+        mock_ctx.triggered_id = "gm-results-button"
+        result = gm_update_results_datatable(
+            1,
+            table_selection(None, rows=[1, 0]),
+            sample_links_data,
+            ["METCALF"],
+            ["RAW"],
+            [None],
+            "best",
+        )
 
-# ----------------- GM tab tests -----------------
-@pytest.mark.parametrize(
-    "n_clicks, initial_blocks, expected_result",
-    [
-        ([], ["block1"], pytest.raises(dash.exceptions.PreventUpdate)),  # no buttons clicked
-        ([1], ["block1", "block2"], ["block1", "block2", "test-uuid"]),  # one button clicked once
+    _, _, results, tooltip_data, _, _, _, _, results_data = result
+    assert [
         (
-            [1, 1, 1],
-            ["block1", "block2"],
-            ["block1", "block2", "test-uuid"],
-        ),  # three buttons, each clicked once
-    ],
-)
-def test_gm_filter_add_block(mock_uuid, n_clicks, initial_blocks, expected_result):
-    if isinstance(expected_result, list):
-        result = gm_filter_add_block(n_clicks, initial_blocks)
-        assert result == expected_result
-    else:
-        with expected_result:
-            gm_filter_add_block(n_clicks, initial_blocks)
+            r["GCF ID"],
+            r["# Links"],
+            r["Average Score"],
+            r["Top Spectrum ID"],
+            r["Top Spectrum Score"],
+        )
+        for r in results
+    ] == [(1, 2, 4.0, 10, 4.0), (1, 2, 4.0, 11, 4.0), (2, 1, 1.0, 11, 1.0)]
+    assert len(tooltip_data) == 3
+    candidates = RESULTS_REGISTRY.get(results_data["token"])
+    assert candidates.item_ids.tolist() == ["1", "2"]
+    assert dataset.gm_links.score[candidates.item_rows("1")].tolist() == [4.0, 4.0]
+    assert dataset.gm_links.target[dataset.gm_links.link[candidates.item_rows("2")]].tolist() == [1]
+
+
+def test_gm_update_results_datatable_top_k(sample_links_data):
+    """In top-k mode the k best candidates of each item are reported, best first."""
+    with patch("app.callbacks.ctx") as mock_ctx:
+        mock_ctx.triggered_id = "gm-results-button"
+        result = gm_update_results_datatable(
+            1,
+            table_selection(None, rows=[1, 0]),
+            sample_links_data,
+            ["METCALF"],
+            ["RAW"],
+            [None],
+            "3",
+        )
+
+    _, _, results, _, _, _, _, _, results_data = result
+    assert [(r["GCF ID"], r["# Links"], r["Top Spectrum Score"]) for r in results] == [
+        (1, 2, 5.0),
+        (1, 2, 3.0),
+        (2, 1, 4.0),
+    ]
+    candidates = RESULTS_REGISTRY.get(results_data["token"])
+    gm_links = DATASET_REGISTRY.get(sample_links_data).gm_links
+    assert gm_links.score[candidates.item_rows("1")].tolist() == [5.0, 3.0]
+
+    # All candidates are kept, not only the listed ones
+    with patch("app.callbacks.ctx") as mock_ctx:
+        mock_ctx.triggered_id = "gm-results-button"
+        result = gm_update_results_datatable(
+            1,
+            table_selection(None, rows=[1, 0]),
+            sample_links_data,
+            ["METCALF"],
+            ["RAW"],
+            [None],
+            "1",
+        )
+
+    _, _, results, tooltip_data, _, _, _, _, results_data = result
+    assert [(r["GCF ID"], r["Top Spectrum Score"]) for r in results] == [(1, 5.0), (2, 4.0)]
+    # The tooltips list the sorted best candidates and count the others
+    assert "| 11 | None | 3.0 |" not in tooltip_data[0]["# Links"]["value"]
+    assert "... 1 more entries ..." in tooltip_data[0]["# Links"]["value"]
+    candidates = RESULTS_REGISTRY.get(results_data["token"])
+    assert gm_links.score[candidates.item_rows("1")].tolist() == [5.0, 3.0]
+
+
+def test_gm_update_results_datatable_select_all(sample_links_data):
+    """Selecting all rows matching the filters sends a handle on the view, not the rows."""
+    with patch("app.callbacks.ctx") as mock_ctx:
+        mock_ctx.triggered_id = None
+        view_data = gm_table_update_datatable(sample_links_data, None, [], [], [], None)[9]
+        view_token = view_data["token"]
+
+        mock_ctx.triggered_id = "gm-results-button"
+        # All rows but the deselected second GCF
+        selection = table_selection(view_token, select_all=True, rows=[1])
+        result = gm_update_results_datatable(
+            1, selection, sample_links_data, ["METCALF"], ["RAW"], [None], "best"
+        )
+        assert [r["GCF ID"] for r in result[2]] == [1]
+
+        # The view is rebuilt from the view store if this process no longer holds it
+        TABLE_VIEWS.discard(view_token)
+        result = gm_update_results_datatable(
+            1, selection, sample_links_data, ["METCALF"], ["RAW"], [None], "best", view_data
+        )
+        assert [r["GCF ID"] for r in result[2]] == [1]
+
+        # The rows of an unknown view can no longer be resolved
+        selection = table_selection("unknown-token", select_all=True)
+        result = gm_update_results_datatable(
+            1, selection, sample_links_data, ["METCALF"], ["RAW"], [None], "best"
+        )
+        assert "no longer available" in result[0]
+        assert result[2] == []
+
+
+def test_select_top_k():
+    scores = np.array([1.0, 5.0, 3.0, 4.0, 2.0, 7.0, 6.0])
+    segment_bounds = np.array([0, 5, 7])
+    assert select_top_k(scores, segment_bounds, 2).tolist() == [1, 3, 5, 6]
+    assert select_top_k(scores, segment_bounds, 1).tolist() == [1, 5]
+    # Segments with at most k scores are kept whole, sorted by descending score
+    assert select_top_k(scores, segment_bounds, 10).tolist() == [1, 3, 2, 4, 0, 5, 6]
+
+
+@pytest.mark.parametrize("k", [1, 2, 3, 5])
+def test_select_top_k_matches_full_sort(k):
+    """The selected scores are those of a full sort, with ties and segments shorter than k."""
+    rng = np.random.default_rng(0)
+    counts = np.array([6, 1, 0, 2, 9, 4])
+    segment_bounds = np.concatenate([[0], np.cumsum(counts)])
+    # Few distinct values, so that segments have ties
+    scores = rng.integers(0, 3, segment_bounds[-1]).astype(float)
+    segment_ids = np.repeat(np.arange(len(counts)), counts)
+
+    selected = select_top_k(scores, segment_bounds, k)
+    order = np.lexsort((-scores, segment_ids))
+    ranks = np.arange(len(order)) - segment_bounds[segment_ids[order]]
+    reference = order[ranks < k]
+    assert segment_ids[selected].tolist() == segment_ids[reference].tolist()
+    assert scores[selected].tolist() == scores[reference].tolist()
+
+    # The selected indices lead their segment, the others follow them
+    order, n_selected = segment_order_selected_first(segment_bounds, selected)
+    assert n_selected.tolist() == np.minimum(counts, k).tolist()
+    assert sorted(order.tolist()) == list(range(len(scores)))
+    assert segment_ids[order].tolist() == segment_ids.tolist()
+    heads = np.arange(len(order)) - segment_bounds[segment_ids] < n_selected[segment_ids]
+    assert order[heads].tolist() == selected.tolist()
+
+
+# ----------------- GM tab tests -----------------
+def test_filter_split_ids():
+    assert filter_split_ids("1, 2,3") == ["1", "2", "3"]
+    assert filter_split_ids("1;2\n3\t 4") == ["1", "2", "3", "4"]
+    assert filter_split_ids("100 - 250, BGC0001*") == ["100-250", "BGC0001*"]
+    assert filter_split_ids(" , ") == []
+    assert filter_split_ids(None) == []
+
+
+def test_filter_split_mz():
+    assert filter_split_mz("301.14, 455.2\n200") == [301.14, 455.2, 200.0]
+    assert filter_split_mz("301.14, abc") == [301.14]
+    assert filter_split_mz(None) == []
 
 
 def test_gm_filter_apply(sample_processed_data):
-    data = json.loads(sample_processed_data)
-    df = pd.DataFrame(data["gcf_data"])
+    dataset = DATASET_REGISTRY.get(sample_processed_data)
 
     # Test GCF_ID filter
-    gcf_ids = df["GCF ID"].iloc[:2].tolist()
-    filtered_df = gm_filter_apply(df, ["GCF_ID"], [",".join(gcf_ids)], [[]])
-    assert len(filtered_df) == 2
-    assert set(filtered_df["GCF ID"]) == set(gcf_ids)
-
-    # Test BGC_CLASS filter
-    bgc_class = df["BGC Classes"].iloc[0][0][0]  # Get first class from nested structure
-    filtered_df = gm_filter_apply(df, ["BGC_CLASS"], [""], [[bgc_class]])
-    assert len(filtered_df) > 0
-    assert any(
-        bgc_class in [cls for sublist in classes for cls in sublist]
-        for classes in filtered_df["BGC Classes"]
+    rows = gm_filter_apply(dataset, ["GCF_ID"], ["GCF_1, GCF_2"], [[]])
+    assert rows.tolist() == [0, 1]
+
+    # Test GCF_ID prefix filter
+    rows = gm_filter_apply(dataset, ["GCF_ID"], ["GCF_2*"], [[]])
+    assert rows.tolist() == [1]
+
+    # Test strain filters
+    rows = gm_filter_apply(dataset, ["STRAIN"], ["Strain_2, unknown"], [[]])
+    assert rows.tolist() == [0]
+    rows = gm_filter_apply(dataset, ["STRAIN"], ["Strain_3"], [[]])
+    assert rows.tolist() == [0, 1]
+    rows = gm_filter_apply(dataset, ["MIN_STRAINS"], ["2"], [[]])
+    assert rows.tolist() == [0]
+
+    # Test BGC_CLASS filter, classes are matched regardless of case
+    rows = gm_filter_apply(dataset, ["BGC_CLASS"], [""], [["PKS"]])
+    assert rows.tolist() == [0]
+    rows = gm_filter_apply(dataset, ["BGC_CLASS"], [""], [["RIPP", "UNKNOWN"]])
+    assert rows.tolist() == [1]
+
+    # Blocks are combined with OR by default
+    rows = gm_filter_apply(dataset, ["GCF_ID", "BGC_CLASS"], ["GCF_2", ""], [[], ["NRPS"]])
+    assert rows.tolist() == [0, 1]
+
+    # Blocks are combined in order with their operators
+    menus = ["BGC_CLASS", "GCF_ID", "GCF_ID"]
+    rows = gm_filter_apply(
+        dataset, menus, ["", "GCF_1", "GCF_2"], [["NRPS"], [], []], ["AND", "OR"]
     )
+    assert rows.tolist() == [0, 1]
+    rows = gm_filter_apply(dataset, menus, ["", "GCF_1", "GCF_2"], [["NRPS"], [], []], ["AND_NOT"])
+    assert rows.tolist() == [1]
+    # Blocks without input are left out, AND NOT in front of the first one excludes its rows
+    rows = gm_filter_apply(dataset, menus, ["", "", "GCF_2"], [[], [], []], ["AND", "AND_NOT"])
+    assert rows.tolist() == [0]
 
     # Test no filter
-    filtered_df = gm_filter_apply(df, [], [], [])
-    assert len(filtered_df) == len(df)
+    rows = gm_filter_apply(dataset, [], [], [])
+    assert rows.tolist() == [0, 1]
+
+
+def test_gm_plot(sample_processed_data):
+    fig, graph_style, selector_style = gm_plot(sample_processed_data, "n_bgcs")
+    assert fig["data"][0]["x"] == [2, 3]
+    assert fig["data"][0]["y"] == [1, 1]
+    assert fig["data"][0]["text"][1] == "# GCFs: 1<br>GCF IDs: GCF_1"
+    assert graph_style == {"display": "block"}
+    # Figures are cached per dataset and x-axis
+    assert gm_plot(sample_processed_data, "n_bgcs")[0] is fig
+
+    fig, _, _ = gm_plot(sample_processed_data, "class_bgcs")
+    counts = dict(zip(fig["data"][0]["x"], fig["data"][0]["y"]))
+    assert counts == {"NRPS": 1, "PKS": 1, "RiPP": 1}
+
+    assert gm_plot(None, "n_bgcs") == ({}, {"display": "none"}, {"display": "none"})
+
+    # Unknown datasets are not cached, the figure is made once the dataset is available
+    with pytest.raises(KeyError):
+        gm_plot_figure("unknown-token", "n_bgcs")
+    with patch(
+        "app.callbacks.get_dataset", return_value=DATASET_REGISTRY.get(sample_processed_data)
+    ):
+        assert gm_plot_figure("unknown-token", "n_bgcs")["data"][0]["x"] == [2, 3]
+
+
+def test_gm_plot_hover_text_is_capped():
+    gcf_ids = [f"GCF_{i}" for i in range(25)]
+    dataset = Dataset(
+        gcfs=pd.DataFrame(
+            {
+                "GCF ID": gcf_ids,
+                "# BGCs": [1] * 25,
+                "BGC IDs": [["BGC"]] * 25,
+                "BGC Classes": [[["NRPS"]]] * 25,
+                "strains": [[]] * 25,
+            }
+        ),
+        mfs=pd.DataFrame(columns=MF_COLUMNS),
+        spectra=pd.DataFrame(columns=SPECTRUM_COLUMNS),
+        n_bgcs={1: np.arange(25)},
+        class_bgcs={"NRPS": np.arange(25)},
+    )
+    token = DATASET_REGISTRY.register(dataset)
+    fig, _, _ = gm_plot(token, "class_bgcs")
+    assert fig["data"][0]["y"] == [25]
+    assert fig["data"][0]["text"][0] == (
+        "Class: NRPS<br># GCFs: 25<br>GCF IDs: "
+        + ", ".join(gcf_ids[:10])
+        + ", ... (15 more, click to list all)"
+    )
+
+    # The full list is shown when the bar is clicked
+    with patch("app.callbacks.ctx") as mock_ctx:
+        mock_ctx.triggered_id = "gm-graph"
+        members, style = gm_plot_show_members({"points": [{"x": "NRPS"}]}, token, "class_bgcs")
+        assert style == {"display": "block"}
+        assert members[0].children == "GCFs with BGC class NRPS (25)"
+        assert members[1].children == ", ".join(sorted(gcf_ids))
+
+        members, style = gm_plot_show_members({"points": [{"x": 1}]}, token, "n_bgcs")
+        assert members[0].children == "GCFs with 1 BGCs (25)"
+
+        # Changing the x-axis hides the list
+        mock_ctx.triggered_id = "gm-graph-x-axis-selector"
+        assert gm_plot_show_members({"points": [{"x": 1}]}, token, "n_bgcs") == (
+            [],
+            {"display": "none"},
+        )
+    DATASET_REGISTRY.discard(token)
 
 
 def test_gm_table_update_datatable(sample_processed_data):
@@ -543,13 +972,29 @@ def test_gm_table_update_datatable(sample_processed_data):
             None,  # checkbox_value
         )
 
-        assert len(result) == 7
-        data, columns, tooltip_data, style, selected_rows, checkbox_value, _ = result
-
-        # Check data
+        assert len(result) == 11
+        (
+            data,
+            columns,
+            tooltip_data,
+            style,
+            selected_rows,
+            checkbox_value,
+            _,
+            page_count,
+            page_current,
+            view_data,
+            selection,
+        ) = result
+        view_token = view_data["token"]
+
+        # Check data, each record carries its row in the dataset
         assert len(data) == 2
         assert data[0]["GCF ID"] == "GCF_1"
+        assert data[0]["BGC Classes"] == "NRPS, PKS"
         assert data[1]["GCF ID"] == "GCF_2"
+        assert [row["id"] for row in data] == [0, 1]
+        assert len(tooltip_data) == 2
 
         # Check columns
         assert len(columns) == 4
@@ -563,13 +1008,30 @@ def test_gm_table_update_datatable(sample_processed_data):
 
         # Check selected_rows
         assert selected_rows == []
+        assert selection == table_selection(view_token, n_rows=2)
 
         # Check checkbox_value
         assert checkbox_value == []
 
+        # Check paging, the rows are kept server-side
+        assert (page_count, page_current) == (1, 0)
+        assert TABLE_VIEWS.get(view_token).rows.tolist() == [0, 1]
+
         # Test with None input
         result = gm_table_update_datatable(None, None, [], [], [], None)
-        assert result == ([], [], [], {"display": "none"}, [], [], None)
+        assert result == (
+            [],
+            [],
+            [],
+            {"display": "none"},
+            [],
+            [],
+            None,
+            0,
+            0,
+            None,
+            table_selection(None),
+        )
 
         # Test with apply-filters-button triggered
         mock_ctx.triggered_id = "gm-filter-apply-button"
@@ -577,70 +1039,334 @@ def test_gm_table_update_datatable(sample_processed_data):
             sample_processed_data,
             1,  # n_clicks
             ["GCF_ID"],  # dropdown_menus
-            ["GCF_1"],  # text_inputs
+            ["GCF_2"],  # text_inputs
             [[]],  # bgc_class_dropdowns
             ["disabled"],  # checkbox_value
         )
 
-        data, columns, tooltip_data, style, selected_rows, checkbox_value, _ = result
+        data, _, _, _, _, checkbox_value, _, _, _, filtered_view, _ = result
         assert len(data) == 1
-        assert data[0]["GCF ID"] == "GCF_1"
+        assert data[0]["GCF ID"] == "GCF_2"
+        assert data[0]["id"] == 1
         assert checkbox_value == []
+        assert filtered_view["token"] != view_token
+
+        # Test with a bar of the GM plot clicked, the table shows the GCFs of that bar
+        mock_ctx.triggered_id = "gm-graph"
+        result = gm_table_update_datatable(
+            sample_processed_data,
+            1,
+            ["GCF_ID"],
+            ["GCF_2"],
+            [[]],
+            ["disabled"],
+            click_data={"points": [{"x": "NRPS"}]},
+            x_axis_selection="class_bgcs",
+        )
+        data, _, _, _, _, checkbox_value, _, _, _, bucket_view, selection = result
+        assert [row["GCF ID"] for row in data] == ["GCF_1"]
+        assert checkbox_value == []
+        assert TABLE_VIEWS.get(bucket_view["token"]).rows.tolist() == [0]
+        assert selection == table_selection(bucket_view["token"], n_rows=1)
+
+        result = gm_table_update_datatable(
+            sample_processed_data,
+            1,
+            [],
+            [],
+            [],
+            None,
+            click_data={"points": [{"x": 2}]},
+            x_axis_selection="n_bgcs",
+        )
+        assert [row["GCF ID"] for row in result[0]] == ["GCF_2"]
+
+
+def test_gm_table_update_datatable_pages(sample_processed_data):
+    """Paging and sorting gather the requested page of the stored rows."""
+    with patch("app.callbacks.ctx") as mock_ctx:
+        mock_ctx.triggered_id = None
+        result = gm_table_update_datatable(sample_processed_data, None, [], [], [], None, 0, 1)
+        view_data = result[9]
+        view_token = view_data["token"]
+
+        # The second page, with the selection of all pages
+        mock_ctx.triggered_id = "gm-table"
+        result = gm_table_update_datatable(
+            sample_processed_data,
+            None,
+            [],
+            [],
+            [],
+            None,
+            1,
+            1,
+            [],
+            view_data,
+            table_selection(view_token, rows=[1]),
+        )
+        (
+            data,
+            _,
+            tooltip_data,
+            _,
+            selected_rows,
+            checkbox,
+            _,
+            page_count,
+            page_current,
+            paged_view,
+            ids,
+        ) = result
+        assert [row["GCF ID"] for row in data] == ["GCF_2"]
+        assert "| BGC_3 | Terpene |" in tooltip_data[0]["# BGCs"]["value"]
+        assert selected_rows == [0]
+        assert (page_count, page_current) == (2, 1)
+        # The view, the selection and the select-all checkbox are kept while paging
+        assert paged_view == view_data
+        assert ids is dash.no_update
+        assert checkbox is dash.no_update
+
+        # Sorting by descending number of BGCs
+        sort_by = [{"column_id": "# BGCs", "direction": "desc"}]
+        result = gm_table_update_datatable(
+            sample_processed_data, None, [], [], [], None, 0, 2, sort_by, view_data, []
+        )
+        assert [row["GCF ID"] for row in result[0]] == ["GCF_1", "GCF_2"]
+        sort_by = [{"column_id": "GCF ID", "direction": "desc"}]
+        result = gm_table_update_datatable(
+            sample_processed_data, None, [], [], [], None, 0, 2, sort_by, view_data, []
+        )
+        assert [row["GCF ID"] for row in result[0]] == ["GCF_2", "GCF_1"]
+        assert result[5] is dash.no_update
+
+        # Pages beyond the last one show the last page
+        result = gm_table_update_datatable(
+            sample_processed_data, None, [], [], [], None, 5, 1, [], view_data, []
+        )
+        assert result[8] == 1
 
 
-def test_gm_table_toggle_selection(sample_processed_data):
-    data = json.loads(sample_processed_data)
-    original_rows = data["gcf_data"]
-    filtered_rows = original_rows[:2]
+def test_gm_table_update_datatable_restores_view(sample_processed_data):
+    """A view no longer held in memory is rebuilt from the filters kept in the view store."""
+    with patch("app.callbacks.ctx") as mock_ctx:
+        mock_ctx.triggered_id = "gm-filter-apply-button"
+        result = gm_table_update_datatable(
+            sample_processed_data, 1, ["GCF_ID"], ["GCF_2"], [[]], None, 0, 10
+        )
+        view_data = result[9]
+        assert view_data["filter"]["text_inputs"] == ["GCF_2"]
+        # As if the view was evicted, or built by another worker
+        TABLE_VIEWS.discard(view_data["token"])
+
+        mock_ctx.triggered_id = "gm-table"
+        selection = table_selection(view_data["token"], select_all=True, n_rows=1)
+        result = gm_table_update_datatable(
+            sample_processed_data, None, [], [], [], None, 0, 10, [], view_data, selection
+        )
+        assert [row["GCF ID"] for row in result[0]] == ["GCF_2"]
+        assert result[4] == [0]
+        assert result[9] == view_data
+        assert TABLE_VIEWS.get(view_data["token"]).rows.tolist() == [1]
+
+        # A clicked bar of the GM plot is rebuilt as well
+        mock_ctx.triggered_id = "gm-graph"
+        view_data = gm_table_update_datatable(
+            sample_processed_data,
+            None,
+            [],
+            [],
+            [],
+            None,
+            click_data={"points": [{"x": 3}]},
+            x_axis_selection="n_bgcs",
+        )[9]
+        TABLE_VIEWS.discard(view_data["token"])
+        selection = table_selection(view_data["token"], select_all=True, n_rows=1)
+        assert table_selected_rows(selection, view_data).tolist() == [0]
+
+
+@pytest.mark.parametrize(
+    "filter_query, expected",
+    [
+        ('{BGC Classes} contains "NRPS"', [0]),
+        ("{BGC Classes} contains nrps", []),
+        ("{BGC Classes} icontains nrps", [0]),
+        ("{# BGCs} >= 2", [0, 1]),
+        ("{# BGCs} gt 2", [0]),
+        ("{# BGCs} = 2 && {GCF ID} != GCF_1", [1]),
+        ("{GCF ID} i= gcf_2", [1]),
+        ("{GCF ID} datestartswith GCF", [0, 1]),
+        # Values that are not numbers never match a numeric comparison
+        ("{GCF ID} < 5", []),
+    ],
+)
+def test_filter_query_rows(sample_processed_data, filter_query, expected):
+    dataset = DATASET_REGISTRY.get(sample_processed_data)
+    assert filter_query_rows(dataset, "gcfs", filter_query).tolist() == expected
+
+
+def test_filter_query_rows_ignores_invalid_expressions(sample_processed_data):
+    dataset = DATASET_REGISTRY.get(sample_processed_data)
+    assert filter_query_rows(dataset, "gcfs", None) is None
+    assert filter_query_rows(dataset, "gcfs", "") is None
+    assert filter_query_rows(dataset, "gcfs", "{Unknown} = 1 && # BGCs > 1") is None
+    assert filter_query_rows(dataset, "mfs", "{Unknown} = 1 && {# Spectra} > 2").tolist() == [1]
+
+
+def test_gm_table_update_datatable_filter_query(sample_processed_data):
+    """The filter row further restricts the rows of the applied filters, kept with the view."""
+    with patch("app.callbacks.ctx") as mock_ctx:
+        mock_ctx.triggered_id = "gm-filter-apply-button"
+        result = gm_table_update_datatable(
+            sample_processed_data, 1, ["BGC_CLASS"], [""], [["NRPS", "RiPP"]], None, 0, 10
+        )
+        view_data = result[9]
+        assert [row["GCF ID"] for row in result[0]] == ["GCF_1", "GCF_2"]
+
+        mock_ctx.triggered_id = "gm-table"
+        filter_query = "{# BGCs} < 3"
+        result = gm_table_update_datatable(
+            sample_processed_data,
+            1,
+            [],
+            [],
+            [],
+            None,
+            view_data=view_data,
+            filter_query=filter_query,
+        )
+        assert [row["GCF ID"] for row in result[0]] == ["GCF_2"]
+        assert result[5] == []
+        assert result[10]["n_rows"] == 1
+        view_data = result[9]
+        assert view_data["filter"]["bgc_class_dropdowns"] == [["NRPS", "RiPP"]]
+        assert view_data["query"] == filter_query
+
+        # Paging keeps the view, which is rebuilt with its filter query if needed
+        TABLE_VIEWS.discard(view_data["token"])
+        selection = result[10]
+        result = gm_table_update_datatable(
+            sample_processed_data,
+            1,
+            [],
+            [],
+            [],
+            None,
+            view_data=view_data,
+            selection=selection,
+            filter_query=filter_query,
+        )
+        assert [row["GCF ID"] for row in result[0]] == ["GCF_2"]
+        assert result[9] == view_data
 
-    # Test selecting all rows
-    result = gm_table_toggle_selection(["disabled"], original_rows, filtered_rows)
-    assert result == [0, 1]  # Assuming it now returns a list of indices directly
+        # Clearing the filter row shows the rows of the applied filters again
+        result = gm_table_update_datatable(
+            sample_processed_data, 1, [], [], [], None, view_data=view_data
+        )
+        assert [row["GCF ID"] for row in result[0]] == ["GCF_1", "GCF_2"]
 
-    # Test deselecting all rows
-    result = gm_table_toggle_selection([], original_rows, filtered_rows)
-    assert result == []
 
-    # Test with None filtered_rows
-    result = gm_table_toggle_selection(["disabled"], original_rows, None)
-    assert result == list(range(len(original_rows)))  # Should select all rows in original_rows
+def test_table_row_tooltip(sample_processed_data):
+    """Tooltips are prepared for the rows of the visible page only, and cached."""
+    table_row_tooltip.cache_clear()
+    with patch("app.callbacks.ctx") as mock_ctx:
+        mock_ctx.triggered_id = None
+        result = gm_table_update_datatable(sample_processed_data, None, [], [], [], None, 0, 1)
+    tooltip_data = result[2]
+
+    assert len(tooltip_data) == 1
+    assert "| Strain_3 |" in tooltip_data[0]["GCF ID"]["value"]
+    assert table_row_tooltip.cache_info().currsize == 1
+    assert table_row_tooltip(sample_processed_data, "gcfs", 0) is tooltip_data[0]
+    # Unknown datasets are not cached, the tooltips are prepared once the dataset is available
+    with pytest.raises(KeyError):
+        table_row_tooltip("unknown-token", "gcfs", 0)
+    with patch(
+        "app.callbacks.get_dataset", return_value=DATASET_REGISTRY.get(sample_processed_data)
+    ):
+        assert "| Strain_3 |" in table_row_tooltip("unknown-token", "gcfs", 0)["GCF ID"]["value"]
+    assert table_row_tooltip.cache_info().currsize == 2
 
-    # Test with empty value (deselecting when no filter is applied)
-    result = gm_table_toggle_selection([], original_rows, None)
-    assert result == []
 
+def test_table_selected_rows(sample_processed_data):
+    with patch("app.callbacks.ctx") as mock_ctx:
+        mock_ctx.triggered_id = None
+        view_token = gm_table_update_datatable(sample_processed_data, None, [], [], [], None)[9][
+            "token"
+        ]
+
+    # All rows matching the filters are resolved from the rows kept server-side
+    selection = table_selection(view_token, select_all=True, n_rows=2)
+    assert table_selected_rows(selection).tolist() == [0, 1]
+    selection = table_selection(view_token, select_all=True, rows=[0], n_rows=2)
+    assert table_selected_rows(selection).tolist() == [1]
+    assert table_selected_rows(table_selection(view_token, rows=[1, 0])).tolist() == [0, 1]
+    assert table_selected_rows(None).tolist() == []
+
+    # The rows of an expired view can no longer be resolved
+    assert table_selected_rows(table_selection("unknown-token", select_all=True)) is None
+
+
+def test_clientside_callbacks():
+    """The clientside callbacks call functions defined in the assets."""
+    clientside_js = (Path(app.config.assets_folder) / "clientside.js").read_text()
+    functions = {
+        callback["clientside_function"]["function_name"]
+        for callback in app._callback_list
+        if callback.get("clientside_function")
+    }
 
-def test_gm_table_select_rows(sample_processed_data):
-    data = json.loads(sample_processed_data)
-    rows = data["gcf_data"]
-    selected_rows = [0, 1]
+    assert functions == {
+        "add_block",
+        "toggle_modal",
+        "toggle_download_button",
+        "toggle_selection",
+        "reset_results",
+        "select_rows",
+    }
+    for function in functions:
+        assert f"{function}: function" in clientside_js
 
-    output1, output2 = gm_table_select_rows(rows, selected_rows)
-    assert output1 == f"Total rows: {len(rows)}"
-    assert output2.startswith(f"Selected rows: {len(selected_rows)}\n")
 
-    # Test with no rows
-    output1, output2 = gm_table_select_rows([], None)
-    assert output1 == "No data available."
-    assert output2 == "No rows selected."
+def test_gm_table_update_selection():
+    page_data = [{"id": 2}, {"id": 3}]
 
+    # The selection of the page replaces the previous selection of its rows
+    selection = table_selection("view", rows=[0, 2])
+    assert gm_table_update_selection([3], page_data, selection) == table_selection(
+        "view", rows=[0, 3]
+    )
+    assert gm_table_update_selection([], page_data, selection) == table_selection("view", rows=[0])
 
-def test_gm_toggle_download_button():
-    """Test the toggle_download_button function with different inputs."""
-    # Test with empty table data - should disable the button
-    result = gm_toggle_download_button([])
-    assert result == (True, False, "")
+    # With all rows selected, the handle lists the deselected rows
+    selection = table_selection("view", select_all=True, rows=[0])
+    assert gm_table_update_selection([3], page_data, selection) == table_selection(
+        "view", select_all=True, rows=[0, 2]
+    )
 
-    # Test with populated table data - should enable the button
-    sample_data = [{"GCF ID": 1, "# Links": 5}]
-    result = gm_toggle_download_button(sample_data)
-    assert result == (False, False, "")
+    # Re-selecting the stored rows of the page is not a change
+    with pytest.raises(dash.exceptions.PreventUpdate):
+        gm_table_update_selection([2], page_data, table_selection("view", rows=[0, 2]))
+    with pytest.raises(dash.exceptions.PreventUpdate):
+        gm_table_update_selection([2, 3], page_data, table_selection("view", select_all=True))
 
 
-def test_gm_generate_excel_error_handling():
+def test_gm_generate_excel_error_handling(sample_links_data):
     """Test the generate_excel function error handling."""
-    table_data = [{"GCF ID": 1, "spectrum_ids_str": "123"}]
-    detailed_data = {"1": {"spectrum_ids": ["123"]}}
+    table_data = [{"GCF ID": 1, "# Links": 5}]
+
+    with patch("app.callbacks.ctx") as mock_ctx:
+        mock_ctx.triggered_id = "gm-results-button"
+        results_data = gm_update_results_datatable(
+            1,
+            table_selection(None, rows=[0, 1]),
+            sample_links_data,
+            ["METCALF"],
+            ["RAW"],
+            [None],
+            "best",
+        )[8]
 
     with (
         patch("app.callbacks.ctx") as mock_ctx,
@@ -650,55 +1376,115 @@ def test_gm_generate_excel_error_handling():
         # Simulate an error during Excel generation
         mock_writer.side_effect = Exception("Excel write error")
 
-        result = gm_generate_excel(1, table_data, detailed_data)
+        result = gm_generate_excel(1, table_data, results_data)
 
         # Should return an error message
         assert result[0] is None
         assert result[1] is True  # Alert is open
         assert "Error generating Excel file" in result[2]
 
+    # The candidate links can no longer be rebuilt, as their dataset is no longer available
+    with patch("app.callbacks.ctx") as mock_ctx:
+        mock_ctx.triggered = True
+        RESULTS_REGISTRY.discard(results_data["token"])
+        result = gm_generate_excel(1, table_data, {**results_data, "dataset": "unknown-token"})
+        assert result[0] is None
+        assert result[1] is True
+        assert "no longer available" in result[2]
 
-# ----------------- MG tab tests -----------------
-@pytest.mark.parametrize(
-    "n_clicks, initial_blocks, expected_result",
-    [
-        ([], ["block1"], pytest.raises(dash.exceptions.PreventUpdate)),  # no buttons clicked
-        ([1], ["block1", "block2"], ["block1", "block2", "test-uuid"]),  # one button clicked once
-        (
-            [1, 1, 1],
-            ["block1", "block2"],
-            ["block1", "block2", "test-uuid"],
-        ),  # three buttons, each clicked once
-    ],
-)
-def test_mg_filter_add_block(mock_uuid, n_clicks, initial_blocks, expected_result):
-    if isinstance(expected_result, list):
-        result = mg_filter_add_block(n_clicks, initial_blocks)
-        assert result == expected_result
-    else:
-        with expected_result:
-            mg_filter_add_block(n_clicks, initial_blocks)
 
+def test_gm_generate_excel_rebuilds_candidates(sample_links_data):
+    """Candidate links no longer held in memory are rebuilt from the detailed data store."""
+    table_data = [{"GCF ID": 1, "# Links": 2}]
+    with patch("app.callbacks.ctx") as mock_ctx:
+        mock_ctx.triggered_id = "gm-results-button"
+        results_data = gm_update_results_datatable(
+            1,
+            table_selection(None, rows=[1, 0]),
+            sample_links_data,
+            ["METCALF"],
+            ["RAW"],
+            [None],
+            "1",
+        )[8]
+    candidates = RESULTS_REGISTRY.get(results_data["token"])
+    # As if the candidate links were evicted, or gathered by another worker
+    RESULTS_REGISTRY.discard(results_data["token"])
+
+    with patch("app.callbacks.ctx") as mock_ctx:
+        mock_ctx.triggered = True
+        result = gm_generate_excel(1, table_data, results_data)
+    assert result[0] is not None
+    assert result[1] is False
+
+    restored = RESULTS_REGISTRY.get(results_data["token"])
+    assert restored is not candidates
+    assert restored.item_ids.tolist() == candidates.item_ids.tolist()
+    assert restored.rows.tolist() == candidates.rows.tolist()
+    assert restored.bounds.tolist() == candidates.bounds.tolist()
+    assert restored.n_sorted.tolist() == candidates.n_sorted.tolist()
 
+
+# ----------------- MG tab tests -----------------
 def test_mg_filter_apply(sample_processed_data):
-    data = json.loads(sample_processed_data)
-    df = pd.DataFrame(data["mf_data"])
+    dataset = DATASET_REGISTRY.get(sample_processed_data)
 
     # Test MF_ID filter
-    mf_ids = df["MF ID"].iloc[:1].tolist()
-    filtered_df = mg_filter_apply(df, ["MF_ID"], [",".join(mf_ids)], [""])
-    assert len(filtered_df) == 1
-    assert set(filtered_df["MF ID"]) == set(mf_ids)
+    rows = mg_filter_apply(dataset, ["MF_ID"], ["MF_2, unknown"], [""])
+    assert rows.tolist() == [1]
+
+    # IDs can be separated by commas, semicolons or whitespace and given as prefixes
+    rows = mg_filter_apply(dataset, ["MF_ID"], ["MF_1;\nMF_3  MF_*"], [""])
+    assert rows.tolist() == [0, 1]
 
     # Test SPECTRUM_ID filter
-    spec_id = df["Spectra IDs"].iloc[0][0]  # Get first spectrum ID from first row
-    filtered_df = mg_filter_apply(df, ["SPECTRUM_ID"], [""], [spec_id])
-    assert len(filtered_df) == 1
-    assert spec_id in filtered_df.iloc[0]["Spectra IDs"]
+    rows = mg_filter_apply(dataset, ["SPECTRUM_ID"], [""], ["Spec_4"])
+    assert rows.tolist() == [1]
+    rows = mg_filter_apply(dataset, ["SPECTRUM_ID"], [""], ["Spec_5, Spec_1, Spec_2"])
+    assert rows.tolist() == [0, 1]
+
+    # Test strain filters, which take their input from the MF IDs text input
+    rows = mg_filter_apply(dataset, ["STRAIN"], ["Strain_1"], [""])
+    assert rows.tolist() == [0]
+    rows = mg_filter_apply(dataset, ["MIN_STRAINS", "STRAIN"], ["2", "Strain_3"], ["", ""], ["AND"])
+    assert rows.tolist() == [1]
+    # A block without a valid number of strains is left out
+    rows = mg_filter_apply(dataset, ["MIN_STRAINS"], ["many"], [""])
+    assert rows.tolist() == [0, 1]
+
+    # Test PRECURSOR_MZ filter, with a ppm or Da tolerance around each target
+    menus = ["PRECURSOR_MZ"]
+    rows = mg_filter_apply(dataset, menus, [""], [""], None, ["180.1; 220.3"], [10], ["PPM"])
+    assert rows.tolist() == [0, 1]
+    rows = mg_filter_apply(dataset, menus, [""], [""], None, ["210"], [10], ["PPM"])
+    assert rows.tolist() == []
+    rows = mg_filter_apply(dataset, menus, [""], [""], None, ["210"], [1], ["DA"])
+    assert rows.tolist() == [1]
+    # A tolerance of 0 only keeps exact matches
+    rows = mg_filter_apply(dataset, menus, [""], [""], None, ["180.1"], [0], ["PPM"])
+    assert rows.tolist() == [1]
+    rows = mg_filter_apply(dataset, menus, [""], [""], None, ["180.1001"], [0], ["PPM"])
+    assert rows.tolist() == []
+    # An empty tolerance uses the default of its unit
+    rows = mg_filter_apply(dataset, menus, [""], [""], None, ["210"], [None], ["DA"])
+    assert rows.tolist() == []
+    rows = mg_filter_apply(dataset, menus, [""], [""], None, ["210.7"], [None], ["DA"])
+    assert rows.tolist() == [1]
+    rows = mg_filter_apply(dataset, menus, [""], [""], None, ["180.1001"], [None], ["PPM"])
+    assert rows.tolist() == [1]
+    # A cleared tolerance input sends an empty string, like None it uses the default
+    rows = mg_filter_apply(dataset, menus, [""], [""], None, ["210.7"], [""], ["DA"])
+    assert rows.tolist() == [1]
+    rows = mg_filter_apply(dataset, menus, [""], [""], None, ["180.1001"], [""], ["PPM"])
+    assert rows.tolist() == [1]
+    # A block with an invalid or negative tolerance is left out
+    for tolerance in ["abc", -1, "nan"]:
+        rows = mg_filter_apply(dataset, menus, [""], [""], None, ["210"], [tolerance], ["DA"])
+        assert rows.tolist() == [0, 1]
 
     # Test no filter
-    filtered_df = mg_filter_apply(df, [], [], [])
-    assert len(filtered_df) == len(df)
+    rows = mg_filter_apply(dataset, [], [], [])
+    assert rows.tolist() == [0, 1]
 
 
 def test_mg_table_update_datatable(sample_processed_data):
@@ -714,13 +1500,15 @@ def test_mg_table_update_datatable(sample_processed_data):
             None,  # checkbox_value
         )
 
-        assert len(result) == 7
-        data, columns, tooltip_data, style, selected_rows, checkbox_value, _ = result
+        assert len(result) == 11
+        data, columns, tooltip_data, style, selected_rows, checkbox_value, *_ = result
 
         # Check data
         assert len(data) == 2
         assert data[0]["MF ID"] == "MF_1"
+        assert data[0]["Spectra GNPS IDs"] == "GNPS_1, GNPS_2"
         assert data[1]["MF ID"] == "MF_2"
+        assert "| Spec_3 | 180.1000 |" in tooltip_data[1]["# Spectra"]["value"]
 
         # Check columns
         assert len(columns) == 3
@@ -739,7 +1527,19 @@ def test_mg_table_update_datatable(sample_processed_data):
 
         # Test with None input
         result = mg_table_update_datatable(None, None, [], [], [], None)
-        assert result == ([], [], [], {"display": "none"}, [], [], None)
+        assert result == (
+            [],
+            [],
+            [],
+            {"display": "none"},
+            [],
+            [],
+            None,
+            0,
+            0,
+            None,
+            table_selection(None),
+        )
 
         # Test with apply-filters-button triggered
         mock_ctx.triggered_id = "mg-filter-apply-button"
@@ -752,53 +1552,23 @@ def test_mg_table_update_datatable(sample_processed_data):
             ["disabled"],  # checkbox_value
         )
 
-        data, columns, tooltip_data, style, selected_rows, checkbox_value, _ = result
+        data, _, _, _, _, checkbox_value, *_ = result
         assert len(data) == 1
         assert data[0]["MF ID"] == "MF_1"
         assert checkbox_value == []
 
 
-def test_mg_table_toggle_selection(sample_processed_data):
-    data = json.loads(sample_processed_data)
-    original_rows = data["mf_data"]
-    filtered_rows = original_rows[:1]
-
-    # Test selecting all rows
-    result = mg_table_toggle_selection(["disabled"], original_rows, filtered_rows)
-    assert result == [0]  # Should select indices of rows matching the filter
-
-    # Test deselecting all rows
-    result = mg_table_toggle_selection([], original_rows, filtered_rows)
-    assert result == []
-
-    # Test with None filtered_rows
-    result = mg_table_toggle_selection(["disabled"], original_rows, None)
-    assert result == list(range(len(original_rows)))  # Should select all rows in original_rows
-
-    # Test with empty value (deselecting when no filter is applied)
-    result = mg_table_toggle_selection([], original_rows, None)
-    assert result == []
-
-
-def test_mg_table_select_rows(sample_processed_data):
-    data = json.loads(sample_processed_data)
-    rows = data["mf_data"]
-    selected_rows = [0, 1]
-
-    output1, output2 = mg_table_select_rows(rows, selected_rows)
-    assert output1 == f"Total rows: {len(rows)}"
-    assert output2.startswith(f"Selected rows: {len(selected_rows)}\n")
-
-    # Test with no rows
-    output1, output2 = mg_table_select_rows([], None)
-    assert output1 == "No data available."
-    assert output2 == "No rows selected."
-
-
-def test_mg_generate_excel_error_handling():
+def test_mg_generate_excel_error_handling(sample_links_data):
     """Test the mg_generate_excel function error handling."""
-    table_data = [{"MF ID": 1, "gcf_ids_str": "123"}]
-    detailed_data = {"1": {"spectrum_ids": ["123"]}}
+    table_data = [{"MF ID": 1, "# Links": 5}]
+    candidates = CandidateLinks(
+        dataset_token=sample_links_data,
+        prefix="mg",
+        item_ids=np.array(["1"]),
+        rows=np.array([], dtype=np.int64),
+        bounds=np.array([0, 0]),
+    )
+    results_data = {"token": RESULTS_REGISTRY.register(candidates)}
 
     with (
         patch("app.callbacks.ctx") as mock_ctx,
@@ -808,9 +1578,17 @@ def test_mg_generate_excel_error_handling():
         # Simulate an error during Excel generation
         mock_writer.side_effect = Exception("Excel write error")
 
-        result = mg_generate_excel(1, table_data, detailed_data)
+        result = mg_generate_excel(1, table_data, results_data)
 
         # Should return an error message
         assert result[0] is None
         assert result[1] is True  # Alert is open
         assert "Error generating Excel file" in result[2]
+
+    # There are no candidate links without results
+    with patch("app.callbacks.ctx") as mock_ctx:
+        mock_ctx.triggered = True
+        result = mg_generate_excel(1, table_data, None)
+        assert result[0] is None
+        assert result[1] is True
+        assert "no longer available" in result[2]
@@ -0,0 +1,139 @@
+import json
+import re
+import shutil
+import subprocess
+from pathlib import Path
+import dash
+import pytest
+from app.callbacks import app
+from app.callbacks import table_selection
+
+
+CLIENTSIDE_JS = Path(app.config.assets_folder) / "clientside.js"
+
+# Loads the assets in a context like the one of the Dash renderer, calls one function with the
+# arguments given as JSON, and prints its result as JSON
+NODE_RUNNER = """
+const fs = require("fs");
+const vm = require("vm");
+const PreventUpdate = {};
+const context = {window: {dash_clientside: {PreventUpdate}}, crypto: globalThis.crypto};
+vm.runInNewContext(fs.readFileSync(process.argv[1], "utf8"), context);
+const [name, args] = JSON.parse(process.argv[2]);
+let result;
+try {
+    result = context.window.dash_clientside.nplinker[name](...args);
+} catch (e) {
+    if (e !== PreventUpdate) throw e;
+    result = "PreventUpdate";
+}
+console.log(JSON.stringify(result));
+"""
+
+pytestmark = pytest.mark.skipif(shutil.which("node") is None, reason="requires node")
+
+
+def run_clientside(function: str, *args):
+    """Run a clientside callback of the assets under node and return its result."""
+    process = subprocess.run(
+        ["node", "-e", NODE_RUNNER, str(CLIENTSIDE_JS), json.dumps([function, list(args)])],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    result = json.loads(process.stdout)
+    if result == "PreventUpdate":
+        raise dash.exceptions.PreventUpdate
+    return result
+
+
+@pytest.mark.parametrize("n_clicks", [[1], [1, 1, 1]])
+def test_add_block(n_clicks):
+    result = run_clientside("add_block", n_clicks, ["block1", "block2"])
+    assert result[:2] == ["block1", "block2"]
+    assert len(result) == 3
+    assert re.fullmatch(
+        r"[0-9a-f]{8}-[0-9a-f]{4}-4[0-9a-f]{3}-[89ab][0-9a-f]{3}-[0-9a-f]{12}", result[2]
+    )
+
+    # No buttons clicked
+    with pytest.raises(dash.exceptions.PreventUpdate):
+        run_clientside("add_block", [None], ["block1"])
+
+
+def test_toggle_modal():
+    assert run_clientside("toggle_modal", 1, None, False) is True
+    assert run_clientside("toggle_modal", 1, 1, True) is False
+    assert run_clientside("toggle_modal", None, None, True) is True
+
+
+def test_toggle_download_button():
+    assert run_clientside("toggle_download_button", []) == [True, False, ""]
+    assert run_clientside("toggle_download_button", None) == [True, False, ""]
+    assert run_clientside("toggle_download_button", [{"GCF ID": 1, "# Links": 5}]) == [
+        False,
+        False,
+        "",
+    ]
+
+
+def test_toggle_selection():
+    page_data = [{"id": 2}, {"id": 3}]
+    selection = table_selection("view", rows=[2, 7], n_rows=10)
+
+    # Selecting all rows matching the filters, on all pages, is a flag on the view
+    selection, selected_rows = run_clientside(
+        "toggle_selection", ["disabled"], selection, page_data
+    )
+    assert selection == table_selection("view", select_all=True, n_rows=10)
+    assert selected_rows == [0, 1]
+
+    # Deselecting all rows
+    selection, selected_rows = run_clientside("toggle_selection", [], selection, page_data)
+    assert selection == table_selection("view", n_rows=10)
+    assert selected_rows == []
+
+    # Without rows matching the filters there is nothing to select
+    assert run_clientside("toggle_selection", ["disabled"], None, page_data) == [None, []]
+
+
+def test_toggle_selection_keeps_rows_of_other_pages():
+    """The checkbox set to its current value, e.g. when paging, keeps the selected rows."""
+    page_data = [{"id": 2}, {"id": 3}]
+    selection = table_selection("view", rows=[2, 7], n_rows=10)
+    with pytest.raises(dash.exceptions.PreventUpdate):
+        run_clientside("toggle_selection", [], selection, page_data)
+
+    selection = table_selection("view", select_all=True, rows=[7], n_rows=10)
+    with pytest.raises(dash.exceptions.PreventUpdate):
+        run_clientside("toggle_selection", ["disabled"], selection, page_data)
+
+
+def test_select_rows():
+    output1, output2 = run_clientside("select_rows", table_selection("view", rows=[0, 1], n_rows=2))
+    assert output1 == "Total rows: 2"
+    assert output2.startswith("Selected rows: 2\n")
+
+    # All rows but the deselected ones
+    selection = table_selection("view", select_all=True, rows=[1], n_rows=2)
+    assert run_clientside("select_rows", selection)[1].startswith("Selected rows: 1\n")
+
+    # Test with no rows
+    assert run_clientside("select_rows", None) == ["No data available.", "No rows selected."]
+    assert run_clientside("select_rows", table_selection(None)) == [
+        "No data available.",
+        "No rows selected.",
+    ]
+
+
+def test_reset_results():
+    assert run_clientside("reset_results", table_selection("view")) == [
+        "",
+        False,
+        [],
+        [],
+        {"display": "none"},
+        {"color": "#888888"},
+        True,
+        None,
+    ]
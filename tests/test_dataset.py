@@ -0,0 +1,323 @@
+import numpy as np
+import pandas as pd
+import pytest
+from app.bitmaps import bitmap_to_rows
+from app.dataset import IdIndex
+from app.dataset import LinkTable
+from app.dataset import TableView
+from app.dataset import build_dataset
+from nplinker.genomics import BGC
+from nplinker.genomics import GCF
+from nplinker.metabolomics import MolecularFamily
+from nplinker.metabolomics import Spectrum
+from nplinker.scoring import LinkGraph
+from nplinker.scoring import Score
+from nplinker.strain import Strain
+
+
+def metcalf(value: float) -> Score:
+    return Score("metcalf", value, {"cutoff": 0, "standardised": False})
+
+
+@pytest.fixture
+def objects():
+    strain = Strain("strain1")
+    gcfs = []
+    for i, bgc_class in enumerate([("NRP",), None]):
+        gcf = GCF(f"{i + 1}")
+        bgc = BGC(f"BGC{i}")
+        bgc.mibig_bgc_class = bgc_class
+        bgc.strain = strain
+        gcf.add_bgc(bgc)
+        gcfs.append(gcf)
+
+    spectra = [Spectrum(f"{i + 1}", [1.0], [1.0], 100.0 + i, 1) for i in range(3)]
+    mf = MolecularFamily("1")
+    for spectrum in spectra:
+        spectrum.strains.add(strain)
+        mf.add_spectrum(spectrum)
+
+    links = LinkGraph()
+    # The same spectrum and GCF take part in several links, in both directions
+    links.add_link(gcfs[0], spectra[0], metcalf=metcalf(3.0))
+    links.add_link(spectra[0], gcfs[1], metcalf=metcalf(2.0))
+    links.add_link(gcfs[0], spectra[1], metcalf=metcalf(1.0))
+    links.add_link(gcfs[0], mf, metcalf=metcalf(4.0))
+    links.add_link(mf, gcfs[1], metcalf=metcalf(5.0))
+    return gcfs, spectra, [mf], links
+
+
+def test_build_dataset_entities(objects):
+    gcfs, spectra, mfs, links = objects
+    dataset = build_dataset(gcfs, spectra, mfs, links)
+
+    assert dataset.gcfs["GCF ID"].tolist() == ["1", "2"]
+    assert dataset.gcfs["BGC Classes"].tolist() == [[["NRP"]], [["Unknown"]]]
+    assert dataset.spectra["Spectrum ID"].tolist() == ["1", "2", "3"]
+    assert dataset.spectra["MF ID"].tolist() == ["1", "1", "1"]
+    assert dataset.spectra["strains"].tolist() == [["strain1"]] * 3
+    assert dataset.mfs["Spectra IDs"].tolist() == [["1", "2", "3"]]
+    assert {n: rows.tolist() for n, rows in dataset.n_bgcs.items()} == {1: [0, 1]}
+    assert {c: rows.tolist() for c, rows in dataset.class_bgcs.items()} == {
+        "NRP": [0],
+        "Unknown": [1],
+    }
+    assert dataset.bucket_rows("n_bgcs", 1).tolist() == [0, 1]
+    assert dataset.bucket_rows("class_bgcs", "Unknown").tolist() == [1]
+    assert dataset.bucket_rows("class_bgcs", "PKS").tolist() == []
+
+
+def test_build_dataset_buckets():
+    # The first GCF has two NRP BGCs, one of them also a polyketide
+    gcfs = [GCF("1"), GCF("2")]
+    for i, (gcf, bgc_class) in enumerate(
+        [(gcfs[0], ("NRP",)), (gcfs[0], ("NRP", "Polyketide")), (gcfs[1], ("NRP",))]
+    ):
+        bgc = BGC(f"BGC{i}")
+        bgc.mibig_bgc_class = bgc_class
+        gcf.add_bgc(bgc)
+    dataset = build_dataset(gcfs, [], [], None)
+
+    # Each GCF is counted once per class
+    assert {n: rows.tolist() for n, rows in dataset.n_bgcs.items()} == {2: [0], 1: [1]}
+    assert {c: rows.tolist() for c, rows in dataset.class_bgcs.items()} == {
+        "NRP": [0, 1],
+        "Polyketide": [0],
+    }
+    assert dataset.bucket_counts == {
+        "n_bgcs": {2: 1, 1: 1},
+        "class_bgcs": {"NRP": 2, "Polyketide": 1},
+    }
+
+
+def test_build_dataset_links(objects):
+    gcfs, spectra, mfs, links = objects
+    dataset = build_dataset(gcfs, spectra, mfs, links)
+
+    gm_links = dataset.gm_links
+    gm = sorted(
+        zip(
+            dataset.gcfs["GCF ID"].to_numpy()[gm_links.source[gm_links.link]],
+            dataset.spectra["Spectrum ID"].to_numpy()[gm_links.target[gm_links.link]],
+            gm_links.score,
+        )
+    )
+    assert gm == [("1", "1", 3.0), ("1", "2", 1.0), ("2", "1", 2.0)]
+
+    mg_links = dataset.mg_links
+    mg = sorted(
+        zip(
+            dataset.mfs["MF ID"].to_numpy()[mg_links.source[mg_links.link]],
+            dataset.gcfs["GCF ID"].to_numpy()[mg_links.target[mg_links.link]],
+            mg_links.score,
+        )
+    )
+    assert mg == [("1", "1", 4.0), ("1", "2", 5.0)]
+    assert gm_links.methods == ("metcalf",)
+    assert not gm_links.standardised.any()
+
+
+def test_build_dataset_multiple_methods(objects):
+    gcfs, spectra, mfs, _ = objects
+    links = LinkGraph()
+    links.add_link(
+        gcfs[0],
+        spectra[0],
+        metcalf=metcalf(3.0),
+        rosetta=Score("rosetta", 0.5, {"cutoff": 0.1, "standardised": True}),
+    )
+    links.add_link(gcfs[1], spectra[0], metcalf=metcalf(1.0))
+    dataset = build_dataset(gcfs, spectra, mfs, links)
+
+    # Each link is stored once, with one score per method
+    gm_links = dataset.gm_links
+    assert len(gm_links) == 2
+    assert gm_links.n_scores == 3
+    assert gm_links.methods == ("metcalf", "rosetta")
+    assert gm_links.method.dtype == np.int8
+
+    df = gm_links.to_frame()
+    assert len(df) == 3
+    assert isinstance(df["method"].dtype, pd.CategoricalDtype)
+    rosetta = df[df["method"] == "rosetta"]
+    assert rosetta[["source", "target", "score", "cutoff"]].values.tolist() == [[0, 0, 0.5, 0.1]]
+    assert rosetta["standardised"].tolist() == [True]
+    assert sorted(df.loc[df["method"] == "metcalf", "score"]) == [1.0, 3.0]
+
+
+def test_build_dataset_without_links(objects):
+    gcfs, spectra, mfs, _ = objects
+    dataset = build_dataset(gcfs, spectra, mfs, None)
+
+    assert dataset.gm_links is None
+    assert dataset.mg_links is None
+    assert dataset.nbytes > 0
+
+
+def test_build_dataset_entities_only_in_links(objects):
+    gcfs, spectra, mfs, links = objects
+    # Entities missing from the entity lists are added when a link refers to them
+    dataset = build_dataset([], [], [], links)
+
+    assert sorted(dataset.gcfs["GCF ID"]) == ["1", "2"]
+    assert sorted(dataset.spectra["Spectrum ID"]) == ["1", "2"]
+    assert dataset.mfs["MF ID"].tolist() == ["1"]
+    assert dataset.n_bgcs == {}
+
+
+def test_link_table_csr_index():
+    links = LinkTable(
+        source=[2, 0, 2, 1],
+        target=[0, 1, 2, 3],
+        link=[0, 1, 2, 3, 0],
+        method=[0, 0, 0, 0, 1],
+        score=[1.0, 2.0, 3.0, 4.0, 5.0],
+        cutoff=[0.0] * 5,
+        standardised=[False] * 5,
+        methods=("metcalf", "rosetta"),
+        n_sources=4,
+    )
+
+    # Scores are ordered by source row, keeping their order within a source
+    assert links.source[links.link].tolist() == [0, 1, 2, 2, 2]
+    assert links.score.tolist() == [2.0, 4.0, 1.0, 3.0, 5.0]
+    assert links.offsets.tolist() == [0, 1, 2, 5, 5]
+
+    assert links.score[links.score_rows(np.array([2]))].tolist() == [1.0, 3.0, 5.0]
+    assert links.score_rows(np.array([0, 2])).tolist() == [0, 2, 3, 4]
+    # Sources without links and out of range rows are ignored
+    assert links.score_rows(np.array([3, 7])).tolist() == []
+    assert links.to_frame(links.score_rows(np.array([1])))["target"].tolist() == [3]
+
+
+def test_dataset_entity_rows(objects):
+    dataset = build_dataset(*objects)
+
+    assert dataset.gcf_rows(["2", "unknown", "1", "2"]).tolist() == [0, 1]
+    assert dataset.mf_rows(["1"]).tolist() == [0]
+    assert dataset.mf_rows([]).tolist() == []
+
+
+def test_link_table_cutoff_partitions():
+    links = LinkTable(
+        source=[0, 1, 2, 3, 4],
+        target=[0, 0, 0, 0, 0],
+        link=[0, 1, 2, 3, 4],
+        method=[0, 0, 0, 1, 0],
+        score=[1.0, 2.0, 3.0, 4.0, 5.0],
+        cutoff=[3.0, 1.0, 2.0, 1.0, 0.5],
+        standardised=[False, False, False, False, True],
+        methods=("metcalf", "rosetta"),
+    )
+
+    start, end = links.cutoff_range("metcalf", standardised=False)
+    assert links.partition_cutoffs[start:end].tolist() == [1.0, 2.0, 3.0]
+    start, end = links.cutoff_range("metcalf", standardised=False, cutoff=2.0)
+    assert sorted(links.partition_order[start:end].tolist()) == [0, 2]
+    assert (links.partition_rank[links.partition_order] == np.arange(5)).all()
+
+    start, end = links.cutoff_range("metcalf", standardised=True, cutoff=1.0)
+    assert start == end
+    start, end = links.cutoff_range("rosetta", standardised=False)
+    assert links.partition_order[start:end].tolist() == [3]
+    assert links.cutoff_range("nplclass", standardised=False) == (0, 0)
+
+
+def test_table_view_sort(objects):
+    dataset = build_dataset(*objects)
+    view = TableView(dataset_token="token", table="gcfs", rows=np.array([0, 1]))
+
+    # Numeric IDs are sorted by value
+    assert dataset.table_sort_keys("gcfs")["GCF ID"].tolist() == [0, 1]
+    assert view.sort(dataset, [{"column_id": "GCF ID", "direction": "desc"}]).tolist() == [1, 0]
+    # Ties keep the previous sort columns, then table order
+    sort_by = [
+        {"column_id": "# BGCs", "direction": "asc"},
+        {"column_id": "BGC Classes", "direction": "desc"},
+    ]
+    assert view.sort(dataset, sort_by).tolist() == [1, 0]
+    assert view.sort(dataset, [{"column_id": "# BGCs", "direction": "asc"}]).tolist() == [0, 1]
+    # Unknown columns are ignored
+    assert view.sort(dataset, [{"column_id": "unknown", "direction": "asc"}]).tolist() == [0, 1]
+
+
+def test_dataset_bgc_class_bitmap(objects):
+    dataset = build_dataset(*objects)
+
+    assert sorted(dataset.class_index) == ["nrp", "unknown"]
+    assert bitmap_to_rows(dataset.bgc_class_bitmap(["NRP"]), 2).tolist() == [0]
+    assert bitmap_to_rows(dataset.bgc_class_bitmap(["Unknown", "nrp"]), 2).tolist() == [0, 1]
+    assert bitmap_to_rows(dataset.bgc_class_bitmap(["PKS"]), 2).tolist() == []
+
+
+def test_dataset_spectrum_mf_rows(objects):
+    dataset = build_dataset(*objects)
+
+    assert dataset.spectrum_mf_rows(["2", "unknown", "3"]).tolist() == [0]
+    assert dataset.spectrum_mf_rows(["unknown"]).tolist() == []
+
+
+def test_dataset_precursor_mz_mf_rows(objects):
+    dataset = build_dataset(*objects)
+
+    assert dataset.precursor_mz.tolist() == [100.0, 101.0, 102.0]
+    # Tolerances include both ends, in ppm of the target or in Da
+    assert dataset.precursor_mz_mf_rows([101.001], 10).tolist() == [0]
+    assert dataset.precursor_mz_mf_rows([101.002], 10).tolist() == []
+    assert dataset.precursor_mz_mf_rows([101.002], 0.01, "DA").tolist() == [0]
+    assert dataset.precursor_mz_mf_rows([50.0, 102.5], 0.5, "DA").tolist() == [0]
+    assert dataset.precursor_mz_mf_rows([], 10).tolist() == []
+
+
+def test_id_index_match():
+    index = IdIndex(
+        np.array(["1", "2", "10", "25", "BGC0001", "BGC0002", "BGC1000", "2"]), np.arange(8)
+    )
+
+    assert index.match(["10", "unknown"]).tolist() == [2]
+    # Repeated IDs match all their rows
+    assert index.match(["2"]).tolist() == [1, 7]
+    # Integer ranges include both ends, in either order
+    assert index.match(["2-10"]).tolist() == [1, 2, 7]
+    assert index.match(["25-10"]).tolist() == [2, 3]
+    assert index.match(["100-200"]).tolist() == []
+    # Prefixes match as text
+    assert index.match(["BGC000*"]).tolist() == [4, 5]
+    assert index.match(["1*"]).tolist() == [0, 2]
+    assert index.match(["*"]).tolist() == list(range(8))
+    # Terms are combined
+    assert index.match(["1", "20-30", "BGC1*"]).tolist() == [0, 3, 6]
+    assert index.match([]).tolist() == []
+
+
+def test_dataset_strain_rows(objects):
+    gcfs, spectra, mfs, links = objects
+    gcfs[1].strains.add(Strain("strain2"))
+    dataset = build_dataset(gcfs, spectra, mfs, links)
+
+    assert dataset.strain_index.ids.tolist() == ["strain1", "strain2"]
+    assert dataset.strain_rows("gcfs", ["strain2", "unknown"]).tolist() == [1]
+    assert dataset.strain_rows("gcfs", ["strain*"]).tolist() == [0, 1]
+    assert dataset.strain_rows("mfs", ["strain2"]).tolist() == []
+    assert dataset.min_strains_rows("gcfs", 2).tolist() == [1]
+    assert dataset.min_strains_rows("mfs", 2).tolist() == []
+
+    # GCF 2 has strain2 on its own, and shares strain1 with the spectra
+    shared, only_gcf, only_spectrum = dataset.strain_overlap(
+        "gcfs", np.array([0, 1]), "spectra", np.array([0, 0])
+    )
+    assert [dataset.strain_names(bitset) for bitset in shared] == [["strain1"], ["strain1"]]
+    assert [dataset.strain_names(bitset) for bitset in only_gcf] == [[], ["strain2"]]
+    assert [dataset.strain_names(bitset) for bitset in only_spectrum] == [[], []]
+
+
+def test_dataset_table_frame(objects):
+    dataset = build_dataset(*objects)
+
+    # The display values are formatted when the dataset is built, paging only slices them
+    assert dataset.table_frame("gcfs") is dataset.display["gcfs"]
+    frame = dataset.table_frame("gcfs", np.array([1]))
+    assert frame.to_dict("records") == [
+        {"GCF ID": "2", "# BGCs": 1, "BGC Classes": "Unknown", "MiBIG IDs": "None"}
+    ]
+    assert dataset.table_frame("mfs")["Spectra GNPS IDs"].tolist() == ["None"]
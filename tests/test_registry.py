@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+from app.registry import DatasetRegistry
+from app.registry import estimate_nbytes
+
+
+def test_estimate_nbytes():
+    array = np.zeros(1000, dtype=np.float64)
+    assert estimate_nbytes(array) == array.nbytes
+
+    df = pd.DataFrame({"a": np.arange(100)})
+    assert estimate_nbytes(df) == df.memory_usage(deep=True).sum()
+
+    nested = {"links": [{"id": str(i)} for i in range(100)]}
+    assert estimate_nbytes(nested) > estimate_nbytes({"links": []})
+
+
+def test_registry_register_and_get():
+    registry = DatasetRegistry(max_bytes=10**6)
+    token = registry.register({"a": 1})
+    assert token in registry
+    assert registry.get(token) == {"a": 1}
+    assert registry.get("unknown") is None
+    assert registry.get(None) is None
+
+    # Re-registering under the same token replaces the value and its accounting
+    registry.register({"a": 2}, token=token)
+    assert registry.get(token) == {"a": 2}
+    assert len(registry) == 1
+    assert registry.total_bytes == estimate_nbytes({"a": 2})
+
+    registry.discard(token)
+    assert token not in registry
+    assert registry.total_bytes == 0
+
+
+def test_registry_lru_eviction():
+    array = np.zeros(1000, dtype=np.uint8)
+    registry = DatasetRegistry(max_bytes=2500)
+    first = registry.register(array.copy())
+    second = registry.register(array.copy())
+
+    # Touch the first entry so that the second one becomes the least recently used
+    assert registry.get(first) is not None
+    third = registry.register(array.copy())
+
+    assert first in registry
+    assert second not in registry
+    assert third in registry
+    assert registry.total_bytes == 2000
+
+
+def test_registry_keeps_newest_entry_over_budget():
+    registry = DatasetRegistry(max_bytes=10)
+    token = registry.register(np.zeros(1000, dtype=np.uint8))
+    assert token in registry
+    assert len(registry) == 1
+
+
+def test_registry_max_entries_and_pop():
+    registry = DatasetRegistry(max_bytes=10**6, max_entries=2)
+    first = registry.register("a", nbytes=1)
+    second = registry.register("b", nbytes=1)
+    third = registry.register("c", nbytes=1)
+    assert first not in registry
+    assert len(registry) == 2
+
+    assert registry.pop(second) == "b"
+    assert registry.pop(second) is None
+    assert registry.total_bytes == 1
+    assert registry.get(third) == "c"